@@ -22,9 +22,12 @@ from CTFd.plugins import init_plugins
 from CTFd.utils.crypto import sha256
 from CTFd.utils.initialization import (
     init_cli,
+    init_counters,
     init_events,
+    init_grading,
     init_logs,
     init_request_processors,
+    init_submissions,
     init_template_filters,
     init_template_globals,
 )
@@ -336,6 +339,9 @@ def create_app(config="CTFd.config.Config"):
 
         init_logs(app)
         init_events(app)
+        init_counters(app)
+        init_submissions(app)
+        init_grading(app)
         init_plugins(app)
         init_cli(app)
 
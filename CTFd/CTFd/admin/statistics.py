@@ -4,6 +4,7 @@ from CTFd.admin import admin
 from CTFd.models import Challenges, Fails, Solves, Teams, Tracking, Users, db
 from CTFd.utils.config import get_config
 from CTFd.utils.decorators import admins_only
+from CTFd.utils.logging import get_log_stats
 from CTFd.utils.modes import get_model
 from CTFd.utils.scores import get_standings
 from CTFd.utils.updates import update_check
@@ -214,4 +215,5 @@ def statistics():
         top_users=account_scores,
         all_challenges=all_challenges,
         account_solves=account_solves,
+        log_stats=get_log_stats(),
     )
@@ -13,6 +13,7 @@ from CTFd.schemas.awards import AwardSchema
 from CTFd.utils.config import is_teams_mode
 from CTFd.utils.decorators import admins_only
 from CTFd.utils.helpers.models import build_model_filters
+from CTFd.utils.scores.engine import record_award, record_removal
 
 awards_namespace = Namespace("awards", description="Endpoint to retrieve Awards")
 
@@ -128,12 +129,13 @@ class AwardList(Resource):
 
         db.session.add(response.data)
         db.session.commit()
+        record_award(response.data)
 
         response = schema.dump(response.data)
         db.session.close()
 
         # Delete standings cache because awards can change scores
-        clear_standings()
+        clear_standings(resync=False)
 
         return {"success": True, "data": response.data}
 
@@ -167,11 +169,13 @@ class Award(Resource):
     )
     def delete(self, award_id):
         award = Awards.query.filter_by(id=award_id).first_or_404()
+        user_id, team_id = award.user_id, award.team_id
         db.session.delete(award)
         db.session.commit()
+        record_removal(user_id=user_id, team_id=team_id)
         db.session.close()
 
         # Delete standings cache because awards can change scores
-        clear_standings()
+        clear_standings(resync=False)
 
         return {"success": True}
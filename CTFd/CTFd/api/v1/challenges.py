@@ -1,15 +1,32 @@
+import json
 import math
 from datetime import datetime, timedelta
 from typing import List  # noqa: I001
 
-from flask import abort, render_template, request, session, url_for
+from flask import (
+    Response,
+    abort,
+    current_app,
+    render_template,
+    request,
+    session,
+    stream_with_context,
+    url_for,
+)
 from flask_restx import Namespace, Resource
 from sqlalchemy.sql import and_
 
 from CTFd.api.v1.helpers.request import validate_args
 from CTFd.api.v1.helpers.schemas import sqlalchemy_to_pydantic
 from CTFd.api.v1.schemas import APIDetailedSuccessResponse, APIListSuccessResponse
-from CTFd.cache import clear_challenges, clear_ratings, clear_standings
+from CTFd.cache import (
+    clear_challenges,
+    clear_ratings,
+    clear_solves,
+    clear_standings,
+    clear_submissions,
+    clear_user_session,
+)
 from CTFd.constants import RawEnum
 from CTFd.exceptions.challenges import (
     ChallengeCreateException,
@@ -19,7 +36,6 @@ from CTFd.models import ChallengeFiles as ChallengeFilesModel
 from CTFd.models import Challenges
 from CTFd.models import ChallengeTopics as ChallengeTopicsModel
 from CTFd.models import (
-    Fails,
     Flags,
     Hints,
     HintUnlocks,
@@ -28,10 +44,12 @@ from CTFd.models import (
     Submissions,
     Tags,
     Tracking,
+    Users,
     db,
 )
 from CTFd.plugins.challenges import CHALLENGE_CLASSES, get_chal_class
 from CTFd.schemas.challenges import ChallengeSchema
+from CTFd.schemas.compiler import compile_schema
 from CTFd.schemas.flags import FlagSchema
 from CTFd.schemas.hints import HintSchema
 from CTFd.schemas.ratings import RatingSchema
@@ -39,21 +57,27 @@ from CTFd.schemas.tags import TagSchema
 from CTFd.utils import config, get_config
 from CTFd.utils import user as current_user
 from CTFd.utils.challenges import (
-    get_all_challenges,
+    ANONYMIZED_CHALLENGE,
+    SOLVES_PER_PAGE,
+    get_board_overlay,
+    get_challenge_board,
+    get_prerequisite_graph,
     get_rating_average_for_challenge_id,
     get_solve_counts_for_challenges,
     get_solve_ids_for_user_id,
-    get_solves_for_challenge_id,
+    get_solves_page_for_challenge_id,
+    iter_solves_for_challenge_id,
 )
 from CTFd.utils.config.visibility import (
     accounts_visible,
     challenges_visible,
     scores_visible,
 )
-from CTFd.utils.dates import ctf_ended, ctf_paused, ctftime, isoformat
+from CTFd.utils.dates import ctf_ended, ctf_paused, ctftime, isoformat, unix_time
 from CTFd.utils.decorators import (
     admins_only,
     authed_only,
+    conditional_get,
     during_ctf_time_only,
     require_verified_emails,
 )
@@ -62,11 +86,15 @@ from CTFd.utils.decorators.visibility import (
     check_challenge_visibility,
     check_score_visibility,
 )
+from CTFd.utils.grading import attempt_context, get_grading_result, judge_attempt
 from CTFd.utils.humanize.words import pluralize
 from CTFd.utils.logging import log
+from CTFd.utils.security.auth import logout_user
 from CTFd.utils.security.signing import serialize
+from CTFd.utils.submissions import get_verdict, remember_verdict, single_transaction
 from CTFd.utils.user import (
     authed,
+    count_repeated_submission,
     get_current_team,
     get_current_team_attrs,
     get_current_user,
@@ -102,6 +130,45 @@ challenges_namespace.schema_model(
 )
 
 
+def get_current_account_id():
+    user = get_current_user_attrs()
+    if user is None:
+        return None
+    return user.team_id if config.is_teams_mode() else user.id
+
+
+def _current_account_tags(*args, **kwargs):
+    user_id = session.get("id")
+    return (
+        f"submissions/account/{get_current_account_id()}",
+        f"session/user/{user_id}",
+    )
+
+
+def get_current_board_overlay():
+    """
+    Get the BoardOverlay of the current account. Sessions that are no longer valid for the account are
+    given a second chance with fresh user attributes (e.g. after a team change) before being logged out.
+    """
+    user = get_current_user_attrs()
+    if user is None:
+        return get_board_overlay(None, get_config("user_mode"))
+
+    for _ in range(2):
+        overlay = get_board_overlay(
+            get_current_account_id(),
+            get_config("user_mode"),
+            user_id=user.id,
+            session_hash=session.get("hash"),
+        )
+        if overlay is not None:
+            return overlay
+        clear_user_session(user_id=user.id)
+
+    logout_user()
+    abort(401)
+
+
 @challenges_namespace.route("")
 class ChallengeList(Resource):
     @check_challenge_visibility
@@ -142,6 +209,15 @@ class ChallengeList(Resource):
         },
         location="query",
     )
+    @conditional_get(
+        "challenges",
+        "prerequisites",
+        "solves",
+        "solve_counts",
+        "submissions",
+        "freeze",
+        _current_account_tags,
+    )
     def get(self, query_args):
         # Require a team if in teams mode
         # TODO: Convert this into a re-useable decorator
@@ -163,12 +239,8 @@ class ChallengeList(Resource):
         # Get a cached mapping of challenge_id to solve_count
         solve_counts = get_solve_counts_for_challenges(admin=admin_view)
 
-        # Get list of solve_ids for current user
-        if authed():
-            user = get_current_user()
-            user_solves = get_solve_ids_for_user_id(user_id=user.id)
-        else:
-            user_solves = set()
+        # Get what the current account solved and unlocked
+        overlay = get_current_board_overlay()
 
         # Aggregate the query results into the hashes defined at the top of
         # this block for later use
@@ -181,63 +253,30 @@ class ChallengeList(Resource):
             # `None` for the solve count if visiblity checks fail
             solve_count_dfl = None
 
-        chal_q = get_all_challenges(admin=admin_view, field=field, q=q, **query_args)
-
-        # Iterate through the list of challenges, adding to the object which
-        # will be JSONified back to the client
+        # The board is shared by every account and only gets the account's overlay added to it
+        board = get_challenge_board(admin=admin_view, field=field, q=q, **query_args)
         response = []
-        tag_schema = TagSchema(view="user", many=True)
-
-        # Gather all challenge IDs so that we can determine invalid challenge prereqs
-        all_challenge_ids = {
-            c.id for c in Challenges.query.with_entities(Challenges.id).all()
-        }
-        for challenge in chal_q:
-            if challenge.requirements:
-                requirements = challenge.requirements.get("prerequisites", [])
-                anonymize = challenge.requirements.get("anonymize")
-                prereqs = set(requirements).intersection(all_challenge_ids)
-                if user_solves >= prereqs or admin_view:
+        for entry in board:
+            if entry.requirements:
+                if entry.id in overlay.unlocked or admin_view:
                     pass
                 else:
-                    if anonymize:
-                        response.append(
-                            {
-                                "id": challenge.id,
-                                "type": "hidden",
-                                "name": "???",
-                                "value": 0,
-                                "solves": None,
-                                "solved_by_me": False,
-                                "category": "???",
-                                "tags": [],
-                                "template": "",
-                                "script": "",
-                            }
-                        )
+                    if entry.anonymize:
+                        response.append(dict(ANONYMIZED_CHALLENGE, id=entry.id))
                     # Fallthrough to continue
                     continue
 
-            try:
-                challenge_type = get_chal_class(challenge.type)
-            except KeyError:
-                # Challenge type does not exist. Fall through to next challenge.
+            # Challenge type does not exist. Fall through to next challenge.
+            if entry.payload is None:
                 continue
 
             # Challenge passes all checks, add it to response
             response.append(
-                {
-                    "id": challenge.id,
-                    "type": challenge_type.name,
-                    "name": challenge.name,
-                    "value": challenge.value,
-                    "solves": solve_counts.get(challenge.id, solve_count_dfl),
-                    "solved_by_me": challenge.id in user_solves,
-                    "category": challenge.category,
-                    "tags": tag_schema.dump(challenge.tags).data,
-                    "template": challenge_type.templates["view"],
-                    "script": challenge_type.scripts["view"],
-                }
+                dict(
+                    entry.payload,
+                    solves=solve_counts.get(entry.id, solve_count_dfl),
+                    solved_by_me=entry.id in overlay.solved,
+                )
             )
 
         db.session.close()
@@ -331,12 +370,7 @@ class Challenge(Resource):
             )
 
         if chal.requirements:
-            requirements = chal.requirements.get("prerequisites", [])
             anonymize = chal.requirements.get("anonymize")
-            # Gather all challenge IDs so that we can determine invalid challenge prereqs
-            all_challenge_ids = {
-                c.id for c in Challenges.query.with_entities(Challenges.id).all()
-            }
             if challenges_visible():
                 user = get_current_user()
                 if user:
@@ -350,8 +384,11 @@ class Challenge(Resource):
                     # We need to handle the case where a user is viewing challenges anonymously
                     solve_ids = []
                 solve_ids = {value for value, in solve_ids}
-                prereqs = set(requirements).intersection(all_challenge_ids)
-                if solve_ids >= prereqs or is_admin():
+                graph = get_prerequisite_graph()
+                if (
+                    graph.is_unlocked(chal.id, graph.solve_mask(solve_ids))
+                    or is_admin()
+                ):
                     pass
                 else:
                     if anonymize:
@@ -376,9 +413,8 @@ class Challenge(Resource):
             else:
                 abort(403)
 
-        tags = [
-            tag["value"] for tag in TagSchema("user", many=True).dump(chal.tags).data
-        ]
+        tag_schema = compile_schema(TagSchema, view="user")
+        tags = [tag["value"] for tag in tag_schema.dump(chal.tags, many=True).data]
 
         unlocked_hints = set()
         hints = []
@@ -656,7 +692,6 @@ class ChallengeAttempt(Resource):
             abort(403)
 
         if challenge.requirements:
-            requirements = challenge.requirements.get("prerequisites", [])
             solve_ids = (
                 Solves.query.with_entities(Solves.challenge_id)
                 .filter_by(account_id=user.account_id)
@@ -664,12 +699,8 @@ class ChallengeAttempt(Resource):
                 .all()
             )
             solve_ids = {solve_id for solve_id, in solve_ids}
-            # Gather all challenge IDs so that we can determine invalid challenge prereqs
-            all_challenge_ids = {
-                c.id for c in Challenges.query.with_entities(Challenges.id).all()
-            }
-            prereqs = set(requirements).intersection(all_challenge_ids)
-            if solve_ids >= prereqs:
+            graph = get_prerequisite_graph()
+            if graph.is_unlocked(challenge.id, graph.solve_mask(solve_ids)):
                 pass
             else:
                 abort(403)
@@ -716,32 +747,22 @@ class ChallengeAttempt(Resource):
             max_tries = challenge.max_attempts
             if max_tries and max_tries > 0:
                 max_attempts_behavior = get_config("max_attempts_behavior", "lockout")
-                fails_query = Fails.query.filter_by(
-                    account_id=user.account_id, challenge_id=challenge_id
-                )
+                fails, dates = current_user.get_attempts(user.account_id, challenge_id)
                 if max_attempts_behavior == "timeout":  # Use timeout behavior
                     max_attempts_timeout = int(get_config("max_attempts_timeout", 300))
-                    timeout_delta = datetime.utcnow() - timedelta(
-                        seconds=max_attempts_timeout
-                    )
-                    fails = fails_query.filter(Fails.date >= timeout_delta).count()
+                    now = unix_time(datetime.utcnow())
+                    dates = [d for d in dates if d >= now - max_attempts_timeout]
+                    fails = len(dates)
                     # Calculate actual time remaining for the most recent fail
                     response = f"Not accepted. Try again in {math.ceil(max_attempts_timeout / 60)} minutes"
-                    if fails > 0:
-                        most_recent_fail = (
-                            fails_query.filter(Fails.date >= timeout_delta)
-                            .order_by(Fails.date.asc())
-                            .first()
+                    if dates:
+                        time_since_fail = now - dates[0]
+                        remaining_seconds = max_attempts_timeout - time_since_fail
+                        remaining_minutes = math.ceil(remaining_seconds / 60)
+                        response = (
+                            f"Not accepted. Try again in {remaining_minutes} minutes"
                         )
-                        if most_recent_fail:
-                            time_since_fail = (
-                                datetime.utcnow() - most_recent_fail.date
-                            ).total_seconds()
-                            remaining_seconds = max_attempts_timeout - time_since_fail
-                            remaining_minutes = math.ceil(remaining_seconds / 60)
-                            response = f"Not accepted. Try again in {remaining_minutes} minutes"
                 else:  # Use lockout behavior
-                    fails = fails_query.count()
                     response = "Not accepted. You have 0 tries remaining"
 
                 if fails >= max_tries:
@@ -756,14 +777,62 @@ class ChallengeAttempt(Resource):
                         403,
                     )
 
-            response = chal_class.attempt(challenge, request)
-            # TODO: CTFd 4.0 We should remove the tuple strategy for Challenge plugins in favor of ChallengeResponse
-            if isinstance(response, tuple):
-                status = response[0]
-                message = response[1]
+            # Repeats of a wrong submission are answered with the verdict it got before
+            submission = request_data.get("submission", "")
+            message = get_verdict(user.account_id, challenge.id, submission)
+            repeated = message is not None
+            if repeated:
+                status = "incorrect"
             else:
-                status = response.status
-                message = response.message
+                if getattr(chal_class, "async_grading", False):
+                    ticket = current_app.grading_queue.submit(
+                        account_id=user.account_id,
+                        user_id=user.id,
+                        challenge_id=challenge.id,
+                        submission=submission,
+                        ip=get_ip(),
+                        record=ctftime() or current_user.is_admin(),
+                    )
+                    if ticket is None:
+                        return (
+                            {
+                                "success": True,
+                                "data": {
+                                    "status": "ratelimited",
+                                    "message": "You have too many submissions being graded. Wait for their results.",
+                                },
+                            },
+                            429,
+                        )
+                    log(
+                        "submissions",
+                        "[{date}] {name} submitted {submission} on {challenge_id} with kpm {kpm} [QUEUED]",
+                        name=user.name,
+                        submission=request_data.get("submission", "").encode("utf-8"),
+                        challenge_id=challenge_id,
+                        kpm=kpm,
+                    )
+                    # The result is polled from ChallengeAttemptResult or sent over the event stream
+                    return (
+                        {
+                            "success": True,
+                            "data": {
+                                "status": "pending",
+                                "message": "Submission is being graded",
+                                "ticket": ticket,
+                            },
+                        },
+                        202,
+                    )
+
+                response = chal_class.attempt(challenge, request)
+                # TODO: CTFd 4.0 We should remove the tuple strategy for Challenge plugins in favor of ChallengeResponse
+                if isinstance(response, tuple):
+                    status = response[0]
+                    message = response[1]
+                else:
+                    status = response.status
+                    message = response.message
 
             if status == "correct" or status is True:
                 # The challenge plugin says the input is right
@@ -771,8 +840,9 @@ class ChallengeAttempt(Resource):
                     chal_class.solve(
                         user=user, team=team, challenge=challenge, request=request
                     )
-                    clear_standings()
-                    clear_challenges()
+                    clear_standings(resync=False)
+                    clear_solves()
+                    clear_submissions(user.account_id)
 
                 log(
                     "submissions",
@@ -792,8 +862,8 @@ class ChallengeAttempt(Resource):
                     chal_class.partial(
                         user=user, team=team, challenge=challenge, request=request
                     )
-                    clear_standings()
-                    clear_challenges()
+                    # A partial solve doesn't change scores or solve counts
+                    clear_submissions(user.account_id)
 
                 log(
                     "submissions",
@@ -809,12 +879,20 @@ class ChallengeAttempt(Resource):
                 }
             elif status == "incorrect" or status is False:
                 # The challenge plugin says the input is wrong
-                if ctftime() or current_user.is_admin():
+                recorded = not repeated or current_app.config.get(
+                    "DUPLICATE_SUBMISSION_RECORD"
+                )
+                if not repeated:
+                    remember_verdict(user.account_id, challenge.id, submission, message)
+                if (ctftime() or current_user.is_admin()) and recorded:
                     chal_class.fail(
                         user=user, team=team, challenge=challenge, request=request
                     )
-                    clear_standings()
-                    clear_challenges()
+                    # A fail doesn't change scores or solve counts
+                    clear_submissions(user.account_id)
+                elif ctftime() or current_user.is_admin():
+                    # Repeats that aren't recorded still count towards rate limits
+                    count_repeated_submission(user.id, team.id if team else None)
 
                 log(
                     "submissions",
@@ -827,7 +905,7 @@ class ChallengeAttempt(Resource):
 
                 if max_tries:
                     # Off by one since fails has changed since it was gotten
-                    attempts_left = max_tries - fails - 1
+                    attempts_left = max_tries - fails - (1 if recorded else 0)
                     tries_str = pluralize(attempts_left, singular="try", plural="tries")
                     # Add a punctuation mark if there isn't one
                     if message[-1] not in "!().;?[]{}":
@@ -844,22 +922,15 @@ class ChallengeAttempt(Resource):
                                 get_config("max_attempts_timeout", 300)
                             )
                             # Calculate actual time remaining based on the most recent fail
-                            timeout_delta = datetime.utcnow() - timedelta(
-                                seconds=max_attempts_timeout
-                            )
-                            most_recent_fail = (
-                                Fails.query.filter_by(
-                                    account_id=user.account_id,
-                                    challenge_id=challenge_id,
-                                )
-                                .filter(Fails.date >= timeout_delta)
-                                .order_by(Fails.date.asc())
-                                .first()
+                            now = unix_time(datetime.utcnow())
+                            _, dates = current_user.get_attempts(
+                                user.account_id, challenge_id
                             )
-                            if most_recent_fail:
-                                time_since_fail = (
-                                    datetime.utcnow() - most_recent_fail.date
-                                ).total_seconds()
+                            dates = [
+                                d for d in dates if d >= now - max_attempts_timeout
+                            ]
+                            if dates:
+                                time_since_fail = now - dates[0]
                                 remaining_seconds = (
                                     max_attempts_timeout - time_since_fail
                                 )
@@ -907,6 +978,168 @@ class ChallengeAttempt(Resource):
             }
 
 
+@challenges_namespace.route("/attempt/bulk")
+class ChallengeAttemptBulk(Resource):
+    # Number of attempts that can be judged in a single request
+    limit = 1000
+
+    @admins_only
+    def post(self):
+        """
+        Judge many attempts on behalf of users with the challenge plugins in one transaction.
+
+        Attempts are judged like submissions made by admins so CTF time, pauses, rate limits and
+        max_attempts don't apply. Each attempt is a dictionary with a user_id, a challenge_id, a
+        submission and optionally the ip it was originally made from.
+        """
+        attempts = (request.get_json() or {}).get("attempts")
+        if not isinstance(attempts, list) or not attempts:
+            return (
+                {"success": False, "errors": {"attempts": ["Missing attempts"]}},
+                400,
+            )
+        if len(attempts) > self.limit:
+            return (
+                {
+                    "success": False,
+                    "errors": {
+                        "attempts": [f"At most {self.limit} attempts can be judged"]
+                    },
+                },
+                400,
+            )
+        for attempt in attempts:
+            if not self.is_valid(attempt):
+                return (
+                    {
+                        "success": False,
+                        "errors": {
+                            "attempts": [
+                                "Attempts require an integer user_id and challenge_id and a string submission"
+                            ]
+                        },
+                    },
+                    400,
+                )
+
+        user_ids = {attempt["user_id"] for attempt in attempts}
+        challenge_ids = {attempt["challenge_id"] for attempt in attempts}
+        users = {u.id: u for u in Users.query.filter(Users.id.in_(user_ids))}
+        challenges = {
+            c.id: c for c in Challenges.query.filter(Challenges.id.in_(challenge_ids))
+        }
+
+        results = []
+        accounts = set()
+        solved = False
+        # Score events and captures are published once the transaction is committed
+        # and dropped along with everything else if it's rolled back
+        with single_transaction():
+            for attempt in attempts:
+                user = users.get(attempt["user_id"])
+                challenge = challenges.get(attempt["challenge_id"])
+                status, message = self.judge(user, challenge, attempt)
+                results.append(
+                    {
+                        "user_id": attempt["user_id"],
+                        "challenge_id": attempt["challenge_id"],
+                        "status": status,
+                        "message": message,
+                    }
+                )
+                if status in ("correct", "partial", "incorrect"):
+                    accounts.add(user.account_id)
+                    solved = solved or status == "correct"
+
+        # Caches are cleared once for the whole batch
+        if solved:
+            clear_standings(resync=False)
+            clear_solves()
+        for account_id in accounts:
+            clear_submissions(account_id)
+
+        return {"success": True, "data": results}
+
+    @staticmethod
+    def is_valid(attempt):
+        if not isinstance(attempt, dict):
+            return False
+        for field in ("user_id", "challenge_id"):
+            value = attempt.get(field)
+            if not isinstance(value, int) or isinstance(value, bool):
+                return False
+        if not isinstance(attempt.get("submission"), str):
+            return False
+        return attempt.get("ip") is None or isinstance(attempt["ip"], str)
+
+    @staticmethod
+    def judge(user, challenge, attempt):
+        if user is None or challenge is None:
+            return "not_found", "User or challenge not found"
+
+        team = user.team
+        if config.is_teams_mode() and team is None:
+            return "team_required", "User is not on a team"
+
+        solve = Solves.query.filter_by(
+            account_id=user.account_id, challenge_id=challenge.id
+        ).first()
+
+        chal_class = get_chal_class(challenge.type)
+        with attempt_context(
+            user,
+            challenge.id,
+            attempt["submission"],
+            attempt.get("ip") or get_ip(),
+        ) as attempt_request:
+            status, message = judge_attempt(chal_class, challenge, attempt_request)
+            if solve:
+                return "already_solved", f"{message} but you already solved this"
+
+            if status == "correct":
+                chal_class.solve(
+                    user=user, team=team, challenge=challenge, request=attempt_request
+                )
+            elif status == "partial":
+                chal_class.partial(
+                    user=user, team=team, challenge=challenge, request=attempt_request
+                )
+            else:
+                chal_class.fail(
+                    user=user, team=team, challenge=challenge, request=attempt_request
+                )
+
+            log(
+                "submissions",
+                "[{date}] {name} submitted {submission} on {challenge_id} [BULK {status}]",
+                name=user.name,
+                submission=attempt["submission"].encode("utf-8"),
+                challenge_id=challenge.id,
+                status=status.upper(),
+            )
+        return status, message
+
+
+@challenges_namespace.route("/attempt/<ticket>")
+class ChallengeAttemptResult(Resource):
+    @authed_only
+    def get(self, ticket):
+        """
+        Get the result of an attempt that is graded asynchronously
+        """
+        result = get_grading_result(ticket)
+        if result is None or result["user_id"] != session["id"]:
+            abort(404)
+        return {
+            "success": True,
+            "data": {
+                "status": result["status"],
+                "message": result["message"],
+                "ticket": ticket,
+            },
+        }
+
+
 @challenges_namespace.route("/<challenge_id>/solves")
 class ChallengeSolves(Resource):
     @check_challenge_visibility
@@ -915,7 +1148,6 @@ class ChallengeSolves(Resource):
     @during_ctf_time_only
     @require_verified_emails
     def get(self, challenge_id):
-        response = []
         challenge = Challenges.query.filter_by(id=challenge_id).first_or_404()
 
         # TODO: Need a generic challenge visibility call.
@@ -931,9 +1163,39 @@ class ChallengeSolves(Resource):
             elif is_admin() is True:
                 freeze = False
 
-        response = get_solves_for_challenge_id(challenge_id=challenge_id, freeze=freeze)
+        stream = request.args.get(
+            "stream", default=False, type=lambda v: v.lower() in ("1", "true")
+        )
+        if is_admin() and stream:
+            # Only admins get every solve at once and it's written out as it's read
+            def generate():
+                yield '{"success": true, "data": ['
+                solves = iter_solves_for_challenge_id(challenge_id, freeze=freeze)
+                for i, solve in enumerate(solves):
+                    yield ("," if i else "") + json.dumps(solve)
+                yield "]}"
+
+            return Response(
+                stream_with_context(generate()), mimetype="application/json"
+            )
 
-        return {"success": True, "data": response}
+        page = get_solves_page_for_challenge_id(
+            challenge_id=challenge_id,
+            freeze=freeze,
+            after=request.args.get("after", type=int),
+        )
+
+        return {
+            "success": True,
+            "data": page.solves,
+            "meta": {
+                "pagination": {
+                    "next": page.next,
+                    "per_page": SOLVES_PER_PAGE,
+                    "total": page.total,
+                }
+            },
+        }
 
 
 @challenges_namespace.route("/<challenge_id>/files")
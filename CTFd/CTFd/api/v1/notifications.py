@@ -6,10 +6,11 @@ from flask_restx import Namespace, Resource
 from CTFd.api.v1.helpers.request import validate_args
 from CTFd.api.v1.helpers.schemas import sqlalchemy_to_pydantic
 from CTFd.api.v1.schemas import APIDetailedSuccessResponse, APIListSuccessResponse
+from CTFd.cache import clear_notifications
 from CTFd.constants import RawEnum
 from CTFd.models import Notifications, db
 from CTFd.schemas.notifications import NotificationSchema
-from CTFd.utils.decorators import admins_only
+from CTFd.utils.decorators import admins_only, conditional_get
 from CTFd.utils.helpers.models import build_model_filters
 
 notifications_namespace = Namespace(
@@ -64,6 +65,7 @@ class NotificantionList(Resource):
         },
         location="query",
     )
+    @conditional_get("notifications")
     def get(self, query_args):
         q = query_args.pop("q", None)
         field = str(query_args.pop("field", None))
@@ -139,6 +141,7 @@ class NotificantionList(Resource):
 
         db.session.add(result.data)
         db.session.commit()
+        clear_notifications()
 
         response = schema.dump(result.data)
 
@@ -185,5 +188,6 @@ class Notification(Resource):
         db.session.delete(notif)
         db.session.commit()
         db.session.close()
+        clear_notifications()
 
         return {"success": True}
@@ -1,30 +1,35 @@
-from collections import defaultdict
-
 from flask import request
 from flask_restx import Namespace, Resource
-from sqlalchemy import select
 
-from CTFd.cache import cache, make_cache_key
-from CTFd.models import Brackets, Users, db
+from CTFd.cache import cache, get_tag_versions, make_cache_key
 from CTFd.utils import get_config
+from CTFd.utils.decorators import conditional_get
 from CTFd.utils.decorators.visibility import (
     check_account_visibility,
     check_score_visibility,
 )
 from CTFd.utils.modes import TEAMS_MODE, generate_account_url, get_mode_as_word
 from CTFd.utils.scoreboard import get_scoreboard_detail
-from CTFd.utils.scores import get_standings, get_user_standings
+from CTFd.utils.scores import get_standings, get_team_members
 
 scoreboard_namespace = Namespace(
     "scoreboard", description="Endpoint to retrieve scores"
 )
 
 
+def make_standings_cache_key(path=None):
+    # Responses are cached per version of the standings so that account changes which only
+    # invalidate the "standings" tag aren't served from an older response
+    versions = ",".join(get_tag_versions(["standings", "freeze"]))
+    return make_cache_key(path=path, key_prefix="view/%s/" + versions)
+
+
 @scoreboard_namespace.route("")
 class ScoreboardList(Resource):
     @check_account_visibility
     @check_score_visibility
-    @cache.cached(timeout=60, key_prefix=make_cache_key)
+    @conditional_get("standings", "freeze")
+    @cache.cached(timeout=60, key_prefix=make_standings_cache_key)
     def get(self):
         standings = get_standings()
         response = []
@@ -32,39 +37,7 @@ class ScoreboardList(Resource):
         account_type = get_mode_as_word()
 
         if mode == TEAMS_MODE:
-            r = db.session.execute(
-                select(
-                    [
-                        Users.id,
-                        Users.name,
-                        Users.oauth_id,
-                        Users.team_id,
-                        Users.hidden,
-                        Users.banned,
-                        Users.bracket_id,
-                        Brackets.name.label("bracket_name"),
-                    ]
-                )
-                .where(Users.team_id.isnot(None))
-                .join(Brackets, Users.bracket_id == Brackets.id, isouter=True)
-            )
-            users = r.fetchall()
-            membership = defaultdict(dict)
-            for u in users:
-                if u.hidden is False and u.banned is False:
-                    membership[u.team_id][u.id] = {
-                        "id": u.id,
-                        "oauth_id": u.oauth_id,
-                        "name": u.name,
-                        "score": 0,
-                        "bracket_id": u.bracket_id,
-                        "bracket_name": u.bracket_name,
-                    }
-
-            # Get user_standings as a dict so that we can more quickly get member scores
-            user_standings = get_user_standings()
-            for u in user_standings:
-                membership[u.team_id][u.user_id]["score"] = int(u.score)
+            members = get_team_members(x.account_id for x in standings)
 
         for i, x in enumerate(standings):
             entry = {
@@ -80,7 +53,17 @@ class ScoreboardList(Resource):
             }
 
             if mode == TEAMS_MODE:
-                entry["members"] = list(membership[x.account_id].values())
+                entry["members"] = [
+                    {
+                        "id": info.id,
+                        "oauth_id": info.oauth_id,
+                        "name": info.name,
+                        "score": int(score),
+                        "bracket_id": info.bracket_id,
+                        "bracket_name": info.bracket_name,
+                    }
+                    for info, score in members[x.account_id]
+                ]
 
             response.append(entry)
         return {"success": True, "data": response}
@@ -91,6 +74,7 @@ class ScoreboardList(Resource):
 class ScoreboardDetail(Resource):
     @check_account_visibility
     @check_score_visibility
+    @conditional_get("standings", "freeze")
     def get(self, count):
         # Restrict count to some limit
         count = max(1, min(count, 50))
@@ -6,6 +6,7 @@ statistics_namespace = Namespace(
 
 # isort:imports-firstparty
 from CTFd.api.v1.statistics import challenges  # noqa: F401,I001
+from CTFd.api.v1.statistics import logs  # noqa: F401
 from CTFd.api.v1.statistics import scores  # noqa: F401
 from CTFd.api.v1.statistics import submissions  # noqa: F401
 from CTFd.api.v1.statistics import teams  # noqa: F401
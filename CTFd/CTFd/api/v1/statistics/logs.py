@@ -0,0 +1,15 @@
+from flask_restx import Resource
+
+from CTFd.api.v1.statistics import statistics_namespace
+from CTFd.utils.decorators import admins_only
+from CTFd.utils.logging import get_log_stats
+
+
+@statistics_namespace.route("/logs")
+class LogStatistics(Resource):
+    @admins_only
+    def get(self):
+        """
+        Get the log writer queue depth and the number of dropped and failed records of the worker answering
+        """
+        return {"success": True, "data": get_log_stats()}
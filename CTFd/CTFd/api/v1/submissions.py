@@ -15,6 +15,7 @@ from CTFd.models import Solves, Submissions, db
 from CTFd.schemas.submissions import SubmissionSchema
 from CTFd.utils.decorators import admins_only
 from CTFd.utils.helpers.models import build_model_filters
+from CTFd.utils.scores.engine import record_removal, record_solve
 
 submissions_namespace = Namespace(
     "submissions", description="Endpoint to retrieve Submission"
@@ -136,12 +137,14 @@ class SubmissionsList(Resource):
 
         db.session.add(response.data)
         db.session.commit()
+        if isinstance(response.data, Solves):
+            record_solve(response.data)
 
         response = schema.dump(response.data)
         db.session.close()
 
         # Delete standings cache
-        clear_standings()
+        clear_standings(resync=False)
         # Delete challenges cache
         clear_challenges()
 
@@ -201,9 +204,10 @@ class Submission(Resource):
             db.session.add(solve)
             submission.type = "discard"
             db.session.commit()
+            record_solve(solve)
 
             # Delete standings cache
-            clear_standings()
+            clear_standings(resync=False)
             clear_challenges()
 
             submission = solve
@@ -229,12 +233,16 @@ class Submission(Resource):
     )
     def delete(self, submission_id):
         submission = Submissions.query.filter_by(id=submission_id).first_or_404()
+        user_id, team_id = submission.user_id, submission.team_id
+        solved = submission.type == "correct"
         db.session.delete(submission)
         db.session.commit()
+        if solved:
+            record_removal(user_id=user_id, team_id=team_id)
         db.session.close()
 
         # Delete standings cache
-        clear_standings()
+        clear_standings(resync=False)
         clear_challenges()
 
         return {"success": True}
@@ -19,6 +19,7 @@ from CTFd.cache import (
 from CTFd.constants import RawEnum
 from CTFd.models import Awards, Submissions, Teams, Unlocks, Users, db
 from CTFd.schemas.awards import AwardSchema
+from CTFd.schemas.compiler import compile_schema
 from CTFd.schemas.submissions import SubmissionSchema
 from CTFd.schemas.teams import TeamSchema
 from CTFd.utils import get_config
@@ -29,6 +30,8 @@ from CTFd.utils.decorators.visibility import (
     check_score_visibility,
 )
 from CTFd.utils.helpers.models import build_model_filters
+from CTFd.utils.scores.engine import record_removal
+from CTFd.utils.scores.materialized import refresh_account_scores
 from CTFd.utils.user import get_current_team, get_current_user_type, is_admin
 
 teams_namespace = Namespace("teams", description="Endpoint to retrieve Teams")
@@ -121,7 +124,7 @@ class TeamList(Resource):
         user_type = get_current_user_type(fallback="user")
         view = copy.deepcopy(TeamSchema.views.get(user_type))
         view.remove("members")
-        response = TeamSchema(view=view, many=True).dump(teams.items)
+        response = compile_schema(TeamSchema, view=view).dump(teams.items, many=True)
 
         if response.errors:
             return {"success": False, "errors": response.errors}, 400
@@ -168,7 +171,7 @@ class TeamList(Resource):
         response = schema.dump(response.data)
         db.session.close()
 
-        clear_standings()
+        clear_standings(resync=False)
         clear_challenges()
 
         return {"success": True, "data": response.data}
@@ -234,7 +237,7 @@ class TeamPublic(Resource):
         db.session.commit()
 
         clear_team_session(team_id=team.id)
-        clear_standings()
+        clear_standings(resync=False)
         clear_challenges()
 
         db.session.close()
@@ -258,6 +261,7 @@ class TeamPublic(Resource):
         db.session.commit()
 
         clear_team_session(team_id=team_id)
+        # The team's solves and awards are removed by cascading deletes in the database
         clear_standings()
         clear_challenges()
 
@@ -394,7 +398,7 @@ class TeamPrivate(Resource):
         db.session.commit()
 
         clear_team_session(team_id=team.id)
-        clear_standings()
+        clear_standings(resync=False)
         clear_challenges()
 
         db.session.close()
@@ -496,7 +500,13 @@ class TeamMembers(Resource):
             Awards.query.filter_by(user_id=user.id).delete()
             Unlocks.query.filter_by(user_id=user.id).delete()
 
+            # Bulk deletes bypass the score tracking so refresh the affected accounts
+            refresh_account_scores(db.session, "users", [user.id])
+            refresh_account_scores(db.session, "teams", [team.id])
             db.session.commit()
+
+            record_removal(user_id=user.id, team_id=team.id)
+            clear_standings(resync=False)
         else:
             return (
                 {"success": False, "errors": {"id": ["User is not part of this team"]}},
@@ -18,6 +18,7 @@ from CTFd.utils.decorators import (
     require_verified_emails,
 )
 from CTFd.utils.helpers.models import build_model_filters
+from CTFd.utils.scores.engine import record_award
 from CTFd.utils.user import get_current_user
 
 unlocks_namespace = Namespace("unlocks", description="Endpoint to retrieve Unlocks")
@@ -161,7 +162,8 @@ class UnlockList(Resource):
             award = award_schema.load(award)
             db.session.add(award.data)
             db.session.commit()
-            clear_standings()
+            record_award(award.data)
+            clear_standings(resync=False)
 
             response = schema.dump(response.data)
 
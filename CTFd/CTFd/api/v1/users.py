@@ -22,6 +22,7 @@ from CTFd.models import (
     db,
 )
 from CTFd.schemas.awards import AwardSchema
+from CTFd.schemas.compiler import compile_schema
 from CTFd.schemas.submissions import SubmissionSchema
 from CTFd.schemas.users import UserSchema
 from CTFd.utils.challenges import get_submissions_for_user_id_for_challenge_id
@@ -122,7 +123,7 @@ class UserList(Resource):
                 .paginate(per_page=50, max_per_page=100, error_out=False)
             )
 
-        response = UserSchema(view="user", many=True).dump(users.items)
+        response = compile_schema(UserSchema, view="user").dump(users.items, many=True)
 
         if response.errors:
             return {"success": False, "errors": response.errors}, 400
@@ -174,7 +175,7 @@ class UserList(Resource):
 
             user_created_notification(addr=email, name=name, password=password)
 
-        clear_standings()
+        clear_standings(resync=False)
         clear_challenges()
 
         response = schema.dump(response.data)
@@ -252,7 +253,7 @@ class UserPublic(Resource):
         db.session.close()
 
         clear_user_session(user_id=user_id)
-        clear_standings()
+        clear_standings(resync=False)
         clear_challenges()
 
         return {"success": True, "data": response.data}
@@ -339,7 +340,7 @@ class UserPrivate(Resource):
         response = schema.dump(response.data)
         db.session.close()
 
-        clear_standings()
+        clear_standings(resync=False)
         clear_challenges()
 
         return {"success": True, "data": response.data}
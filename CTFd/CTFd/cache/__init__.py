@@ -1,12 +1,16 @@
 from functools import lru_cache, wraps
 from hashlib import md5
 from time import monotonic_ns
+from uuid import uuid4
 
 from flask import request
 from flask_caching import Cache, make_template_fragment_key
 
 cache = Cache()
 
+# Cache key storing the current version of a tag. See memoize_tags()
+TAG_KEY = "tags/%s"
+
 
 def timed_lru_cache(timeout: int = 300, maxsize: int = 64, typed: bool = False):
     """
@@ -39,6 +43,85 @@ def timed_lru_cache(timeout: int = 300, maxsize: int = 64, typed: bool = False):
     return wrapper_cache
 
 
+def get_tag_versions(tags):
+    """
+    Get the current version of each tag. Tags that have never been seen (or were evicted) get a new
+    version so that anything cached against an older version is never served again.
+    """
+    keys = [TAG_KEY % tag for tag in tags]
+    versions = cache.get_many(*keys)
+    missing = {key: uuid4().hex for key, version in zip(keys, versions) if not version}
+    if missing:
+        cache.set_many(missing, timeout=0)
+    return [version or missing[key] for key, version in zip(keys, versions)]
+
+
+def invalidate(*tags):
+    """
+    Invalidate every result memoized with memoize_tags() that depends on any of the given tags.
+    """
+    if tags:
+        cache.set_many({TAG_KEY % tag: uuid4().hex for tag in tags}, timeout=0)
+
+
+def resolve_tags(tags, *args, **kwargs):
+    """
+    Get the tags of a call. Callable tags receive the arguments of the call and return one or more tags.
+    """
+    call_tags = []
+    for tag in tags:
+        if callable(tag):
+            tag = tag(*args, **kwargs)
+            if isinstance(tag, str):
+                call_tags.append(tag)
+            else:
+                call_tags.extend(tag)
+        else:
+            call_tags.append(tag)
+    return call_tags
+
+
+def memoize_tags(*tags, timeout=None):
+    """
+    Memoize a function and declare what its result depends on.
+
+    Tags are strings such as "solves" or callables which receive the arguments of the decorated
+    function and return the tags for that call (e.g. the account a result belongs to). Results are
+    stored under the current version of each tag so invalidating a tag with invalidate() makes
+    every result depending on it stale without having to know which results exist.
+
+    The uncached function is available as `.uncached` like with Flask-Caching's memoize.
+    """
+
+    def decorator(f):
+        name = f"{f.__module__}.{f.__qualname__}"
+
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            call_tags = resolve_tags(tags, *args, **kwargs)
+            arguments = repr((args, sorted(kwargs.items())))
+            versions = ",".join(get_tag_versions(call_tags))
+            cache_key = "memoize_tags/{}/{}".format(
+                name,
+                md5((arguments + versions).encode()).hexdigest(),  # nosec B303 B324
+            )
+
+            # Results are wrapped in a tuple so that None can be cached as well
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached[0]
+
+            result = f(*args, **kwargs)
+            cache.set(cache_key, (result,), timeout=timeout)
+            return result
+
+        decorated_function.uncached = f
+        decorated_function.tags = tags
+        return decorated_function
+
+    return decorator
+
+
 def make_cache_key(path=None, key_prefix="view/%s"):
     """
     This function mostly emulates Flask-Caching's `make_cache_key` function so we can delete cached api responses.
@@ -91,27 +174,37 @@ def clear_config():
 
     cache.delete_memoized(_get_config)
     cache.delete_memoized(get_app_config)
+    invalidate("config")
 
 
-def clear_standings():
+def clear_standings(resync=True):
+    """
+    Clear every cache derived from the standings.
+
+    :param resync: Also rebuild the standings engine from the database. Callers that already published
+    their score changes through CTFd.utils.scores.engine (e.g. a new solve) can skip the rebuild.
+    """
     from CTFd.api import api
-    from CTFd.api.v1.scoreboard import ScoreboardDetail, ScoreboardList
+    from CTFd.api.v1.scoreboard import (
+        ScoreboardDetail,
+        ScoreboardList,
+        make_standings_cache_key,
+    )
     from CTFd.constants.static import CacheKeys
     from CTFd.models import Teams, Users  # noqa: I001
-    from CTFd.utils.scoreboard import get_scoreboard_detail
-    from CTFd.utils.scores import get_standings, get_team_standings, get_user_standings
-    from CTFd.utils.user import (
-        get_team_place,
-        get_team_score,
-        get_user_place,
-        get_user_score,
+    from CTFd.utils.scores.engine import resync_standings
+
+    # Clear out HTTP request responses cached against the current standings
+    cache.delete(
+        make_standings_cache_key(path=api.name + "." + ScoreboardList.endpoint)
     )
 
-    # Clear out the bulk standings functions
-    cache.delete_memoized(get_standings)
-    cache.delete_memoized(get_team_standings)
-    cache.delete_memoized(get_user_standings)
-    cache.delete_memoized(get_scoreboard_detail)
+    # Rebuild the standings engine from scratch
+    if resync:
+        resync_standings()
+
+    # Clear out the bulk standings functions and the Jinja Attrs constants
+    invalidate("standings")
 
     # Clear out the individual helpers for accessing score via the model
     cache.delete_memoized(Users.get_score)
@@ -119,14 +212,7 @@ def clear_standings():
     cache.delete_memoized(Teams.get_score)
     cache.delete_memoized(Teams.get_place)
 
-    # Clear the Jinja Attrs constants
-    cache.delete_memoized(get_user_score)
-    cache.delete_memoized(get_user_place)
-    cache.delete_memoized(get_team_score)
-    cache.delete_memoized(get_team_place)
-
     # Clear out HTTP request responses
-    cache.delete(make_cache_key(path=api.name + "." + ScoreboardList.endpoint))
     cache.delete(make_cache_key(path=api.name + "." + ScoreboardDetail.endpoint))
     cache.delete_memoized(ScoreboardList.get)
     cache.delete_memoized(ScoreboardDetail.get)
@@ -136,27 +222,57 @@ def clear_standings():
 
 
 def clear_challenges():
-    from CTFd.utils.challenges import get_all_challenges  # noqa: I001
-    from CTFd.utils.challenges import (
-        get_rating_average_for_challenge_id,
-        get_solve_counts_for_challenges,
-        get_solve_ids_for_user_id,
-        get_solves_for_challenge_id,
-        get_submissions_for_user_id_for_challenge_id,
-    )
+    """
+    Clear every cache derived from challenges and their submissions.
+    """
+    invalidate("challenges", "solves", "submissions", "ratings", "attempts", "partials")
 
-    cache.delete_memoized(get_all_challenges)
-    cache.delete_memoized(get_solves_for_challenge_id)
-    cache.delete_memoized(get_submissions_for_user_id_for_challenge_id)
-    cache.delete_memoized(get_solve_ids_for_user_id)
-    cache.delete_memoized(get_solve_counts_for_challenges)
-    cache.delete_memoized(get_rating_average_for_challenge_id)
+
+def clear_solves():
+    """
+    Clear caches derived from solves (solve counts, solve lists) after a new solve.
+    """
+    invalidate("solves")
+
+
+def clear_submissions(account_id):
+    """
+    Clear the cached submissions of a single account. This is all a wrong or partial submission
+    changes.
+    """
+    invalidate(f"submissions/account/{account_id}")
+
+
+def clear_flags():
+    """
+    Clear the flag matchers of every challenge. Changes made through the session are picked up
+    automatically, this is for bulk deletes and updates.
+    """
+    invalidate("flags")
+
+
+def clear_prerequisites():
+    """
+    Rebuild the prerequisite graph of the challenges. Like clear_flags() this is only needed after
+    bulk changes.
+    """
+    invalidate("prerequisites")
+
+
+def clear_challenge_solves(*challenge_ids):
+    """
+    Clear the cached first page of solves of challenges. Like clear_flags() solves added or removed
+    through the session are picked up automatically.
+    """
+    invalidate(*[f"solves/challenge/{challenge_id}" for challenge_id in challenge_ids])
 
 
 def clear_ratings():
-    from CTFd.utils.challenges import get_rating_average_for_challenge_id
+    invalidate("ratings")
 
-    cache.delete_memoized(get_rating_average_for_challenge_id)
+
+def clear_notifications():
+    invalidate("notifications")
 
 
 def clear_pages():
@@ -173,44 +289,30 @@ def clear_user_recent_ips(user_id):
 
 
 def clear_user_session(user_id):
-    from CTFd.utils.user import (  # noqa: I001
-        get_user_attrs,
-        get_user_place,
-        get_user_recent_ips,
-        get_user_score,
-    )
+    from CTFd.utils.user import get_user_attrs, get_user_recent_ips  # noqa: I001
 
     cache.delete_memoized(get_user_attrs, user_id=user_id)
-    cache.delete_memoized(get_user_place, user_id=user_id)
-    cache.delete_memoized(get_user_score, user_id=user_id)
     cache.delete_memoized(get_user_recent_ips, user_id=user_id)
+    invalidate(f"standings/user/{user_id}", f"session/user/{user_id}")
 
 
 def clear_all_user_sessions():
-    from CTFd.utils.user import (  # noqa: I001
-        get_user_attrs,
-        get_user_place,
-        get_user_recent_ips,
-        get_user_score,
-    )
+    from CTFd.utils.user import get_user_attrs, get_user_recent_ips  # noqa: I001
 
     cache.delete_memoized(get_user_attrs)
-    cache.delete_memoized(get_user_place)
-    cache.delete_memoized(get_user_score)
     cache.delete_memoized(get_user_recent_ips)
+    invalidate("standings")
 
 
 def clear_team_session(team_id):
-    from CTFd.utils.user import get_team_attrs, get_team_place, get_team_score
+    from CTFd.utils.user import get_team_attrs
 
     cache.delete_memoized(get_team_attrs, team_id=team_id)
-    cache.delete_memoized(get_team_place, team_id=team_id)
-    cache.delete_memoized(get_team_score, team_id=team_id)
+    invalidate(f"standings/team/{team_id}")
 
 
 def clear_all_team_sessions():
-    from CTFd.utils.user import get_team_attrs, get_team_place, get_team_score
+    from CTFd.utils.user import get_team_attrs
 
     cache.delete_memoized(get_team_attrs)
-    cache.delete_memoized(get_team_place)
-    cache.delete_memoized(get_team_score)
+    invalidate("standings")
@@ -202,6 +202,10 @@ class ServerConfig(object):
     LOG_FOLDER: str = empty_str_cast(config_ini["logs"]["LOG_FOLDER"]) \
         or os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
 
+    LOG_JSON: bool = process_boolean_str(empty_str_cast(config_ini["logs"].get("LOG_JSON", False), default=False))
+
+    LOG_QUEUE_SIZE: int = int(empty_str_cast(config_ini["logs"].get("LOG_QUEUE_SIZE", 10000), default=10000))
+
     # === UPLOADS ===
     UPLOAD_PROVIDER: str = empty_str_cast(config_ini["uploads"]["UPLOAD_PROVIDER"]) \
         or "filesystem"
@@ -251,6 +255,22 @@ class ServerConfig(object):
 
     EMAIL_CONFIRMATION_REQUIRE_INTERACTION: bool = process_boolean_str(empty_str_cast(config_ini["optional"].get("EMAIL_CONFIRMATION_REQUIRE_INTERACTION", False), default=False))
 
+    DYNAMIC_CHALLENGE_DECAY_INTERVAL: int = int(empty_str_cast(config_ini["optional"].get("DYNAMIC_CHALLENGE_DECAY_INTERVAL", 0), default=0))
+
+    SUBMISSION_WRITE_BEHIND: bool = process_boolean_str(empty_str_cast(config_ini["optional"].get("SUBMISSION_WRITE_BEHIND", False), default=False))
+
+    SUBMISSION_FLUSH_INTERVAL: int = int(empty_str_cast(config_ini["optional"].get("SUBMISSION_FLUSH_INTERVAL", 500), default=500))
+
+    SUBMISSION_FLUSH_SIZE: int = int(empty_str_cast(config_ini["optional"].get("SUBMISSION_FLUSH_SIZE", 500), default=500))
+
+    DUPLICATE_SUBMISSION_WINDOW: int = int(empty_str_cast(config_ini["optional"].get("DUPLICATE_SUBMISSION_WINDOW", 10), default=10))
+
+    DUPLICATE_SUBMISSION_RECORD: bool = process_boolean_str(empty_str_cast(config_ini["optional"].get("DUPLICATE_SUBMISSION_RECORD", True), default=True))
+
+    GRADING_CONCURRENCY: int = int(empty_str_cast(config_ini["optional"].get("GRADING_CONCURRENCY", 4), default=4))
+
+    GRADING_BACKLOG: int = int(empty_str_cast(config_ini["optional"].get("GRADING_BACKLOG", 5), default=5))
+
     if DATABASE_URL.startswith("sqlite") is False:
         SQLALCHEMY_ENGINE_OPTIONS = {
             "max_overflow": int(empty_str_cast(config_ini["optional"]["SQLALCHEMY_MAX_OVERFLOW"], default=20)),  # noqa: E131
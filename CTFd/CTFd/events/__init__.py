@@ -1,4 +1,4 @@
-from flask import Blueprint, Response, current_app, stream_with_context
+from flask import Blueprint, Response, current_app, session, stream_with_context
 
 from CTFd.models import db
 from CTFd.utils import get_app_config
@@ -11,9 +11,14 @@ events = Blueprint("events", __name__)
 @authed_only
 @ratelimit(method="GET", limit=150, interval=60)
 def subscribe():
+    user_id = session["id"]
+
     @stream_with_context
     def gen():
         for event in current_app.events_manager.subscribe():
+            # Grading results are only sent to the user who made the attempt
+            if event.type == "grading" and event.data["user_id"] != user_id:
+                continue
             yield str(event)
 
     enabled = get_app_config("SERVER_SENT_EVENTS")
@@ -3,11 +3,12 @@ from collections import defaultdict
 
 from flask_marshmallow import Marshmallow
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, inspect
 from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.hybrid import hybrid_property
-from sqlalchemy.orm import column_property, validates
+from sqlalchemy.orm import Session, column_property, validates
 
-from CTFd.cache import cache
+from CTFd.cache import cache, clear_challenge_solves, clear_flags, clear_prerequisites
 
 db = SQLAlchemy()
 ma = Marshmallow()
@@ -551,6 +552,26 @@ class Users(db.Model):
 
     @cache.memoize()
     def get_score(self, admin=False):
+        freeze = None
+        if not admin:
+            freeze = Configs.query.filter_by(key="freeze").first()
+
+        # Without a freeze the materialized score is always current
+        if not (freeze and freeze.value):
+            score = (
+                db.session.query(AccountScores.score)
+                .filter_by(type="users", account_id=self.id)
+                .scalar()
+            )
+            return int(score or 0)
+
+        from CTFd.utils.scores.freeze import get_frozen_scores
+
+        frozen = get_frozen_scores("users")
+        if frozen is not None:
+            aggregate = frozen.get(self.id)
+            return aggregate.score if aggregate else 0
+
         score = db.func.sum(Challenges.value).label("score")
         user = (
             db.session.query(Solves.user_id, score)
@@ -562,13 +583,9 @@ class Users(db.Model):
         award_score = db.func.sum(Awards.value).label("award_score")
         award = db.session.query(award_score).filter_by(user_id=self.id)
 
-        if not admin:
-            freeze = Configs.query.filter_by(key="freeze").first()
-            if freeze and freeze.value:
-                freeze = int(freeze.value)
-                freeze = datetime.datetime.utcfromtimestamp(freeze)
-                user = user.filter(Solves.date < freeze)
-                award = award.filter(Awards.date < freeze)
+        freeze = datetime.datetime.utcfromtimestamp(int(freeze.value))
+        user = user.filter(Solves.date < freeze)
+        award = award.filter(Awards.date < freeze)
 
         user = user.group_by(Solves.user_id).first()
         award = award.first()
@@ -585,24 +602,20 @@ class Users(db.Model):
     @cache.memoize()
     def get_place(self, admin=False, numeric=False):
         """
-        This method is generally a clone of CTFd.scoreboard.get_standings.
-        The point being that models.py must be self-reliant and have little
+        This method looks up the place in the rank index kept by CTFd.utils.scores.
+        The import happens here because models.py must be self-reliant and have little
         to no imports within the CTFd application as importing from the
         application itself will result in a circular import.
         """
         from CTFd.utils.humanize.numbers import ordinalize
-        from CTFd.utils.scores import get_user_standings
-
-        standings = get_user_standings(admin=admin)
+        from CTFd.utils.scores import get_user_rank
 
-        for i, user in enumerate(standings):
-            if user.user_id == self.id:
-                n = i + 1
-                if numeric:
-                    return n
-                return ordinalize(n)
-        else:
+        rank = get_user_rank(self.id, admin=admin)
+        if rank is None:
             return None
+        if numeric:
+            return rank.place
+        return ordinalize(rank.place)
 
 
 class Admins(Users):
@@ -695,6 +708,15 @@ class Teams(db.Model):
         else:
             return None
 
+    @property
+    def member_scores(self):
+        from CTFd.utils.config.visibility import scores_visible
+
+        if scores_visible():
+            return self.get_member_scores(admin=False)
+        else:
+            return {}
+
     @property
     def filled_all_required_fields(self):
         required_team_fields = {
@@ -835,32 +857,35 @@ class Teams(db.Model):
 
     @cache.memoize()
     def get_score(self, admin=False):
-        score = 0
-        for member in self.members:
-            score += member.get_score(admin=admin)
-        return score
+        from CTFd.utils.scores import get_team_scores
+
+        return get_team_scores([self.id], admin=admin)[self.id].score
+
+    def get_member_scores(self, admin=False):
+        """
+        Get the score of every member of the team keyed by user id
+        """
+        from CTFd.utils.scores import get_team_scores
+
+        return get_team_scores([self.id], admin=admin)[self.id].members
 
     @cache.memoize()
     def get_place(self, admin=False, numeric=False):
         """
-        This method is generally a clone of CTFd.scoreboard.get_standings.
-        The point being that models.py must be self-reliant and have little
+        This method looks up the place in the rank index kept by CTFd.utils.scores.
+        The import happens here because models.py must be self-reliant and have little
         to no imports within the CTFd application as importing from the
         application itself will result in a circular import.
         """
         from CTFd.utils.humanize.numbers import ordinalize
-        from CTFd.utils.scores import get_team_standings  # noqa: I001
+        from CTFd.utils.scores import get_team_rank  # noqa: I001
 
-        standings = get_team_standings(admin=admin)
-
-        for i, team in enumerate(standings):
-            if team.team_id == self.id:
-                n = i + 1
-                if numeric:
-                    return n
-                return ordinalize(n)
-        else:
+        rank = get_team_rank(self.id, admin=admin)
+        if rank is None:
             return None
+        if numeric:
+            return rank.place
+        return ordinalize(rank.place)
 
 
 class Submissions(db.Model):
@@ -1184,3 +1209,131 @@ class Ratings(db.Model):
         return "<Rating user_id={} challenge_id={} value={}>".format(
             self.user_id, self.challenge_id, self.value
         )
+
+
+class AccountScores(db.Model):
+    """
+    Materialized score of every user and team that has solved a challenge or received an award.
+
+    Rows are maintained in the same transaction as the Solves, Awards and Challenges they are
+    derived from (see CTFd.utils.scores.materialized) so that reading the scoreboard doesn't
+    need to aggregate every submission.
+    """
+
+    __tablename__ = "account_scores"
+    id = db.Column(db.Integer, primary_key=True)
+    # Either "users" or "teams"
+    type = db.Column(db.String(80), nullable=False)
+    account_id = db.Column(db.Integer, nullable=False)
+    score = db.Column(db.Integer, default=0)
+    # The most recent solve or award. Used to break ties between equal scores.
+    last_id = db.Column(db.Integer)
+    last_date = db.Column(db.DateTime)
+    bracket_id = db.Column(
+        db.Integer, db.ForeignKey("brackets.id", ondelete="SET NULL")
+    )
+
+    __table_args__ = (
+        db.UniqueConstraint("type", "account_id"),
+        db.Index("ix_account_scores_standings", "type", "score"),
+    )
+
+    def __repr__(self):
+        return "<AccountScore type={} account_id={} score={}>".format(
+            self.type, self.account_id, self.score
+        )
+
+
+@event.listens_for(Session, "after_flush")
+def update_account_scores(session, flush_context):
+    from CTFd.utils.scores.materialized import track_score_changes
+
+    track_score_changes(session)
+
+
+@event.listens_for(Session, "after_flush")
+def track_account_changes(session, flush_context):
+    from CTFd.utils.scores.engine import track_account_changes
+
+    track_account_changes(session)
+
+
+@event.listens_for(Session, "after_commit")
+def publish_account_changes(session):
+    if session.info.get("changed_accounts"):
+        from CTFd.utils.scores.engine import publish_account_changes
+
+        publish_account_changes(session)
+
+
+@event.listens_for(Session, "after_flush")
+def track_wrong_submissions(session, flush_context):
+    from CTFd.utils.user import track_wrong_submissions
+
+    track_wrong_submissions(session)
+
+
+@event.listens_for(Session, "after_commit")
+def count_wrong_submissions(session):
+    if session.info.get("wrong_submissions"):
+        from CTFd.utils.user import count_wrong_submissions
+
+        count_wrong_submissions(session)
+
+
+@event.listens_for(Session, "after_flush")
+def track_challenge_changes(session, flush_context):
+    for objects, state in (
+        (session.new, "new"),
+        (session.dirty, "dirty"),
+        (session.deleted, "deleted"),
+    ):
+        for obj in objects:
+            if isinstance(obj, Flags):
+                session.info["flags_changed"] = True
+            elif isinstance(obj, Solves):
+                solved = session.info.setdefault("solved_challenges", set())
+                solved.add(obj.challenge_id)
+            elif isinstance(obj, Challenges):
+                # Only the challenge set and requirements matter to prerequisites
+                requirements = inspect(obj).attrs.requirements
+                if state == "dirty" and not requirements.history.has_changes():
+                    continue
+                session.info["prerequisites_changed"] = True
+
+
+@event.listens_for(Session, "after_flush")
+def track_solve_counts(session, flush_context):
+    from CTFd.plugins.dynamic_challenges.decay import track_solves
+
+    track_solves(session)
+
+
+@event.listens_for(Session, "after_commit")
+def count_solve_counts(session):
+    if session.info.get("counted_solves"):
+        from CTFd.plugins.dynamic_challenges.decay import count_solves
+
+        count_solves(session)
+
+
+@event.listens_for(Session, "after_commit")
+def clear_challenge_changes(session):
+    if session.info.pop("flags_changed", False):
+        clear_flags()
+    if session.info.pop("prerequisites_changed", False):
+        clear_prerequisites()
+    solved = session.info.pop("solved_challenges", None)
+    if solved:
+        clear_challenge_solves(*solved)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_session_changes(session):
+    session.info.pop("changed_accounts", None)
+    session.info.pop("solve_counts_changed", None)
+    session.info.pop("counted_solves", None)
+    session.info.pop("wrong_submissions", None)
+    session.info.pop("flags_changed", None)
+    session.info.pop("prerequisites_changed", None)
+    session.info.pop("solved_challenges", None)
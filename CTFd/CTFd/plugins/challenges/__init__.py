@@ -2,6 +2,7 @@ from dataclasses import dataclass
 
 from flask import Blueprint
 
+from CTFd.cache import clear_flags, clear_prerequisites
 from CTFd.models import (
     ChallengeFiles,
     Challenges,
@@ -18,7 +19,11 @@ from CTFd.plugins.challenges.logic import (
     challenge_attempt_all,
     challenge_attempt_any,
     challenge_attempt_team,
+    record_partial,
 )
+from CTFd.plugins.flags import get_flag_matchers
+from CTFd.utils.scores.engine import record_solve
+from CTFd.utils.submissions import save_submission
 from CTFd.utils.uploads import delete_file
 from CTFd.utils.user import get_ip
 
@@ -41,6 +46,8 @@ class BaseChallenge(object):
     templates = {}
     scripts = {}
     challenge_model = Challenges
+    # Grade attempts in the background and answer them with a ticket instead of holding the request
+    async_grading = False
 
     @classmethod
     def create(cls, request):
@@ -126,6 +133,8 @@ class BaseChallenge(object):
         Challenges.query.filter_by(id=challenge.id).delete()
         cls.challenge_model.query.filter_by(id=challenge.id).delete()
         db.session.commit()
+        clear_flags()
+        clear_prerequisites()
 
     @classmethod
     def attempt(cls, challenge, request):
@@ -141,7 +150,7 @@ class BaseChallenge(object):
         data = request.form or request.get_json()
         submission = data["submission"].strip()
 
-        flags = Flags.query.filter_by(challenge_id=challenge.id).all()
+        flags = get_flag_matchers(challenge.id)
 
         if challenge.logic == "any":
             return challenge_attempt_any(submission, challenge, flags)
@@ -165,6 +174,7 @@ class BaseChallenge(object):
         )
         db.session.add(partial)
         db.session.commit()
+        record_partial(partial, challenge)
 
     @classmethod
     def solve(cls, user, team, challenge, request):
@@ -188,6 +198,9 @@ class BaseChallenge(object):
         db.session.add(solve)
         db.session.commit()
 
+        # Push the new score to the standings engine
+        record_solve(solve)
+
     @classmethod
     def fail(cls, user, team, challenge, request):
         """
@@ -207,8 +220,7 @@ class BaseChallenge(object):
             ip=get_ip(request),
             provided=submission,
         )
-        db.session.add(wrong)
-        db.session.commit()
+        save_submission(wrong)
 
 
 class CTFdStandardChallenge(BaseChallenge):
@@ -1,8 +1,90 @@
-from CTFd.models import Partials
-from CTFd.plugins.flags import FlagException, get_flag_class
+from flask import current_app as app
+
+from CTFd.cache import get_tag_versions
+from CTFd.models import Partials, Users
+from CTFd.plugins.flags import FlagException, get_flag_class, get_flag_matchers
+from CTFd.utils import get_config
 from CTFd.utils.config import is_teams_mode
+from CTFd.utils.submissions import after_transaction
 from CTFd.utils.user import get_current_team, get_current_user
 
+# Captures are tracked per challenge logic, user mode, account and challenge
+CAPTURES_KEY = "%s/%s/%s/%s"
+
+
+def get_captures_version():
+    # Captured flags are flag IDs so they are dropped along with Partials and when flags change
+    return "/".join(get_tag_versions(["partials", "flags"]))
+
+
+def get_matching_flag_ids(flags, provided):
+    return {
+        flag.id for flag in flags if get_flag_class(flag.type).compare(flag, provided)
+    }
+
+
+def get_captured_flag_ids(account_id, challenge_id, flags):
+    """
+    Get the IDs of the flags an account captured with its partial submissions to an "all" logic challenge
+    """
+
+    def load_captured():
+        provideds = Partials.query.with_entities(Partials.provided).filter_by(
+            account_id=account_id, challenge_id=challenge_id
+        )
+        captured = set()
+        for (provided,) in provideds:
+            captured |= get_matching_flag_ids(flags, provided)
+        return captured
+
+    return app.capture_tracker.get(
+        CAPTURES_KEY % ("all", get_config("user_mode"), account_id, challenge_id),
+        load_captured,
+        version=get_captures_version(),
+    )
+
+
+def get_submitter_ids(team_id, challenge_id):
+    """
+    Get the IDs of the team members who submitted a correct flag to a "team" logic challenge
+    """
+
+    def load_submitters():
+        submitters = (
+            Partials.query.with_entities(Partials.user_id)
+            .filter_by(team_id=team_id, challenge_id=challenge_id)
+            .distinct()
+        )
+        return [user_id for (user_id,) in submitters]
+
+    return app.capture_tracker.get(
+        CAPTURES_KEY % ("team", "teams", team_id, challenge_id),
+        load_submitters,
+        version=get_captures_version(),
+    )
+
+
+@after_transaction
+def record_partial(partial, challenge):
+    """
+    Add a recorded partial submission to the captures of its account
+    """
+    if challenge.logic == "all":
+        flags = get_flag_matchers(challenge.id)
+        key = CAPTURES_KEY % (
+            "all",
+            get_config("user_mode"),
+            partial.account_id,
+            challenge.id,
+        )
+        members = get_matching_flag_ids(flags, partial.provided)
+    elif challenge.logic == "team" and partial.team_id:
+        key = CAPTURES_KEY % ("team", "teams", partial.team_id, challenge.id)
+        members = [partial.user_id]
+    else:
+        return
+    app.capture_tracker.add(key, members, version=get_captures_version())
+
 
 def challenge_attempt_any(submission, challenge, flags):
     from CTFd.plugins.challenges import ChallengeResponse
@@ -29,38 +111,24 @@ def challenge_attempt_all(submission, challenge, flags):
     from CTFd.plugins.challenges import ChallengeResponse
 
     user = get_current_user()
-    partials = Partials.query.filter_by(
-        account_id=user.account_id, challenge_id=challenge.id
-    ).all()
-    provideds = [partial.provided for partial in partials]
-    provideds.append(submission)
-
-    target_flags_ids = {flag.id for flag in flags}
-    compared_flag_ids = []
-
-    for flag in flags:
-        # Skip flags that we have already evaluated as captured
-        if flag.id in compared_flag_ids:
-            continue
-        flag_class = get_flag_class(flag.type)
-        for provided in provideds:
-            if flag_class.compare(flag, provided):
-                compared_flag_ids.append(flag.id)
+    # Only the new submission is compared. Flags captured before are tracked by record_partial()
+    matched_flag_ids = get_matching_flag_ids(flags, submission)
+    captured_flag_ids = get_captured_flag_ids(user.account_id, challenge.id, flags)
 
     # If we have captured against all flag IDs the challenge is correct
-    if target_flags_ids == set(compared_flag_ids):
+    target_flags_ids = {flag.id for flag in flags}
+    if target_flags_ids <= captured_flag_ids | matched_flag_ids:
         return ChallengeResponse(
             status="correct",
             message="Correct",
         )
 
     # If we didn't capture all flag IDs we must be missing something.
-    for flag in flags:
-        if get_flag_class(flag.type).compare(flag, submission):
-            return ChallengeResponse(
-                status="partial",
-                message="Correct but more flags are required",
-            )
+    if matched_flag_ids:
+        return ChallengeResponse(
+            status="partial",
+            message="Correct but more flags are required",
+        )
 
     # Input is just wrong
     return ChallengeResponse(
@@ -75,17 +143,11 @@ def challenge_attempt_team(submission, challenge, flags):
     if is_teams_mode():
         user = get_current_user()
         team = get_current_team()
-        partials = Partials.query.filter_by(
-            team_id=team.id, challenge_id=challenge.id
-        ).all()
-
-        submitter_ids = {partial.user_id for partial in partials}
 
         # Check if the user's submission is correct
         for flag in flags:
             try:
                 if get_flag_class(flag.type).compare(flag, submission):
-                    submitter_ids.add(user.id)
                     break
             except FlagException as e:
                 return ChallengeResponse(
@@ -99,7 +161,9 @@ def challenge_attempt_team(submission, challenge, flags):
             )
 
         # The submission is correct so compare if we have received from all team members
-        member_ids = {member.id for member in team.members}
+        submitter_ids = get_submitter_ids(team.id, challenge.id) | {user.id}
+        members = Users.query.with_entities(Users.id).filter_by(team_id=team.id)
+        member_ids = {member_id for (member_id,) in members}
         if member_ids == submitter_ids:
             return ChallengeResponse(
                 status="correct",
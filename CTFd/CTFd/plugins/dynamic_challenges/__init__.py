@@ -1,5 +1,7 @@
-from flask import Blueprint
+from flask import Blueprint, current_app
+from gevent import spawn_later
 
+from CTFd.cache import cache, invalidate
 from CTFd.exceptions.challenges import (
     ChallengeCreateException,
     ChallengeUpdateException,
@@ -7,8 +9,20 @@ from CTFd.exceptions.challenges import (
 from CTFd.models import Challenges, db
 from CTFd.plugins import register_plugin_assets_directory
 from CTFd.plugins.challenges import CHALLENGE_CLASSES, BaseChallenge
-from CTFd.plugins.dynamic_challenges.decay import DECAY_FUNCTIONS, logarithmic
+from CTFd.plugins.dynamic_challenges.decay import (
+    DECAY_FUNCTIONS,
+    get_cached_solve_count,
+    logarithmic,
+)
 from CTFd.plugins.migrations import upgrade
+from CTFd.utils.scores.engine import publish_value_change
+from CTFd.utils.submissions import after_transaction
+
+# Set while a challenge's value was recalculated less than DYNAMIC_CHALLENGE_DECAY_INTERVAL seconds ago
+RECALCULATED_KEY = "dynamic_challenges/recalculated/%s"
+
+# Set while a recalculation of a challenge's held back value is scheduled
+SCHEDULED_KEY = "dynamic_challenges/scheduled/%s"
 
 
 class DynamicChallenge(Challenges):
@@ -56,12 +70,45 @@ class DynamicValueChallenge(BaseChallenge):
     challenge_model = DynamicChallenge
 
     @classmethod
-    def calculate_value(cls, challenge):
+    def calculate_value(cls, challenge, solve_count=None, force=True):
+        """
+        Apply the decay function to the challenge's eligible solve count.
+
+        :param solve_count: The current solve count if the caller already has it
+        :param force: Apply a new value even if the challenge was recalculated less than
+        DYNAMIC_CHALLENGE_DECAY_INTERVAL seconds ago
+        """
+        if solve_count is None:
+            solve_count = get_cached_solve_count(challenge)
         f = DECAY_FUNCTIONS.get(challenge.function, logarithmic)
-        value = f(challenge)
+        value = f(challenge, solve_count=solve_count)
+
+        # Values assigned from forms are still strings until they are loaded again
+        previous = int(challenge.value or 0)
+        if previous == value:
+            challenge.value = value
+            db.session.commit()
+            return challenge
+
+        # Coalesce value changes of challenges that are solved in quick succession. The
+        # latest value is applied by a recalculation scheduled at the end of the interval.
+        interval = current_app.config.get("DYNAMIC_CHALLENGE_DECAY_INTERVAL") or 0
+        if force is False and interval > 0:
+            if (
+                cache.add(RECALCULATED_KEY % challenge.id, True, timeout=interval)
+                is False
+            ):
+                db.session.commit()
+                schedule_recalculation(challenge.id, interval)
+                return challenge
 
         challenge.value = value
         db.session.commit()
+
+        # account_scores was updated in the same transaction so only the new
+        # scores of the challenge's solvers need to be sent to the standings
+        publish_value_change(challenge.id, previous, value)
+        invalidate("challenges")
         return challenge
 
     @classmethod
@@ -111,7 +158,33 @@ class DynamicValueChallenge(BaseChallenge):
     def solve(cls, user, team, challenge, request):
         super().solve(user, team, challenge, request)
 
-        DynamicValueChallenge.calculate_value(challenge)
+        # The solve was added to the challenge's solve counter when it was recorded
+        DynamicValueChallenge.calculate_value(challenge, force=False)
+
+
+@after_transaction
+def schedule_recalculation(challenge_id, interval):
+    """
+    Recalculate the value of a challenge once the decay interval that held it back passed. Only one
+    recalculation is scheduled per challenge at a time.
+    """
+    # Expires on its own if the worker that scheduled the recalculation goes away
+    if cache.add(SCHEDULED_KEY % challenge_id, True, timeout=interval * 2) is False:
+        return
+    app = current_app._get_current_object()
+
+    def _recalculate():
+        with app.app_context():
+            cache.delete(SCHEDULED_KEY % challenge_id)
+            try:
+                challenge = DynamicChallenge.query.filter_by(id=challenge_id).first()
+                if challenge is not None:
+                    DynamicValueChallenge.calculate_value(challenge)
+            except Exception:
+                db.session.rollback()
+                app.logger.exception("Failed to recalculate challenge value")
+
+    spawn_later(interval, _recalculate)
 
 
 def load(app):
@@ -2,9 +2,15 @@ from __future__ import division  # Use floating point for math calculations
 
 import math
 
-from CTFd.models import Solves
+from CTFd.cache import cache, get_tag_versions
+from CTFd.models import Solves, Users, db
 from CTFd.utils.modes import get_model
 
+# Eligible solve counter of a challenge per version of the "solve_counts" tag. The tag is
+# invalidated whenever solves are removed or accounts are hidden, banned or deleted. New
+# solves are added to the counter by count_solves() once their transaction commits.
+SOLVE_COUNT_KEY = "dynamic_challenges/solve_count/%s/%s"
+
 
 def get_solve_count(challenge):
     Model = get_model()
@@ -21,8 +27,72 @@ def get_solve_count(challenge):
     return solve_count
 
 
-def linear(challenge):
-    solve_count = get_solve_count(challenge)
+def _solve_count_key(challenge_id):
+    (version,) = get_tag_versions(["solve_counts"])
+    return SOLVE_COUNT_KEY % (version, challenge_id)
+
+
+def get_cached_solve_count(challenge):
+    """
+    Get the number of solves that count towards a challenge's decay from its counter.
+    The counter is only loaded from the database when it doesn't exist yet.
+
+    Solves added by the current transaction are included although they are only added to the
+    counter once the transaction commits.
+    """
+    key = _solve_count_key(challenge.id)
+    pending = db.session.info.get("counted_solves", {}).get(challenge.id, 0)
+    solve_count = cache.get(key)
+    if solve_count is None:
+        # The database already has the solves of the current transaction
+        solve_count = get_solve_count(challenge) - pending
+        cache.set(key, solve_count, timeout=0)
+    return solve_count + pending
+
+
+def track_solves(session):
+    """
+    Remember the new solves in a flush that count towards their challenge's decay so they can be
+    added to the solve counters once the transaction commits.
+    """
+    solves = [obj for obj in session.new if isinstance(obj, Solves)]
+    if not solves:
+        return
+
+    Model = get_model()
+    attribute = "user_id" if Model is Users else "team_id"
+    account_ids = {getattr(obj, attribute) for obj in solves}
+    eligible = {
+        account_id
+        for account_id, in session.query(Model.id).filter(
+            Model.id.in_(account_ids),
+            Model.hidden == False,
+            Model.banned == False,
+        )
+    }
+
+    counted = session.info.setdefault("counted_solves", {})
+    for obj in solves:
+        if getattr(obj, attribute) in eligible:
+            counted[obj.challenge_id] = counted.get(obj.challenge_id, 0) + 1
+
+
+def count_solves(session):
+    """
+    Add the committed solves remembered by track_solves() to the solve counters.
+    """
+    for challenge_id, amount in session.info.pop("counted_solves", {}).items():
+        key = _solve_count_key(challenge_id)
+        # Counters that don't exist yet are loaded from the database with the new solves
+        if cache.get(key) is None:
+            continue
+        if cache.cache.inc(key, delta=amount) is None:
+            cache.delete(key)
+
+
+def linear(challenge, solve_count=None):
+    if solve_count is None:
+        solve_count = get_solve_count(challenge)
 
     # If the solve count is 0 we shouldn't manipulate the solve count to
     # let the math update back to normal
@@ -40,8 +110,9 @@ def linear(challenge):
     return value
 
 
-def logarithmic(challenge):
-    solve_count = get_solve_count(challenge)
+def logarithmic(challenge, solve_count=None):
+    if solve_count is None:
+        solve_count = get_solve_count(challenge)
 
     # If the solve count is 0 we shouldn't manipulate the solve count to
     # let the math update back to normal
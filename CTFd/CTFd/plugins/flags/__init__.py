@@ -1,7 +1,13 @@
 import re
 
+from CTFd.cache import get_tag_versions
+from CTFd.models import Flags
 from CTFd.plugins import register_plugin_assets_directory
 
+# Flag matchers of each challenge in this process along with the version of the "flags" tag they were built for.
+# Flags whose class has no compile() of its own are kept as their id and loaded again when they are matched.
+_matchers = {}
+
 
 class FlagException(Exception):
     def __init__(self, message):
@@ -11,10 +17,36 @@ class FlagException(Exception):
         return self.message
 
 
+class FlagMatcher(object):
+    """
+    Read only copy of a Flags row along with whatever its flag class precompiled for it with compile().
+    Flag classes receive it in compare() in place of the row.
+    """
+
+    __slots__ = ("id", "challenge_id", "type", "content", "data", "compiled")
+
+    def __init__(self, flag):
+        self.id = flag.id
+        self.challenge_id = flag.challenge_id
+        self.type = flag.type
+        self.content = flag.content
+        self.data = flag.data
+        self.compiled = get_flag_class(flag.type).compile(flag)
+
+
 class BaseFlag(object):
     name = None
     templates = {}
 
+    @staticmethod
+    def compile(chal_key_obj):
+        """
+        Precompute whatever compare() needs from a flag. The result is cached until the flags change.
+
+        Flag classes that don't override compile() are given the Flags row in compare() instead of a FlagMatcher.
+        """
+        return None
+
     @staticmethod
     def compare(self, saved, provided):
         return True
@@ -27,6 +59,12 @@ class CTFdStaticFlag(BaseFlag):
         "update": "/plugins/flags/assets/static/edit.html",
     }
 
+    @staticmethod
+    def compile(chal_key_obj):
+        if chal_key_obj.data == "case_insensitive":
+            return chal_key_obj.content.lower()
+        return None
+
     @staticmethod
     def compare(chal_key_obj, provided):
         saved = chal_key_obj.content
@@ -37,7 +75,8 @@ class CTFdStaticFlag(BaseFlag):
         result = 0
 
         if data == "case_insensitive":
-            for x, y in zip(saved.lower(), provided.lower()):
+            saved = getattr(chal_key_obj, "compiled", None) or saved.lower()
+            for x, y in zip(saved, provided.lower()):
                 result |= ord(x) ^ ord(y)
         else:
             for x, y in zip(saved, provided):
@@ -52,13 +91,25 @@ class CTFdRegexFlag(BaseFlag):
         "update": "/plugins/flags/assets/regex/edit.html",
     }
 
+    @staticmethod
+    def compile(chal_key_obj):
+        flags = re.IGNORECASE if chal_key_obj.data == "case_insensitive" else 0
+        try:
+            return re.compile(chal_key_obj.content, flags)
+        except re.error:
+            # compare() reports the error when the flag is used
+            return None
+
     @staticmethod
     def compare(chal_key_obj, provided):
         saved = chal_key_obj.content
         data = chal_key_obj.data
 
         try:
-            if data == "case_insensitive":
+            pattern = getattr(chal_key_obj, "compiled", None)
+            if pattern is not None:
+                res = pattern.match(provided)
+            elif data == "case_insensitive":
                 res = re.match(saved, provided, re.IGNORECASE)
             else:
                 res = re.match(saved, provided)
@@ -79,5 +130,52 @@ def get_flag_class(class_id):
     return cls
 
 
+def is_compiled(class_id):
+    """
+    Check if flags of a type are matched with a FlagMatcher, i.e. their flag class has its own compile()
+    """
+    try:
+        cls = get_flag_class(class_id)
+    except KeyError:
+        return False
+    return getattr(cls, "compile", BaseFlag.compile) is not BaseFlag.compile
+
+
+def get_flag_matchers(challenge_id):
+    """
+    Get the FlagMatchers of a challenge. They are built once per process and version of the "flags" tag
+    so judging a submission doesn't need to query or recompile its flags.
+
+    Flags whose class has no compile() of its own (e.g. from third party plugins) are returned as their Flags
+    row so that compare() gets what it always got.
+    """
+    (version,) = get_tag_versions(["flags"])
+    cached = _matchers.get(challenge_id)
+    if cached is None or cached[0] != version:
+        flags = Flags.query.filter_by(challenge_id=challenge_id).all()
+        matchers, result = [], []
+        for flag in flags:
+            if is_compiled(flag.type):
+                matcher = FlagMatcher(flag)
+                matchers.append(matcher)
+                result.append(matcher)
+            else:
+                matchers.append(flag.id)
+                result.append(flag)
+        _matchers[challenge_id] = (version, matchers)
+        return result
+
+    matchers = cached[1]
+    flag_ids = [matcher for matcher in matchers if not isinstance(matcher, FlagMatcher)]
+    if not flag_ids:
+        return matchers
+    rows = {flag.id: flag for flag in Flags.query.filter(Flags.id.in_(flag_ids))}
+    return [
+        matcher if isinstance(matcher, FlagMatcher) else rows[matcher]
+        for matcher in matchers
+        if isinstance(matcher, FlagMatcher) or matcher in rows
+    ]
+
+
 def load(app):
     register_plugin_assets_directory(app, base_path="/plugins/flags/assets/")
@@ -1,8 +1,8 @@
 from flask import Blueprint
 
-from CTFd.models import Challenges, Flags, db
+from CTFd.models import Challenges, db
 from CTFd.plugins import challenges, register_plugin_assets_directory
-from CTFd.plugins.flags import get_flag_class
+from CTFd.plugins.flags import get_flag_class, get_flag_matchers
 from CTFd.plugins.migrations import upgrade
 from CTFd.utils.uploads import delete_file
 
@@ -57,7 +57,7 @@ class MultipleChoiceChallenge(challenges.BaseChallenge):
             submission = submission.strip()
         else:
             return False, "Please select a choice"
-        chal_keys = Flags.query.filter_by(challenge_id=chal.id).all()
+        chal_keys = get_flag_matchers(chal.id)
         for chal_key in chal_keys:
             if get_flag_class(chal_key.type).compare(chal_key, submission):
                 return True, "Correct"
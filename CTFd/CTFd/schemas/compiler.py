@@ -0,0 +1,235 @@
+import datetime
+from functools import lru_cache
+
+from marshmallow import fields, missing
+from marshmallow.decorators import POST_DUMP, PRE_DUMP
+from marshmallow.schema import MarshalResult
+from marshmallow_sqlalchemy.fields import Related, RelatedList
+
+ISO_FORMATS = (None, "iso", "iso8601")
+
+
+def _read(attribute):
+    def read(obj):
+        return getattr(obj, attribute, missing)
+
+    return read
+
+
+def _fallback(name, field):
+    def dump(obj):
+        return field.serialize(name, obj)
+
+    return dump
+
+
+def _typed(name, field, attribute, value_type):
+    # Values that already have the type the field serializes to are dumped as they are
+    def dump(obj):
+        value = getattr(obj, attribute, missing)
+        if value is None or value is missing or value.__class__ is value_type:
+            return value
+        return field._serialize(value, name, obj)
+
+    return dump
+
+
+def _datetime(name, field, attribute):
+    utc = datetime.timezone.utc
+
+    def dump(obj):
+        value = getattr(obj, attribute, missing)
+        if value is None or value is missing:
+            return value
+        if value.tzinfo is None:
+            return value.replace(tzinfo=utc).isoformat()
+        return field._serialize(value, name, obj)
+
+    return dump
+
+
+def _related(field):
+    keys = [prop.key for prop in field.related_keys]
+    if len(keys) == 1:
+        (key,) = keys
+
+        def related(value):
+            return getattr(value, key, None)
+
+    else:
+
+        def related(value):
+            return {key: getattr(value, key, None) for key in keys}
+
+    return related
+
+
+class CompiledSchema(object):
+    """
+    Dump function generated once for a schema instance from its fields.
+
+    Values are read straight off the dumped objects and only go through their Field when they don't
+    already have the type the field serializes to. Fields without a fast path are serialized by the
+    Field itself so the output always matches schema.dump(obj).data.
+
+    Schemas can define dump_processor(view) to replace their post_dump hooks. It is called once per
+    dump (not once per object) so anything it loads is shared by the whole batch and returns a
+    function processing the data of each object or None if there's nothing to do.
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.fields = []
+        for name, field in schema.fields.items():
+            if field.load_only:
+                continue
+            key = (schema.prefix or "") + (field.dump_to or name)
+            self.fields.append((key, self._compile_field(name, field)))
+
+        processors = schema.__processors__
+        self.passthrough = bool(
+            processors.get((PRE_DUMP, False))
+            or processors.get((PRE_DUMP, True))
+            or processors.get((POST_DUMP, True))
+        )
+        self.post_dump = bool(processors.get((POST_DUMP, False)))
+
+    def _compile_field(self, name, field):
+        """
+        Get a function that returns the function dumping the field for each object of a batch
+        """
+        attribute = field.attribute or name
+        field_type = type(field)
+        if "." in attribute:
+            dump = _fallback(name, field)
+        elif field_type is fields.Raw:
+            dump = _read(attribute)
+        elif field_type in (fields.String, fields.Integer, fields.Boolean):
+            value_type = {
+                fields.String: str,
+                fields.Integer: int,
+                fields.Boolean: bool,
+            }[field_type]
+            if getattr(field, "as_string", False):
+                dump = _fallback(name, field)
+            else:
+                dump = _typed(name, field, attribute, value_type)
+        elif (
+            field_type is fields.DateTime
+            and field.dateformat in ISO_FORMATS
+            and field.localtime is False
+        ):
+            dump = _datetime(name, field, attribute)
+        elif field_type is Related:
+            related = _related(field)
+            read = _read(attribute)
+
+            def dump(obj):
+                value = read(obj)
+                return value if value is missing else related(value)
+
+        elif field_type is RelatedList and type(field.container) is Related:
+            related = _related(field.container)
+            read = _read(attribute)
+
+            def dump(obj):
+                value = read(obj)
+                if isinstance(value, list):
+                    return [related(v) for v in value]
+                return field.serialize(name, obj)
+
+        elif field_type is fields.Nested:
+            return self._compile_nested(field, attribute)
+        else:
+            dump = _fallback(name, field)
+        return lambda: dump
+
+    @staticmethod
+    def _compile_nested(field, attribute):
+        nested = CompiledSchema(field.schema)
+        only = None
+        if isinstance(field.only, str):
+            only_field = field.schema.fields[field.only]
+            only = (field.schema.prefix or "") + (only_field.dump_to or field.only)
+        read = _read(attribute)
+
+        def prepare():
+            dump_nested = nested.prepare()
+            if only is None:
+                dump_item = dump_nested
+            else:
+                # A nested field with a single field name dumps that field's value
+                def dump_item(obj):
+                    return dump_nested(obj)[only]
+
+            def dump(obj):
+                value = read(obj)
+                if value is None or value is missing:
+                    return value
+                if field.many:
+                    return [dump_item(v) for v in value]
+                return dump_item(value)
+
+            return dump
+
+        return prepare
+
+    def prepare(self):
+        """
+        Get the function dumping each object of a batch
+        """
+        schema = self.schema
+        if self.passthrough:
+            return lambda obj: schema.dump(obj, many=False).data
+
+        dumpers = [(key, make()) for key, make in self.fields]
+        process = None
+        if self.post_dump:
+            if hasattr(schema, "dump_processor"):
+                process = schema.dump_processor(getattr(schema, "view", None))
+            else:
+
+                def process(data):
+                    return schema._invoke_processors(
+                        POST_DUMP, pass_many=False, data=data, many=False
+                    )
+
+        def dump_one(obj):
+            data = {}
+            for key, dump in dumpers:
+                value = dump(obj)
+                if value is not missing:
+                    data[key] = value
+            if process is not None:
+                data = process(data) or data
+            return data
+
+        return dump_one
+
+    def dump(self, obj, many=False):
+        """
+        Dump an object or a list of objects like schema.dump()
+        """
+        dump_one = self.prepare()
+        if many:
+            data = [dump_one(o) for o in obj]
+        else:
+            data = dump_one(obj)
+        return MarshalResult(data, {})
+
+
+@lru_cache(maxsize=None)
+def _compile_schema(schema_cls, view):
+    if isinstance(view, tuple):
+        view = list(view)
+    return CompiledSchema(schema_cls(view=view))
+
+
+def compile_schema(schema_cls, view=None):
+    """
+    Get the CompiledSchema of a schema class and one of its views (or a list of field names).
+    Compiled schemas are built once per process.
+    """
+    if isinstance(view, list):
+        view = tuple(view)
+    return _compile_schema(schema_cls, view)
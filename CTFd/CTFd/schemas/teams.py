@@ -338,25 +338,43 @@ class TeamSchema(ma.ModelSchema):
         Users (self) can see their edittable and public fields
         Public (user) can only see public fields
         """
+        process = self.dump_processor(self.view)
+        if process:
+            process(data)
+
+    @staticmethod
+    def dump_processor(view):
+        """
+        Get the function removing the fields a view can't see from dumped data or None if the view
+        sees every field. Fields are only loaded once so the function can be used for a whole batch.
+        """
+        if view not in ("user", "self"):
+            return None
+
         # Gather all possible fields
         removed_field_ids = []
         fields = TeamFields.query.all()
 
         # Select fields for removal based on current view and properties of the field
         for field in fields:
-            if self.view == "user":
+            if view == "user":
                 if field.public is False:
                     removed_field_ids.append(field.id)
-            elif self.view == "self":
+            elif view == "self":
                 if field.editable is False and field.public is False:
                     removed_field_ids.append(field.id)
 
-        # Rebuild fuilds
-        fields = data.get("fields")
-        if fields:
-            data["fields"] = [
-                field for field in fields if field["field_id"] not in removed_field_ids
-            ]
+        def process(data):
+            # Rebuild fuilds
+            fields = data.get("fields")
+            if fields:
+                data["fields"] = [
+                    field
+                    for field in fields
+                    if field["field_id"] not in removed_field_ids
+                ]
+
+        return process
 
     views = {
         "user": [
@@ -68,6 +68,7 @@ Alpine.data("Challenge", () => ({
   submission: "",
   tab: null,
   solves: [],
+  solvesNext: null,
   submissions: [],
   solution: null,
   response: null,
@@ -119,12 +120,25 @@ Alpine.data("Challenge", () => ({
   },
 
   async showSolves() {
-    this.solves = await CTFd.pages.challenge.loadSolves(this.id);
-    this.solves.forEach(solve => {
+    this.solves = [];
+    this.solvesNext = null;
+    await this.loadSolves();
+    new Tab(this.$el).show();
+  },
+
+  async loadSolves() {
+    // Solves are paginated by a cursor pointing after the last solve of the previous page
+    let url = `/api/v1/challenges/${this.id}/solves`;
+    if (this.solvesNext) {
+      url += `?after=${this.solvesNext}`;
+    }
+    const response = await CTFd.fetch(url, { method: "GET" });
+    const body = await response.json();
+    body.data.forEach(solve => {
       solve.date = dayjs(solve.date).format("MMMM Do, h:mm:ss A");
-      return solve;
     });
-    new Tab(this.$el).show();
+    this.solves = this.solves.concat(body.data);
+    this.solvesNext = body.meta.pagination.next;
   },
 
   async showSubmissions() {
@@ -205,9 +219,32 @@ Alpine.data("Challenge", () => ({
       this.submission,
     );
 
+    // Challenge types graded asynchronously answer with a ticket to poll for the verdict
+    if (this.response.data.status === "pending") {
+      await this.waitForGrading(this.response.data.ticket);
+    }
+
     await this.renderSubmissionResponse();
   },
 
+  async waitForGrading(ticket) {
+    let delay = 500;
+    while (this.response.data.status === "pending") {
+      await new Promise(resolve => setTimeout(resolve, delay));
+      delay = Math.min(delay * 2, 5000);
+      const url = `/api/v1/challenges/attempt/${ticket}`;
+      const response = await CTFd.fetch(url, { method: "GET" });
+      if (!response.ok) {
+        this.response = {
+          success: false,
+          data: { status: "error", message: "Submission could not be graded" },
+        };
+        return;
+      }
+      this.response = await response.json();
+    }
+  },
+
   async renderSubmissionResponse() {
     if (this.response.data.status === "correct") {
       this.submission = "";
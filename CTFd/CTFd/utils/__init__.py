@@ -6,7 +6,7 @@ from cmarkgfm.cmark import Options
 from flask import current_app as app
 
 # isort:imports-firstparty
-from CTFd.cache import cache
+from CTFd.cache import cache, invalidate
 from CTFd.constants.setup import DEFAULTS
 from CTFd.models import Configs, db
 
@@ -96,6 +96,7 @@ def set_config(key, value):
         key = str(key)
 
     cache.delete_memoized(_get_config, key)
+    invalidate("config")
     return config
 
 
@@ -1,17 +1,20 @@
 import datetime
-from collections import namedtuple
+from collections import defaultdict, namedtuple
 
 from sqlalchemy import func as sa_func
 from sqlalchemy.sql import and_, false, true
 
-from CTFd.cache import cache
+from CTFd.cache import memoize_tags
 from CTFd.models import Challenges, Ratings, Solves, Submissions, Users, db
+from CTFd.schemas.compiler import compile_schema
 from CTFd.schemas.submissions import SubmissionSchema
 from CTFd.schemas.tags import TagSchema
 from CTFd.utils import get_config
 from CTFd.utils.dates import isoformat, unix_time_to_utc
 from CTFd.utils.helpers.models import build_model_filters
-from CTFd.utils.modes import generate_account_url, get_model
+from CTFd.utils.modes import get_account_url_prefix, get_model
+from CTFd.utils.scores.freeze import get_frozen
+from CTFd.utils.security.signing import hmac
 
 Challenge = namedtuple(
     "Challenge", ["id", "type", "name", "value", "category", "tags", "requirements"]
@@ -19,8 +22,34 @@ Challenge = namedtuple(
 
 Rating = namedtuple("Rating", ["up", "down", "count"])
 
+# A challenge of the challenge board. payload is what every account that can see the challenge gets
+# without its solve count and solve status or None if its challenge type isn't installed.
+BoardEntry = namedtuple("BoardEntry", ["id", "requirements", "anonymize", "payload"])
 
-@cache.memoize(timeout=60)
+# What an account has solved and unlocked on the challenge board
+BoardOverlay = namedtuple("BoardOverlay", ["solved", "unlocked"])
+
+# A page of the solves of a challenge. next is the cursor of the following page or None on the last page.
+SolvesPage = namedtuple("SolvesPage", ["solves", "next", "total"])
+
+# Number of solves in a page of the solves of a challenge
+SOLVES_PER_PAGE = 50
+
+# Shown instead of locked challenges with anonymized requirements
+ANONYMIZED_CHALLENGE = {
+    "type": "hidden",
+    "name": "???",
+    "value": 0,
+    "solves": None,
+    "solved_by_me": False,
+    "category": "???",
+    "tags": [],
+    "template": "",
+    "script": "",
+}
+
+
+@memoize_tags("challenges", timeout=60)
 def get_all_challenges(admin=False, field=None, q=None, **query_args):
     filters = build_model_filters(model=Challenges, query=q, field=field)
     chal_q = Challenges.query
@@ -34,7 +63,7 @@ def get_all_challenges(admin=False, field=None, q=None, **query_args):
         .filter(*filters)
         .order_by(Challenges.value, Challenges.id)
     )
-    tag_schema = TagSchema(view="user", many=True)
+    tag_schema = compile_schema(TagSchema, view="user")
 
     results = []
     for c in chal_q:
@@ -45,51 +74,311 @@ def get_all_challenges(admin=False, field=None, q=None, **query_args):
             value=c.value,
             category=c.category,
             requirements=c.requirements,
-            tags=tag_schema.dump(c.tags).data,
+            tags=tag_schema.dump(c.tags, many=True).data,
         )
         results.append(ct)
     return results
 
 
-@cache.memoize(timeout=60)
-def get_solves_for_challenge_id(challenge_id, freeze=False):
+@memoize_tags("challenges", "prerequisites", timeout=60)
+def get_challenge_board(admin=False, field=None, q=None, **query_args):
+    """
+    Get the part of the challenge list that is the same for every account. Accounts only add their
+    BoardOverlay to it.
+    """
+    from CTFd.plugins.challenges import get_chal_class
+
+    board = []
+    for challenge in get_all_challenges.uncached(
+        admin=admin, field=field, q=q, **query_args
+    ):
+        try:
+            challenge_type = get_chal_class(challenge.type)
+        except KeyError:
+            payload = None
+        else:
+            payload = {
+                "id": challenge.id,
+                "type": challenge_type.name,
+                "name": challenge.name,
+                "value": challenge.value,
+                "category": challenge.category,
+                "tags": challenge.tags,
+                "template": challenge_type.templates["view"],
+                "script": challenge_type.scripts["view"],
+            }
+        requirements = challenge.requirements or {}
+        board.append(
+            BoardEntry(
+                id=challenge.id,
+                requirements=bool(requirements),
+                anonymize=bool(requirements.get("anonymize")),
+                payload=payload,
+            )
+        )
+    return board
+
+
+def get_board_overlay(account_id, user_mode, user_id=None, session_hash=None):
+    """
+    Get the BoardOverlay of an account or of anonymous users if account_id is None.
+
+    Overlays asked for by a user's session are only given once the session is checked to still be valid for
+    the account: the user must still belong to it and session_hash must still match the user's password.
+    This is checked on every call so a cached overlay is never served to a session that left the account.
+
+    :param user_mode: The user mode account_id belongs to
+    :param user_id: The user whose session is asking for the overlay
+    :param session_hash: The hash stored in the user's session
+    :return: The BoardOverlay or None if the session is no longer valid for the account
+    """
+    if user_id is not None:
+        user = (
+            Users.query.with_entities(Users.team_id, Users.password)
+            .filter_by(id=user_id)
+            .first()
+        )
+        if user is None:
+            return None
+        team_id, password = user
+        if (team_id if user_mode == "teams" else user_id) != account_id:
+            return None
+        if session_hash and session_hash != hmac(password):
+            return None
+    return get_account_overlay(account_id, user_mode)
+
+
+def _account_board_tags(account_id, user_mode):
+    return ("submissions", "prerequisites", f"submissions/account/{account_id}")
+
+
+@memoize_tags(_account_board_tags, timeout=60)
+def get_account_overlay(account_id, user_mode):
+    solved = frozenset()
+    if account_id is not None:
+        solves = Solves.query.with_entities(Solves.challenge_id).filter(
+            Solves.account_id == account_id
+        )
+        solved = frozenset(challenge_id for challenge_id, in solves)
+    return BoardOverlay(
+        solved=solved, unlocked=frozenset(get_unlocked_challenge_ids(solved))
+    )
+
+
+class PrerequisiteGraph(object):
+    """
+    Compiled prerequisites of every challenge.
+
+    Each challenge gets a bit in topological order and the valid prerequisites of a challenge (those that
+    still exist) are compiled into a mask of those bits. An account's solves are turned into the same kind
+    of bitmap once with solve_mask() so checking if a challenge is unlocked is a single comparison.
+    """
+
+    def __init__(self, challenges):
+        challenge_ids = {challenge_id for challenge_id, _ in challenges}
+        self.prerequisites = {}
+        for challenge_id, requirements in challenges:
+            prereqs = (requirements or {}).get("prerequisites", [])
+            self.prerequisites[challenge_id] = frozenset(prereqs) & challenge_ids
+
+        self.order = self._sort(self.prerequisites)
+        self.bits = {challenge_id: 1 << i for i, challenge_id in enumerate(self.order)}
+        self.masks = {}
+        for challenge_id, prereqs in self.prerequisites.items():
+            mask = 0
+            for prereq in prereqs:
+                mask |= self.bits[prereq]
+            self.masks[challenge_id] = mask
+
+    @staticmethod
+    def _sort(prerequisites):
+        # Kahn's algorithm. Challenges in a cycle can never be unlocked and are placed last.
+        dependents = defaultdict(list)
+        remaining = {}
+        for challenge_id, prereqs in prerequisites.items():
+            remaining[challenge_id] = len(prereqs)
+            for prereq in prereqs:
+                dependents[prereq].append(challenge_id)
+
+        ready = sorted(c for c, count in remaining.items() if count == 0)
+        order = []
+        while ready:
+            challenge_id = ready.pop(0)
+            order.append(challenge_id)
+            for dependent in sorted(dependents[challenge_id]):
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+        placed = set(order)
+        order.extend(sorted(c for c in prerequisites if c not in placed))
+        return order
+
+    def solve_mask(self, solve_ids):
+        mask = 0
+        for challenge_id in solve_ids:
+            mask |= self.bits.get(challenge_id, 0)
+        return mask
+
+    def is_unlocked(self, challenge_id, solve_mask):
+        mask = self.masks.get(challenge_id, 0)
+        return solve_mask & mask == mask
+
+    def unlocked(self, solve_mask):
+        return {
+            challenge_id
+            for challenge_id, mask in self.masks.items()
+            if solve_mask & mask == mask
+        }
+
+
+@memoize_tags("prerequisites")
+def get_prerequisite_graph():
+    """
+    Get the PrerequisiteGraph of every challenge. It is only rebuilt when challenges are added, deleted or have
+    their requirements changed.
+    """
+    challenges = Challenges.query.with_entities(
+        Challenges.id, Challenges.requirements
+    ).all()
+    return PrerequisiteGraph([(c.id, c.requirements) for c in challenges])
+
+
+def get_unlocked_challenge_ids(solve_ids):
+    """
+    Get the IDs of the challenges whose prerequisites are met by an account's solves
+    """
+    graph = get_prerequisite_graph()
+    return graph.unlocked(graph.solve_mask(solve_ids))
+
+
+def _challenge_solves_tags(challenge_id, freeze=False):
+    return ("challenges", "config", "solve_counts", f"solves/challenge/{challenge_id}")
+
+
+def _get_solves_query(challenge_id, freeze=False):
     Model = get_model()
-    # Note that we specifically query for the Solves.account.name
-    # attribute here because it is faster than having SQLAlchemy
-    # query for the attribute directly and it's unknown what the
-    # affects of changing the relationship lazy attribute would be
     solves = (
-        Solves.query.add_columns(Model.name.label("account_name"))
+        db.session.query(
+            Solves.id,
+            Solves.account_id.label("account_id"),
+            Solves.date,
+            Model.name,
+        )
         .join(Model, Solves.account_id == Model.id)
         .filter(
             Solves.challenge_id == challenge_id,
             Model.banned == False,
             Model.hidden == False,
         )
-        .order_by(Solves.date.asc())
     )
     if freeze:
         freeze_time = get_config("freeze")
         if freeze_time:
             dt = datetime.datetime.utcfromtimestamp(freeze_time)
             solves = solves.filter(Solves.date < dt)
-    results = []
+    return solves
 
-    for solve in solves:
-        # Seperate out the account name and the Solve object from the SQLAlchemy tuple
-        solve, account_name = solve
-        results.append(
-            {
-                "account_id": solve.account_id,
-                "name": account_name,
-                "date": isoformat(solve.date),
-                "account_url": generate_account_url(account_id=solve.account_id),
-            }
+
+def _get_solves_page(challenge_id, freeze=False, after=None):
+    """
+    Get up to SOLVES_PER_PAGE solves of a challenge made after the solve with id `after`
+    and the cursor of the next page
+    """
+    solves = _get_solves_query(challenge_id, freeze=freeze)
+    if after is not None:
+        solves = solves.filter(Solves.id > after)
+    rows = solves.order_by(Solves.id.asc()).limit(SOLVES_PER_PAGE + 1).all()
+
+    cursor = None
+    if len(rows) > SOLVES_PER_PAGE:
+        rows = rows[:SOLVES_PER_PAGE]
+        cursor = rows[-1].id
+
+    account_url = get_account_url_prefix()
+    results = [
+        {
+            "account_id": row.account_id,
+            "name": row.name,
+            "date": isoformat(row.date),
+            "account_url": f"{account_url}{row.account_id}",
+        }
+        for row in rows
+    ]
+    return results, cursor
+
+
+@memoize_tags(_challenge_solves_tags, timeout=60)
+def _get_first_solves_page(challenge_id, freeze=False):
+    solves, cursor = _get_solves_page(challenge_id, freeze=freeze)
+    if cursor is None:
+        total = len(solves)
+    else:
+        total = (
+            _get_solves_query(challenge_id, freeze=freeze)
+            .with_entities(sa_func.count(Solves.id))
+            .scalar()
         )
-    return results
+    return SolvesPage(solves=solves, next=cursor, total=total)
+
+
+def get_solves_page_for_challenge_id(challenge_id, freeze=False, after=None):
+    """
+    Get a page of the solves of a challenge ordered by solve id.
+
+    The first page and the total number of solves are cached until the challenge is solved again.
+    Following pages are loaded by keyset from the cursor of the previous page.
+
+    :param after: The cursor of the previous page
+    :return: SolvesPage
+    """
+    # Solves from before the freeze are served from the freeze snapshot once the scoreboard is frozen
+    first = None
+    if freeze:
+        first = get_frozen(
+            f"solves/{challenge_id}",
+            _get_first_solves_page.uncached,
+            challenge_id,
+            freeze=True,
+        )
+    if first is None:
+        first = _get_first_solves_page(challenge_id, freeze=freeze)
+    if after is None:
+        return first
+
+    solves, cursor = _get_solves_page(challenge_id, freeze=freeze, after=after)
+    return SolvesPage(solves=solves, next=cursor, total=first.total)
+
+
+def iter_solves_for_challenge_id(challenge_id, freeze=False):
+    """
+    Iterate over every solve of a challenge one page at a time
+    """
+    after = None
+    while True:
+        solves, after = _get_solves_page(challenge_id, freeze=freeze, after=after)
+        yield from solves
+        if after is None:
+            return
+
+
+def get_solves_for_challenge_id(challenge_id, freeze=False):
+    """
+    Get every solve of a challenge. Players only get pages of them from get_solves_page_for_challenge_id().
+    """
+    return list(iter_solves_for_challenge_id(challenge_id, freeze=freeze))
 
 
-@cache.memoize(timeout=60)
+def _account_submissions_tags(user_id, challenge_id):
+    from CTFd.utils.user import get_user_attrs
+
+    account_id = user_id
+    if get_config("user_mode") == "teams":
+        user = get_user_attrs(user_id=user_id)
+        account_id = user.team_id if user else None
+    return ("submissions", f"submissions/account/{account_id}")
+
+
+@memoize_tags(_account_submissions_tags, timeout=60)
 def get_submissions_for_user_id_for_challenge_id(user_id, challenge_id):
     user = Users.query.filter_by(id=user_id).first()
     submissions = (
@@ -100,11 +389,13 @@ def get_submissions_for_user_id_for_challenge_id(user_id, challenge_id):
         )
         .order_by(Submissions.date.desc())
     )
-    response = SubmissionSchema(view="self", many=True).dump(submissions)
+    response = compile_schema(SubmissionSchema, view="self").dump(
+        submissions, many=True
+    )
     return response
 
 
-@cache.memoize(timeout=60)
+@memoize_tags("solves", timeout=60)
 def get_solve_ids_for_user_id(user_id):
     user = Users.query.filter_by(id=user_id).first()
     solve_ids = (
@@ -116,8 +407,22 @@ def get_solve_ids_for_user_id(user_id):
     return solve_ids
 
 
-@cache.memoize(timeout=60)
 def get_solve_counts_for_challenges(challenge_id=None, admin=False):
+    if admin is False:
+        solve_counts = get_frozen(
+            "solve_counts", _get_solve_counts_for_challenges.uncached
+        )
+        if solve_counts is not None:
+            if challenge_id is None:
+                return dict(solve_counts)
+            if challenge_id in solve_counts:
+                return {challenge_id: solve_counts[challenge_id]}
+            return {}
+    return _get_solve_counts_for_challenges(challenge_id=challenge_id, admin=admin)
+
+
+@memoize_tags("solves", "solve_counts", timeout=60)
+def _get_solve_counts_for_challenges(challenge_id=None, admin=False):
     if challenge_id is None:
         challenge_id_filter = ()
     else:
@@ -148,7 +453,7 @@ def get_solve_counts_for_challenges(challenge_id=None, admin=False):
     return solve_counts
 
 
-@cache.memoize(timeout=60)
+@memoize_tags("ratings", timeout=60)
 def get_rating_average_for_challenge_id(challenge_id):
     ratings = Ratings.query.filter_by(challenge_id=challenge_id).all()
 
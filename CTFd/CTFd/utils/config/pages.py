@@ -1,6 +1,8 @@
+from functools import lru_cache
+
 from flask import current_app
 
-from CTFd.cache import cache
+from CTFd.cache import cache, get_tag_versions
 from CTFd.models import Pages, db
 from CTFd.utils import get_config, markdown
 from CTFd.utils.dates import isoformat, unix_time_to_utc
@@ -34,29 +36,35 @@ def format_variables(content):
     return content
 
 
-def build_html(html, sanitize=False):
-    html = format_variables(html)
-    if (
+def _should_sanitize(sanitize):
+    return (
         current_app.config["HTML_SANITIZATION"] is True
         or bool(get_config("html_sanitization")) is True
         or sanitize is True
-    ):
-        html = sanitize_html(html)
-    return html
+    )
 
 
-def build_markdown(md, sanitize=False):
-    html = markdown(md)
+@lru_cache(maxsize=1024)
+def _render(version, content, is_markdown, sanitize):
+    # Rendered content only depends on the content and the configs so every config change (which
+    # changes the version) starts from a clean slate
+    html = markdown(content) if is_markdown else content
     html = format_variables(html)
-    if (
-        current_app.config["HTML_SANITIZATION"] is True
-        or bool(get_config("html_sanitization")) is True
-        or sanitize is True
-    ):
+    if _should_sanitize(sanitize):
         html = sanitize_html(html)
     return html
 
 
+def build_html(html, sanitize=False):
+    (version,) = get_tag_versions(["config"])
+    return _render(version, html, False, sanitize)
+
+
+def build_markdown(md, sanitize=False):
+    (version,) = get_tag_versions(["config"])
+    return _render(version, md, True, sanitize)
+
+
 @cache.memoize()
 def get_pages():
     db_pages = Pages.query.filter(
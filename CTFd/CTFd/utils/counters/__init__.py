@@ -0,0 +1,413 @@
+import math
+import time
+from collections import defaultdict
+from threading import Lock
+from uuid import uuid4
+
+from CTFd.cache import cache
+
+
+class SlidingWindowCounter(object):
+    """
+    Count events per key over the last `window` seconds.
+
+    Events are added to buckets of window / precision seconds and the oldest bucket is weighted by how
+    much of it is still inside the window. This in-process counter is only correct when a single process
+    serves the CTF.
+    """
+
+    def __init__(self, window=60, precision=6):
+        self.window = window
+        self.precision = precision
+        self.bucket_size = window / precision
+        self.buckets = defaultdict(dict)
+        self.loaded = {}
+        self.lock = Lock()
+        self.next_sweep = time.time() + window
+
+    def hit(self, key, amount=1):
+        now = time.time()
+        bucket = int(now // self.bucket_size)
+        with self.lock:
+            buckets = self.buckets[key]
+            buckets[bucket] = buckets.get(bucket, 0) + amount
+            for old in [b for b in buckets if b < bucket - self.precision]:
+                del buckets[old]
+            if now >= self.next_sweep:
+                self._sweep(now, bucket)
+
+    def count(self, key, load=None):
+        """
+        Get the number of events for a key in the window.
+
+        :param load: Called to get the unix timestamps of the events in the window from the source of truth
+        when the key wasn't loaded in the current window (e.g. after a restart). Each bucket keeps the larger
+        of its own count and the loaded one so events counted while loading aren't lost.
+        """
+        now = time.time()
+        if load is not None and self.loaded.get(key, 0) <= now:
+            seeded = self._seed(load(), now)
+            with self.lock:
+                self.loaded[key] = now + self.window
+                buckets = self.buckets[key]
+                for bucket, amount in seeded.items():
+                    buckets[bucket] = max(buckets.get(bucket, 0), amount)
+
+        with self.lock:
+            buckets = dict(self.buckets.get(key, {}))
+        return self._total(buckets.get, now)
+
+    def _seed(self, timestamps, now):
+        # Count the loaded events in the buckets of their own timestamps
+        bucket = int(now // self.bucket_size)
+        seeded = defaultdict(int)
+        for timestamp in timestamps:
+            b = int(timestamp // self.bucket_size)
+            if bucket - self.precision <= b <= bucket:
+                seeded[b] += 1
+        return seeded
+
+    def _total(self, get, now):
+        bucket = int(now // self.bucket_size)
+        total = sum(get(b) or 0 for b in range(bucket - self.precision + 1, bucket + 1))
+        # Only part of the oldest bucket is still in the window
+        elapsed = (now % self.bucket_size) / self.bucket_size
+        total += (get(bucket - self.precision) or 0) * (1 - elapsed)
+        return int(math.floor(total))
+
+    def _sweep(self, now, bucket):
+        for key in [
+            k
+            for k, b in self.buckets.items()
+            if max(b, default=0) < bucket - self.precision
+        ]:
+            del self.buckets[key]
+        for key in [k for k, expiry in self.loaded.items() if expiry <= now]:
+            del self.loaded[key]
+        self.next_sweep = now + self.window
+
+
+class DatabaseSlidingWindowCounter(SlidingWindowCounter):
+    """
+    SlidingWindowCounter that doesn't count anything and loads every key from the source of truth.
+
+    Used when the cache isn't shared by every worker so that limits aren't enforced per worker. Events
+    that aren't recorded in the source of truth aren't counted.
+    """
+
+    def hit(self, key, amount=1):
+        pass
+
+    def count(self, key, load=None):
+        if load is None:
+            return 0
+        now = time.time()
+        return self._total(self._seed(load(), now).get, now)
+
+
+# Merge the loaded buckets into the counted ones without losing hits made while loading
+SEED_BUCKETS_SCRIPT = """
+local timeout = tonumber(ARGV[1])
+for i = 1, #KEYS do
+    local amount = tonumber(ARGV[i + 1])
+    if amount > tonumber(redis.call("get", KEYS[i]) or 0) then
+        redis.call("set", KEYS[i], amount, "EX", timeout)
+    end
+end
+return 1
+"""
+
+
+class RedisSlidingWindowCounter(SlidingWindowCounter):
+    """
+    SlidingWindowCounter shared by every worker. Buckets are Redis keys updated with INCRBY and EXPIRE.
+    """
+
+    def __init__(self, window=60, precision=6):
+        super(RedisSlidingWindowCounter, self).__init__(window, precision)
+        self.client = cache.cache._write_client
+        self.prefix = cache.cache.key_prefix + "counters/"
+        self.seed_buckets = self.client.register_script(SEED_BUCKETS_SCRIPT)
+
+    def _bucket_key(self, key, bucket):
+        return f"{self.prefix}{key}/{bucket}"
+
+    def hit(self, key, amount=1):
+        bucket = int(time.time() // self.bucket_size)
+        name = self._bucket_key(key, bucket)
+        pipe = self.client.pipeline()
+        pipe.incrby(name, amount)
+        pipe.expire(name, math.ceil(self.window + self.bucket_size))
+        pipe.execute()
+
+    def count(self, key, load=None):
+        now = time.time()
+        bucket = int(now // self.bucket_size)
+        buckets = list(range(bucket - self.precision, bucket + 1))
+
+        if load is not None:
+            loaded = self.client.set(
+                f"{self.prefix}{key}/loaded", 1, nx=True, ex=self.window
+            )
+            if loaded:
+                seeded = self._seed(load(), now)
+                if seeded:
+                    self.seed_buckets(
+                        keys=[self._bucket_key(key, b) for b in seeded],
+                        args=[math.ceil(self.window + self.bucket_size)]
+                        + list(seeded.values()),
+                    )
+
+        values = self.client.mget([self._bucket_key(key, b) for b in buckets])
+        counts = {b: int(v) for b, v in zip(buckets, values) if v is not None}
+        return self._total(counts.get, now)
+
+
+class AttemptCounter(object):
+    """
+    Count attempts per key and remember when the ones of the last `keep` seconds were made.
+
+    A key is only tracked once it was loaded from the source of truth with get() so attempts added
+    before that aren't counted twice. Keys remember the `keep` they were loaded with and are loaded
+    again if it changes. This in-process counter is only correct when a single process serves the CTF.
+    """
+
+    def __init__(self, keep=86400):
+        self.keep = keep
+        self.attempts = {}
+        self.version = None
+        self.lock = Lock()
+
+    def _check_version(self, version):
+        # Attempts tracked for an older version are dropped all at once
+        if version != self.version:
+            with self.lock:
+                if version != self.version:
+                    self.attempts = {}
+                    self.version = version
+
+    def add(self, key, timestamp, version=None):
+        """
+        Add an attempt made at `timestamp` to a key if it's tracked
+        """
+        self._check_version(version)
+        with self.lock:
+            attempts = self.attempts.get(key)
+            if attempts is None:
+                return
+            count, dates, keep = attempts
+            dates = [d for d in dates if d > timestamp - keep]
+            dates.append(timestamp)
+            self.attempts[key] = (count + 1, dates, keep)
+
+    def get(self, key, load, version=None, keep=None):
+        """
+        Get the number of attempts and the timestamps of the recent ones for a key.
+
+        :param load: Called to get (count, timestamps) from the source of truth when the key isn't tracked yet
+        :param keep: How many seconds of timestamps to remember. Defaults to the counter's keep.
+        """
+        keep = keep or self.keep
+        self._check_version(version)
+        attempts = self.attempts.get(key)
+        if attempts is None or attempts[2] != keep:
+            count, dates = load()
+            with self.lock:
+                attempts = self.attempts.get(key)
+                if attempts is None or attempts[2] != keep:
+                    attempts = self.attempts[key] = (count, sorted(dates), keep)
+        count, dates, _keep = attempts
+        return count, dates
+
+
+class DatabaseAttemptCounter(AttemptCounter):
+    """
+    AttemptCounter that doesn't track anything and loads every key from the source of truth.
+
+    Used when the cache isn't shared by every worker (simple and filesystem cache types) so that
+    attempt limits aren't enforced per worker.
+    """
+
+    def add(self, key, timestamp, version=None):
+        pass
+
+    def get(self, key, load, version=None, keep=None):
+        count, dates = load()
+        return count, sorted(dates)
+
+
+# Only count an attempt if the key is tracked so that it isn't counted again when the key is loaded
+ADD_ATTEMPT_SCRIPT = """
+local keep = tonumber(redis.call("hget", KEYS[1], "keep"))
+if not keep then
+    return 0
+end
+local timestamp = tonumber(ARGV[1])
+redis.call("hincrby", KEYS[1], "count", 1)
+redis.call("expire", KEYS[1], keep)
+redis.call("zadd", KEYS[2], timestamp, ARGV[2])
+redis.call("zremrangebyscore", KEYS[2], "-inf", timestamp - keep)
+redis.call("expire", KEYS[2], keep)
+return 1
+"""
+
+# Seed a key loaded from the source of truth unless another worker tracked it with the same keep
+SEED_ATTEMPTS_SCRIPT = """
+local keep = tonumber(ARGV[2])
+if tonumber(redis.call("hget", KEYS[1], "keep")) == keep then
+    return 0
+end
+redis.call("del", KEYS[2])
+for i = 3, #ARGV, 2 do
+    redis.call("zadd", KEYS[2], ARGV[i + 1], ARGV[i])
+end
+redis.call("expire", KEYS[2], keep)
+redis.call("hset", KEYS[1], "count", ARGV[1], "keep", keep)
+redis.call("expire", KEYS[1], keep)
+return 1
+"""
+
+
+class RedisAttemptCounter(AttemptCounter):
+    """
+    AttemptCounter shared by every worker. Counts are Redis hashes and timestamps are sorted sets,
+    both updated by Lua scripts so that concurrent loads and attempts can't interleave.
+    Keys expire after `keep` seconds without attempts and are loaded again when they are needed.
+    """
+
+    def __init__(self, keep=86400):
+        super(RedisAttemptCounter, self).__init__(keep=keep)
+        self.client = cache.cache._write_client
+        self.prefix = cache.cache.key_prefix + "attempts/"
+        self.add_attempt = self.client.register_script(ADD_ATTEMPT_SCRIPT)
+        self.seed_attempts = self.client.register_script(SEED_ATTEMPTS_SCRIPT)
+
+    def _keys(self, key, version):
+        base = f"{self.prefix}{version}/{key}"
+        return base, base + "/dates"
+
+    def add(self, key, timestamp, version=None):
+        self.add_attempt(keys=self._keys(key, version), args=[timestamp, uuid4().hex])
+
+    def get(self, key, load, version=None, keep=None):
+        keep = int(keep or self.keep)
+        count_key, dates_key = self._keys(key, version)
+        tracked = self.client.hget(count_key, "keep")
+        if tracked is None or int(tracked) != keep:
+            count, dates = load()
+            args = [count, keep]
+            for date in dates:
+                args += [uuid4().hex, date]
+            self.seed_attempts(keys=[count_key, dates_key], args=args)
+
+        pipe = self.client.pipeline()
+        pipe.hget(count_key, "count")
+        pipe.zrange(dates_key, 0, -1, withscores=True)
+        count, dates = pipe.execute()
+        return int(count or 0), [date for _, date in dates]
+
+
+class CaptureTracker(object):
+    """
+    Remember a set of captured members per key, such as the flags an account captured on a challenge.
+
+    Like AttemptCounter a key is only tracked once it was loaded from the source of truth with get().
+    This in-process tracker is only correct when a single process serves the CTF.
+    """
+
+    def __init__(self):
+        self.captures = {}
+        self.version = None
+        self.lock = Lock()
+
+    def _check_version(self, version):
+        if version != self.version:
+            with self.lock:
+                if version != self.version:
+                    self.captures = {}
+                    self.version = version
+
+    def add(self, key, members, version=None):
+        """
+        Add members to a key if it's tracked
+        """
+        self._check_version(version)
+        with self.lock:
+            captured = self.captures.get(key)
+            if captured is not None:
+                self.captures[key] = captured | frozenset(members)
+
+    def get(self, key, load, version=None):
+        """
+        Get the captured members of a key.
+
+        :param load: Called to get the members from the source of truth when the key isn't tracked yet
+        """
+        self._check_version(version)
+        captured = self.captures.get(key)
+        if captured is None:
+            members = frozenset(load())
+            with self.lock:
+                captured = self.captures.setdefault(key, members)
+        return captured
+
+
+class DatabaseCaptureTracker(CaptureTracker):
+    """
+    CaptureTracker that doesn't track anything and loads every key from the source of truth.
+    Used when the cache isn't shared by every worker.
+    """
+
+    def add(self, key, members, version=None):
+        pass
+
+    def get(self, key, load, version=None):
+        return frozenset(load())
+
+
+# Only add members to a tracked key so that a key that expired isn't recreated without its marker
+ADD_CAPTURES_SCRIPT = """
+if redis.call("exists", KEYS[1]) == 0 then
+    return 0
+end
+redis.call("sadd", KEYS[1], unpack(ARGV, 2))
+redis.call("expire", KEYS[1], tonumber(ARGV[1]))
+return 1
+"""
+
+
+class RedisCaptureTracker(CaptureTracker):
+    """
+    CaptureTracker shared by every worker. Members are stored in Redis sets next to an empty marker
+    member so that keys loaded without any captures are still tracked.
+    """
+
+    def __init__(self, keep=86400):
+        super(RedisCaptureTracker, self).__init__()
+        self.keep = keep
+        self.client = cache.cache._write_client
+        self.prefix = cache.cache.key_prefix + "captures/"
+        self.add_captures = self.client.register_script(ADD_CAPTURES_SCRIPT)
+
+    def _key(self, key, version):
+        return f"{self.prefix}{version}/{key}"
+
+    def add(self, key, members, version=None):
+        if not members:
+            return
+        self.add_captures(
+            keys=[self._key(key, version)],
+            args=[self.keep] + [str(member) for member in members],
+        )
+
+    def get(self, key, load, version=None):
+        name = self._key(key, version)
+        members = self.client.smembers(name)
+        if not members:
+            loaded = [str(member) for member in load()]
+            pipe = self.client.pipeline()
+            pipe.sadd(name, "", *loaded)
+            pipe.expire(name, self.keep)
+            pipe.execute()
+            members = loaded
+        return frozenset(int(member) for member in members if member not in ("", b""))
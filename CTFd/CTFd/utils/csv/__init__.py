@@ -18,7 +18,7 @@ from CTFd.schemas.challenges import ChallengeSchema
 from CTFd.schemas.teams import TeamSchema
 from CTFd.schemas.users import UserSchema
 from CTFd.utils.config import is_teams_mode, is_users_mode
-from CTFd.utils.scores import get_standings
+from CTFd.utils.scores import get_standings, get_team_scores
 
 
 def get_dumpable_tables():
@@ -76,8 +76,11 @@ def dump_scoreboard_csv():
         )
         writer.writerow(header)
 
+        team_scores = get_team_scores(standing.account_id for standing in standings)
+
         for i, standing in enumerate(standings):
             team = Teams.query.filter_by(id=standing.account_id).first()
+            member_scores = team_scores[team.id].members
 
             # Build field entries using the order of the field values
             team_field_entries = {f.field_id: f.value for f in team.field_entries}
@@ -121,7 +124,7 @@ def dump_scoreboard_csv():
                         member.name,
                         member.id,
                         member.email,
-                        member.score,
+                        member_scores.get(member.id, 0),
                         "",
                         "",
                         member.bracket_id,
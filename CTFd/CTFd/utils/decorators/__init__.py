@@ -1,9 +1,13 @@
 import functools
+import time
+from hashlib import md5
 
-from flask import abort, jsonify, redirect, request, url_for
+from flask import Response, abort, jsonify, redirect, request, session, url_for
 from flask_babel import gettext
+from flask_restx.utils import unpack
+from werkzeug.http import http_date
 
-from CTFd.cache import cache
+from CTFd.cache import cache, get_tag_versions, resolve_tags
 from CTFd.utils import config, get_config
 from CTFd.utils import user as current_user
 from CTFd.utils.config import is_teams_mode
@@ -232,3 +236,59 @@ def require_complete_profile(f):
             return f(*args, **kwargs)
 
     return _require_complete_profile
+
+
+def conditional_get(*tags):
+    """
+    Decorator answering GET requests with an ETag derived from the versions of the tags the response depends
+    on (see CTFd.cache.memoize_tags), the current user and the URL. Requests whose If-None-Match matches get
+    a 304 without running the endpoint.
+
+    The Last-Modified date of a response is when its ETag was first seen so clients only sending
+    If-Modified-Since are answered the same way.
+
+    Configuration is always a dependency. Tags can be callables receiving the arguments of the endpoint.
+    """
+
+    def conditional_get_decorator(f):
+        @functools.wraps(f)
+        def conditional_get_function(*args, **kwargs):
+            if request.method != "GET":
+                return f(*args, **kwargs)
+
+            call_tags = resolve_tags(("config",) + tags, *args, **kwargs)
+            versions = ",".join(get_tag_versions(call_tags))
+            key = "{}|{}|{}".format(versions, session.get("id"), request.full_path)
+            etag = md5(key.encode()).hexdigest()  # nosec B303 B324
+
+            modified_key = "conditional_get/" + etag
+            last_modified = cache.get(modified_key)
+            if last_modified is None:
+                last_modified = int(time.time())
+                cache.set(modified_key, last_modified, timeout=86400)
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains(etag)
+            else:
+                since = request.if_modified_since
+                not_modified = since is not None and last_modified <= since.timestamp()
+
+            if not_modified:
+                response = Response(status=304)
+                response.set_etag(etag)
+                return response
+
+            result = f(*args, **kwargs)
+            if isinstance(result, Response):
+                return result
+            data, code, headers = unpack(result)
+            if code != 200:
+                return result
+            headers = dict(headers or {})
+            headers["ETag"] = '"{}"'.format(etag)
+            headers["Last-Modified"] = http_date(last_modified)
+            return data, code, headers
+
+        return conditional_get_function
+
+    return conditional_get_decorator
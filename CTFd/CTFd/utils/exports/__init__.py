@@ -34,6 +34,7 @@ from CTFd.utils.migrations import (
     get_current_revision,
     stamp_latest_revision,
 )
+from CTFd.utils.scores.materialized import recompute_account_scores
 from CTFd.utils.uploads import get_uploader
 
 
@@ -468,6 +469,10 @@ def import_ctf(backup, erase=True):
     set_import_status("clearing caches")
     cache.clear()
 
+    # Imported solves and awards are inserted without the ORM so materialize their scores
+    set_import_status("recomputing scores")
+    recompute_account_scores()
+
     # Set default theme in case the current instance or the import does not provide it
     set_config("ctf_theme", DEFAULT_THEME)
     set_config("ctf_version", CTFD_VERSION)
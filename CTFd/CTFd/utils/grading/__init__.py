@@ -0,0 +1,291 @@
+import datetime
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from threading import Lock
+from uuid import uuid4
+
+from flask import current_app, request, session
+from gevent import sleep, spawn
+from gevent.event import Event
+from werkzeug.test import EnvironBuilder
+
+from CTFd.cache import cache, clear_solves, clear_standings, clear_submissions
+from CTFd.models import Challenges, Solves, Users, db
+from CTFd.plugins.challenges import get_chal_class
+from CTFd.utils import get_config
+from CTFd.utils.dates import unix_time
+from CTFd.utils.logging import log
+from CTFd.utils.submissions import remember_verdict
+from CTFd.utils.user import get_attempts
+
+# Results of asynchronously graded attempts are stored per ticket
+GRADING_KEY = "grading/%s"
+
+# Number of seconds a result can be polled for
+RESULT_TIMEOUT = 3600
+
+# Queues that are alive keep their heartbeat in the cache
+GRADER_KEY = "grading/grader/%s"
+
+# Number of seconds without a heartbeat after which a queue is considered gone
+HEARTBEAT_TIMEOUT = 60
+
+
+@contextmanager
+def attempt_context(user, challenge_id, submission, ip):
+    """
+    Push a request context in which the attempt is the current request made by the user.
+
+    Challenge plugins read the submission from the request they're given and the current user from the
+    session so attempts made outside of the user's own request (in bulk or in the background) are judged
+    the same way.
+    """
+    builder = EnvironBuilder(
+        method="POST",
+        path="/api/v1/challenges/attempt",
+        json={"challenge_id": challenge_id, "submission": submission},
+        environ_base={"REMOTE_ADDR": ip},
+    )
+    with current_app.request_context(builder.get_environ()):
+        session["id"] = user.id
+        yield request._get_current_object()
+
+
+def judge_attempt(chal_class, challenge, attempt_request):
+    """
+    Get the status and message of an attempt from a challenge plugin
+    """
+    response = chal_class.attempt(challenge, attempt_request)
+    # TODO: CTFd 4.0 We should remove the tuple strategy for Challenge plugins in favor of ChallengeResponse
+    if isinstance(response, tuple):
+        status = "correct" if response[0] else "incorrect"
+        message = response[1]
+    else:
+        status = response.status
+        message = response.message
+    if status not in ("correct", "partial"):
+        status = "incorrect"
+    return status, message
+
+
+def get_grading_result(ticket):
+    """
+    Get the result of an attempt queued with GradingQueue.submit().
+
+    Attempts that are still pending on a queue which stopped beating (e.g. its worker was restarted) will never
+    be graded and are marked as failed instead of staying pending until they expire.
+    """
+    result = cache.get(GRADING_KEY % ticket)
+    if result is None or result["status"] != "pending":
+        return result
+    if cache.get(GRADER_KEY % result.get("grader")) is None:
+        result.update(status="error", message="Submission could not be graded")
+        result.pop("grader", None)
+        cache.set(GRADING_KEY % ticket, result, timeout=RESULT_TIMEOUT)
+    return result
+
+
+def grade_attempt(job):
+    """
+    Judge and record an attempt queued with GradingQueue.submit()
+    """
+    user = Users.query.filter_by(id=job["user_id"]).first()
+    challenge = Challenges.query.filter_by(id=job["challenge_id"]).first()
+    if user is None or challenge is None:
+        return {"status": "not_found", "message": "User or challenge not found"}
+
+    team = user.team
+    chal_class = get_chal_class(challenge.type)
+    with attempt_context(
+        user, challenge.id, job["submission"], job["ip"]
+    ) as attempt_request:
+        status, message = judge_attempt(chal_class, challenge, attempt_request)
+
+        solve = Solves.query.filter_by(
+            account_id=user.account_id, challenge_id=challenge.id
+        ).first()
+        if solve:
+            return {
+                "status": "already_solved",
+                "message": f"{message} but you already solved this",
+            }
+
+        # Attempts that were queued together were all checked against max_attempts before any of them was graded
+        if challenge.max_attempts:
+            fails, dates = get_attempts(user.account_id, challenge.id)
+            if get_config("max_attempts_behavior", "lockout") == "timeout":
+                timeout = int(get_config("max_attempts_timeout", 300))
+                now = unix_time(datetime.datetime.utcnow())
+                fails = len([d for d in dates if d >= now - timeout])
+            if fails >= challenge.max_attempts:
+                return {
+                    "status": "ratelimited",
+                    "message": "Not accepted. You have 0 tries remaining",
+                }
+
+        if job["record"]:
+            if status == "correct":
+                chal_class.solve(
+                    user=user, team=team, challenge=challenge, request=attempt_request
+                )
+                clear_standings(resync=False)
+                clear_solves()
+            elif status == "partial":
+                chal_class.partial(
+                    user=user, team=team, challenge=challenge, request=attempt_request
+                )
+            else:
+                chal_class.fail(
+                    user=user, team=team, challenge=challenge, request=attempt_request
+                )
+            clear_submissions(user.account_id)
+        if status == "incorrect":
+            remember_verdict(user.account_id, challenge.id, job["submission"], message)
+
+        log(
+            "submissions",
+            "[{date}] {name} submitted {submission} on {challenge_id} [GRADED {status}]",
+            name=user.name,
+            submission=job["submission"].encode("utf-8"),
+            challenge_id=challenge.id,
+            status=status.upper(),
+        )
+    return {"status": status, "message": message}
+
+
+class GradingQueue(object):
+    """
+    Grade attempts for challenge types with async_grading in a pool of `concurrency` greenlets.
+
+    Accounts are served in turn and grade one attempt at a time so a single account can't hold every
+    greenlet. Each account can have `backlog` attempts waiting to be graded. Results are stored in the
+    cache to be polled and published to the user over the event stream.
+    """
+
+    def __init__(self, app, concurrency=4, backlog=5):
+        self.app = app
+        self.id = uuid4().hex
+        self.concurrency = concurrency
+        self.backlog = backlog
+        self.pending = OrderedDict()
+        self.running = set()
+        self.lock = Lock()
+        self.ready = Event()
+        self.workers = []
+
+    def beat(self):
+        """
+        Mark this queue as alive so that its pending attempts aren't considered lost
+        """
+        cache.set(GRADER_KEY % self.id, True, timeout=HEARTBEAT_TIMEOUT)
+
+    def start(self):
+        def _work_forever():
+            while True:
+                self.ready.wait()
+                self.ready.clear()
+                self.work()
+
+        def _beat_forever():
+            while True:
+                with self.app.app_context():
+                    self.beat()
+                sleep(HEARTBEAT_TIMEOUT / 3)
+
+        if not self.workers:
+            self.workers = [spawn(_work_forever) for _ in range(self.concurrency)]
+            self.workers.append(spawn(_beat_forever))
+
+    def submit(self, account_id, user_id, challenge_id, submission, ip, record=True):
+        """
+        Queue an attempt to be graded.
+
+        :param record: Save the submission once it's graded
+        :return: The ticket of the attempt or None if the account has too many attempts waiting
+        """
+        with self.lock:
+            if len(self.pending.get(account_id, ())) >= self.backlog:
+                return None
+
+        ticket = uuid4().hex
+        job = {
+            "ticket": ticket,
+            "user_id": user_id,
+            "challenge_id": challenge_id,
+            "submission": submission,
+            "ip": ip,
+            "record": record,
+        }
+        cache.set(
+            GRADING_KEY % ticket,
+            {
+                "ticket": ticket,
+                "user_id": user_id,
+                "challenge_id": challenge_id,
+                "status": "pending",
+                "message": "Submission is being graded",
+                "grader": self.id,
+            },
+            timeout=RESULT_TIMEOUT,
+        )
+        self.beat()
+        with self.lock:
+            self.pending.setdefault(account_id, deque()).append(job)
+
+        self.start()
+        self.ready.set()
+        return ticket
+
+    def _next(self):
+        with self.lock:
+            # The first account in turn that isn't already being graded
+            account_id = next((a for a in self.pending if a not in self.running), None)
+            if account_id is None:
+                return None, None
+
+            jobs = self.pending[account_id]
+            job = jobs.popleft()
+            if jobs:
+                # Other accounts go first
+                self.pending.move_to_end(account_id)
+            else:
+                del self.pending[account_id]
+            self.running.add(account_id)
+            return account_id, job
+
+    def work(self):
+        """
+        Grade attempts until none can be started.
+
+        :return: The number of graded attempts
+        """
+        graded = 0
+        while True:
+            account_id, job = self._next()
+            if job is None:
+                return graded
+            try:
+                self.grade(job)
+            finally:
+                with self.lock:
+                    self.running.discard(account_id)
+            graded += 1
+
+    def grade(self, job):
+        with self.app.app_context():
+            try:
+                result = grade_attempt(job)
+            except Exception:
+                db.session.rollback()
+                self.app.logger.exception("Failed to grade submission")
+                result = {
+                    "status": "error",
+                    "message": "Submission could not be graded",
+                }
+            result.update(
+                ticket=job["ticket"],
+                user_id=job["user_id"],
+                challenge_id=job["challenge_id"],
+            )
+            cache.set(GRADING_KEY % job["ticket"], result, timeout=RESULT_TIMEOUT)
+            self.app.events_manager.publish(data=result, type="grading")
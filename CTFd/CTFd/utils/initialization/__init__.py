@@ -21,9 +21,19 @@ from CTFd.utils.config import (
     is_setup,
 )
 from CTFd.utils.config.pages import get_pages
+from CTFd.utils.counters import (
+    DatabaseAttemptCounter,
+    DatabaseCaptureTracker,
+    DatabaseSlidingWindowCounter,
+    RedisAttemptCounter,
+    RedisCaptureTracker,
+    RedisSlidingWindowCounter,
+)
 from CTFd.utils.dates import isoformat, unix_time, unix_time_millis, unix_time_to_utc
 from CTFd.utils.events import EventManager, RedisEventManager
+from CTFd.utils.grading import GradingQueue
 from CTFd.utils.humanize.words import pluralize
+from CTFd.utils.logging import start_log_writer
 from CTFd.utils.modes import generate_account_url, get_mode_as_word
 from CTFd.utils.plugins import (
     get_configurable_plugins,
@@ -39,6 +49,7 @@ from CTFd.utils.security.email import (
     generate_password_reset_token,
     verify_reset_password_token,
 )
+from CTFd.utils.submissions import RedisSubmissionSink, SubmissionSink
 from CTFd.utils.user import (
     authed,
     get_current_team_attrs,
@@ -158,6 +169,7 @@ def init_logs(app):
         "registrations": os.path.join(log_dir, "registrations.log"),
     }
 
+    handlers = {"submissions": [], "logins": [], "registrations": []}
     try:
         for log in logs.values():
             if not os.path.exists(log):
@@ -173,22 +185,30 @@ def init_logs(app):
             logs["registrations"], maxBytes=10485760, backupCount=5
         )
 
-        logger_submissions.addHandler(submission_log)
-        logger_logins.addHandler(login_log)
-        logger_registrations.addHandler(registration_log)
+        handlers["submissions"].append(submission_log)
+        handlers["logins"].append(login_log)
+        handlers["registrations"].append(registration_log)
     except IOError:
         pass
 
     stdout = logging.StreamHandler(stream=sys.stdout)
 
-    logger_submissions.addHandler(stdout)
-    logger_logins.addHandler(stdout)
-    logger_registrations.addHandler(stdout)
+    handlers["submissions"].append(stdout)
+    handlers["logins"].append(stdout)
+    handlers["registrations"].append(stdout)
 
     logger_submissions.propagate = 0
     logger_logins.propagate = 0
     logger_registrations.propagate = 0
 
+    # Loggers only enqueue records and a background writer passes them to the handlers
+    # so that requests don't wait on disk writes or log rotation
+    start_log_writer(
+        handlers,
+        json_lines=app.config.get("LOG_JSON"),
+        maxsize=app.config.get("LOG_QUEUE_SIZE"),
+    )
+
 
 def init_events(app):
     if app.config.get("CACHE_TYPE") == "redis":
@@ -200,6 +220,42 @@ def init_events(app):
     app.events_manager.listen()
 
 
+def init_counters(app):
+    # Wrong submissions are counted in the cache so that rate limiting and max_attempts don't need to scan Fails
+    # and captured partial flags are tracked so that "all" and "team" logic don't need to scan Partials.
+    # Other cache types aren't shared by every worker (or can't update a key atomically) so the limits
+    # are checked against the database instead of being enforced per worker.
+    if app.config.get("CACHE_TYPE") == "redis":
+        app.submission_counter = RedisSlidingWindowCounter()
+        app.attempt_counter = RedisAttemptCounter()
+        app.capture_tracker = RedisCaptureTracker()
+    else:
+        app.submission_counter = DatabaseSlidingWindowCounter()
+        app.attempt_counter = DatabaseAttemptCounter()
+        app.capture_tracker = DatabaseCaptureTracker()
+
+
+def init_submissions(app):
+    app.submission_sink = None
+    if app.config.get("SUBMISSION_WRITE_BEHIND"):
+        interval = app.config.get("SUBMISSION_FLUSH_INTERVAL") / 1000
+        size = app.config.get("SUBMISSION_FLUSH_SIZE")
+        if app.config.get("CACHE_TYPE") == "redis":
+            app.submission_sink = RedisSubmissionSink(app, interval=interval, size=size)
+        else:
+            app.submission_sink = SubmissionSink(app, interval=interval, size=size)
+        app.submission_sink.listen()
+
+
+def init_grading(app):
+    # Workers are only started once a challenge type with async_grading gets an attempt
+    app.grading_queue = GradingQueue(
+        app,
+        concurrency=app.config.get("GRADING_CONCURRENCY"),
+        backlog=app.config.get("GRADING_BACKLOG"),
+    )
+
+
 def init_request_processors(app):
     @app.url_defaults
     def inject_theme(endpoint, values):
@@ -1,11 +1,118 @@
+import atexit
+import json
 import logging
 import logging.handlers
 import time
 
 from flask import session
+from gevent.monkey import get_original
 
 from CTFd.utils.user import get_ip
 
+# Handler every CTFd logger enqueues records to and the listener writing them. See start_log_writer()
+_queue_handler = None
+_queue_listener = None
+
+
+class LogQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueue records without blocking for a QueueListener to write them.
+    Records are dropped and counted once the queue is full.
+
+    The queue is the interpreter's own SimpleQueue even when gevent monkey patched the queue module
+    so that it can be shared with the writer's native thread.
+    """
+
+    def __init__(self, maxsize=10000):
+        super(LogQueueHandler, self).__init__(get_original("queue", "SimpleQueue")())
+        self.maxsize = maxsize
+        self.dropped = 0
+
+    def enqueue(self, record):
+        if self.queue.qsize() >= self.maxsize:
+            self.dropped += 1
+            return
+        self.queue.put_nowait(record)
+
+    def prepare(self, record):
+        # Records are formatted by the writer
+        return record
+
+
+class LogQueueListener(logging.handlers.QueueListener):
+    """
+    Write queued records to the handlers of the logger they came from.
+
+    The writer runs on a native thread even when gevent monkey patched threading so that disk
+    writes and log rotation don't block the hub.
+    """
+
+    def __init__(self, queue, loggers):
+        handlers = {h for logger_handlers in loggers.values() for h in logger_handlers}
+        super(LogQueueListener, self).__init__(queue, *handlers)
+        self.loggers = loggers
+        # Handlers are only used by the writer so they don't need gevent's locks
+        for handler in handlers:
+            handler.lock = get_original("threading", "RLock")()
+        self.failed = 0
+        self._stopped = None
+
+    def start(self):
+        self._stopped = get_original("_thread", "allocate_lock")()
+        self._stopped.acquire()
+        get_original("_thread", "start_new_thread")(self._run, ())
+
+    def _run(self):
+        try:
+            self._monitor()
+        finally:
+            self._stopped.release()
+
+    def stop(self):
+        if self._stopped is None:
+            return
+        self.enqueue_sentinel()
+        self._stopped.acquire()
+        self._stopped = None
+
+    def handle(self, record):
+        # A record or handler that fails must not stop the writer
+        try:
+            for handler in self.loggers.get(record.name, ()):
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+        except Exception:
+            self.failed += 1
+
+
+class LogFormatter(logging.Formatter):
+    """
+    Format records created by log() with their properties
+    """
+
+    def format(self, record):
+        props = getattr(record, "props", None)
+        if props is None:
+            return super(LogFormatter, self).format(record)
+        return record.msg.format(**props)
+
+
+class JSONLogFormatter(LogFormatter):
+    """
+    Format records as JSON lines with their properties as separate fields
+    """
+
+    def format(self, record):
+        data = {"logger": record.name, "message": super().format(record)}
+        data.update(getattr(record, "props", None) or {})
+        return json.dumps(data, default=self.serialize)
+
+    @staticmethod
+    def serialize(value):
+        if isinstance(value, bytes):
+            return value.decode("utf-8", errors="replace")
+        return str(value)
+
 
 def log(logger, format, **kwargs):
     logger = logging.getLogger(logger)
@@ -15,5 +122,61 @@ def log(logger, format, **kwargs):
         "ip": get_ip(),
     }
     props.update(kwargs)
-    msg = format.format(**props)
-    logger.info(msg)
+    logger.info(format, extra={"props": props})
+
+
+def get_log_stats():
+    """
+    Get the number of records waiting to be written, the number of records dropped because the queue was full
+    and the number of records that couldn't be written
+    """
+    if _queue_handler is None:
+        return {"queue_depth": 0, "dropped": 0, "failed": 0}
+    return {
+        "queue_depth": _queue_handler.queue.qsize(),
+        "dropped": _queue_handler.dropped,
+        "failed": _queue_listener.failed,
+    }
+
+
+def start_log_writer(loggers, json_lines=False, maxsize=10000):
+    """
+    Make loggers enqueue their records and start a background writer draining them to their handlers.
+    Records still queued are written when the process exits.
+
+    :param loggers: Dictionary of logger names to the handlers that should receive their records
+    :param json_lines: Write records as JSON lines instead of formatted messages
+    :param maxsize: Number of records that can be queued before new records are dropped
+    """
+    global _queue_handler, _queue_listener
+    stop_log_writer()
+
+    formatter = JSONLogFormatter() if json_lines else LogFormatter()
+    for handlers in loggers.values():
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+    _queue_handler = LogQueueHandler(maxsize=maxsize)
+    for name in loggers:
+        logging.getLogger(name).addHandler(_queue_handler)
+
+    _queue_listener = LogQueueListener(_queue_handler.queue, loggers)
+    _queue_listener.start()
+
+
+def stop_log_writer():
+    """
+    Stop the background writer once every queued record is written
+    """
+    global _queue_handler, _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        for name in _queue_listener.loggers:
+            logging.getLogger(name).removeHandler(_queue_handler)
+        for handler in _queue_listener.handlers:
+            handler.close()
+    _queue_handler = None
+    _queue_listener = None
+
+
+atexit.register(stop_log_writer)
@@ -22,6 +22,15 @@ def generate_account_url(account_id, admin=False):
             return url_for("teams.public", team_id=account_id)
 
 
+def get_account_url_prefix(admin=False):
+    """
+    Get the URL of an account without its id. Account URLs end with the account id so the URLs of
+    many accounts can be built without going through url_for() for each of them.
+    """
+    url = generate_account_url(account_id=0, admin=admin)
+    return url[: -len("0")]
+
+
 def get_model():
     if get_config("user_mode") == USERS_MODE:
         return Users
@@ -1,62 +1,17 @@
-from collections import defaultdict
-
-from CTFd.cache import cache
-from CTFd.models import Awards, Solves
+from CTFd.cache import memoize_tags
 from CTFd.utils import get_config
-from CTFd.utils.dates import isoformat, unix_time_to_utc
-from CTFd.utils.modes import generate_account_url
-from CTFd.utils.scores import get_standings
+from CTFd.utils.dates import isoformat
+from CTFd.utils.modes import TEAMS_MODE, generate_account_url
+from CTFd.utils.scores import get_score_progression, get_standings
 
 
-@cache.memoize(timeout=60)
+@memoize_tags("standings", timeout=60)
 def get_scoreboard_detail(count, bracket_id=None):
     response = {}
 
     standings = get_standings(count=count, bracket_id=bracket_id)
-
-    team_ids = [team.account_id for team in standings]
-
-    solves = Solves.query.filter(Solves.account_id.in_(team_ids))
-    awards = Awards.query.filter(Awards.account_id.in_(team_ids))
-
-    freeze = get_config("freeze")
-
-    if freeze:
-        solves = solves.filter(Solves.date < unix_time_to_utc(freeze))
-        awards = awards.filter(Awards.date < unix_time_to_utc(freeze))
-
-    solves = solves.all()
-    awards = awards.all()
-
-    # Build a mapping of accounts to their solves and awards
-    solves_mapper = defaultdict(list)
-    for solve in solves:
-        solves_mapper[solve.account_id].append(
-            {
-                "challenge_id": solve.challenge_id,
-                "account_id": solve.account_id,
-                "team_id": solve.team_id,
-                "user_id": solve.user_id,
-                "value": solve.challenge.value,
-                "date": isoformat(solve.date),
-            }
-        )
-
-    for award in awards:
-        solves_mapper[award.account_id].append(
-            {
-                "challenge_id": None,
-                "account_id": award.account_id,
-                "team_id": award.team_id,
-                "user_id": award.user_id,
-                "value": award.value,
-                "date": isoformat(award.date),
-            }
-        )
-
-    # Sort all solves by date
-    for team_id in solves_mapper:
-        solves_mapper[team_id] = sorted(solves_mapper[team_id], key=lambda k: k["date"])
+    progression = get_score_progression(x.account_id for x in standings)
+    teams_mode = get_config("user_mode") == TEAMS_MODE
 
     for i, x in enumerate(standings):
         response[i + 1] = {
@@ -66,7 +21,17 @@ def get_scoreboard_detail(count, bracket_id=None):
             "score": int(x.score),
             "bracket_id": x.bracket_id,
             "bracket_name": x.bracket_name,
-            "solves": solves_mapper.get(x.account_id, []),
+            "solves": [
+                {
+                    "challenge_id": point.challenge_id,
+                    "account_id": point.team_id if teams_mode else point.user_id,
+                    "team_id": point.team_id,
+                    "user_id": point.user_id,
+                    "value": point.value,
+                    "date": isoformat(point.date),
+                }
+                for point in progression[x.account_id]
+            ],
         }
 
     return response
@@ -1,13 +1,77 @@
+from collections import namedtuple
+from functools import lru_cache
+
 from sqlalchemy.sql.expression import union_all
 
-from CTFd.cache import cache
-from CTFd.models import Awards, Brackets, Challenges, Solves, Teams, Users, db
+from CTFd.models import Awards, Challenges, Solves, Teams, Users, db
 from CTFd.utils import get_config
 from CTFd.utils.dates import unix_time_to_utc
-from CTFd.utils.modes import get_model
+from CTFd.utils.modes import TEAMS_MODE
+from CTFd.utils.scores.engine import get_engine
+from CTFd.utils.scores.freeze import get_frozen_scores
+
+# members maps the user_id of every current member to their score
+TeamScore = namedtuple("TeamScore", ["score", "members"])
+
+STANDINGS_COLUMNS = {
+    "accounts": ("account_id", "oauth_id", "name", "bracket_id", "bracket_name"),
+    "teams": ("team_id", "oauth_id", "name", "bracket_id", "bracket_name"),
+    "users": ("user_id", "oauth_id", "name", "team_id", "bracket_id", "bracket_name"),
+}
+
+
+@lru_cache(maxsize=None)
+def _standing_type(kind, admin, fields):
+    columns = STANDINGS_COLUMNS[kind]
+    if admin:
+        columns += ("hidden", "banned")
+    columns += ("score",) + fields
+    return namedtuple("Standing", columns)
+
+
+def _build_standings(kind, dimension, count, bracket_id, admin, fields):
+    if bracket_id is not None:
+        try:
+            bracket_id = int(bracket_id)
+        except ValueError:
+            return []
+
+    standings = get_engine().standings(
+        dimension, admin=admin, bracket_id=bracket_id, count=count
+    )
+
+    # Extra columns requested by the caller are loaded in one query for the selected accounts only
+    extra = {}
+    if fields:
+        Model = Teams if dimension == "teams" else Users
+        account_ids = [info.id for info, _aggregate in standings]
+        if account_ids:
+            extra = {
+                row[0]: tuple(row[1:])
+                for row in db.session.query(Model.id, *fields).filter(
+                    Model.id.in_(account_ids)
+                )
+            }
+    names = tuple(
+        getattr(field, "key", None) or getattr(field, "name", None) or str(field)
+        for field in fields or ()
+    )
+    Standing = _standing_type(kind, admin, names)
+
+    results = []
+    for info, aggregate in standings:
+        row = [info.id, info.oauth_id, info.name]
+        if kind == "users":
+            row.append(info.team_id)
+        row += [info.bracket_id, info.bracket_name]
+        if admin:
+            row += [info.hidden, info.banned]
+        row.append(aggregate.score)
+        row += extra.get(info.id, (None,) * len(names))
+        results.append(Standing(*row))
+    return results
 
 
-@cache.memoize(timeout=60)
 def get_standings(count=None, bracket_id=None, admin=False, fields=None):
     """
     Get standings as a list of tuples containing account_id, name, and score e.g. [(account_id, team_name, score)].
@@ -16,318 +80,143 @@ def get_standings(count=None, bracket_id=None, admin=False, fields=None):
     user will have a solve ID that is before the others. That user will be considered the tie-winner.
 
     Challenges & Awards with a value of zero are filtered out of the calculations to avoid incorrect tie breaks.
-    """
-    if fields is None:
-        fields = []
-    Model = get_model()
 
-    scores = (
-        db.session.query(
-            Solves.account_id.label("account_id"),
-            db.func.sum(Challenges.value).label("score"),
-            db.func.max(Solves.id).label("id"),
-            db.func.max(Solves.date).label("date"),
-        )
-        .join(Challenges)
-        .filter(Challenges.value != 0)
-        .group_by(Solves.account_id)
+    Standings are served from the in-process standings engine (see CTFd.utils.scores.engine) which is kept up to
+    date by score events instead of re-aggregating every solve and award.
+    """
+    dimension = "teams" if get_config("user_mode") == TEAMS_MODE else "users"
+    return _build_standings(
+        "accounts", dimension, count, bracket_id, admin, tuple(fields or ())
     )
 
-    awards = (
-        db.session.query(
-            Awards.account_id.label("account_id"),
-            db.func.sum(Awards.value).label("score"),
-            db.func.max(Awards.id).label("id"),
-            db.func.max(Awards.date).label("date"),
-        )
-        .filter(Awards.value != 0)
-        .group_by(Awards.account_id)
-    )
 
-    """
-    Filter out solves and awards that are before a specific time point.
-    """
-    freeze = get_config("freeze")
-    if not admin and freeze:
-        scores = scores.filter(Solves.date < unix_time_to_utc(freeze))
-        awards = awards.filter(Awards.date < unix_time_to_utc(freeze))
+def get_team_standings(count=None, bracket_id=None, admin=False, fields=None):
+    return _build_standings(
+        "teams", "teams", count, bracket_id, admin, tuple(fields or ())
+    )
 
-    """
-    Combine awards and solves with a union. They should have the same amount of columns
-    """
-    results = union_all(scores, awards).alias("results")
 
-    """
-    Sum each of the results by the team id to get their score.
-    """
-    sumscores = (
-        db.session.query(
-            results.columns.account_id,
-            db.func.sum(results.columns.score).label("score"),
-            db.func.max(results.columns.id).label("id"),
-            db.func.max(results.columns.date).label("date"),
-        )
-        .group_by(results.columns.account_id)
-        .subquery()
+def get_user_standings(count=None, bracket_id=None, admin=False, fields=None):
+    return _build_standings(
+        "users", "users", count, bracket_id, admin, tuple(fields or ())
     )
 
-    """
-    Admins can see scores for all users but the public cannot see banned users.
-
-    Filters out banned users.
-    Properly resolves value ties by ID.
 
-    Different databases treat time precision differently so resolve by the row ID instead.
-    """
-    if admin:
-        standings_query = (
-            db.session.query(
-                Model.id.label("account_id"),
-                Model.oauth_id.label("oauth_id"),
-                Model.name.label("name"),
-                Model.bracket_id.label("bracket_id"),
-                Brackets.name.label("bracket_name"),
-                Model.hidden,
-                Model.banned,
-                sumscores.columns.score,
-                *fields,
-            )
-            .join(sumscores, Model.id == sumscores.columns.account_id)
-            .join(Brackets, isouter=True)
-            .order_by(
-                sumscores.columns.score.desc(),
-                sumscores.columns.date.asc(),
-                sumscores.columns.id.asc(),
-            )
-        )
-    else:
-        standings_query = (
-            db.session.query(
-                Model.id.label("account_id"),
-                Model.oauth_id.label("oauth_id"),
-                Model.name.label("name"),
-                Model.bracket_id.label("bracket_id"),
-                Brackets.name.label("bracket_name"),
-                sumscores.columns.score,
-                *fields,
-            )
-            .join(sumscores, Model.id == sumscores.columns.account_id)
-            .join(Brackets, isouter=True)
-            .filter(Model.banned == False, Model.hidden == False)
-            .order_by(
-                sumscores.columns.score.desc(),
-                sumscores.columns.date.asc(),
-                sumscores.columns.id.asc(),
-            )
-        )
-
-    # Filter on a bracket if asked
+def _rank(dimension, account_id, admin, bracket_id):
     if bracket_id is not None:
-        standings_query = standings_query.filter(Model.bracket_id == bracket_id)
+        try:
+            bracket_id = int(bracket_id)
+        except ValueError:
+            return None
+    return get_engine().rank(dimension, account_id, admin=admin, bracket_id=bracket_id)
 
-    # Only select a certain amount of users if asked.
-    if count is None:
-        standings = standings_query.all()
-    else:
-        standings = standings_query.limit(count).all()
 
-    return standings
+def get_account_rank(account_id, admin=False, bracket_id=None):
+    """
+    Get the Rank(place, score, to_next) of an account in the current user mode or None if it isn't ranked.
 
+    Pass a bracket_id to get the place within that bracket instead of the overall place.
+    """
+    dimension = "teams" if get_config("user_mode") == TEAMS_MODE else "users"
+    return _rank(dimension, account_id, admin, bracket_id)
 
-@cache.memoize(timeout=60)
-def get_team_standings(count=None, bracket_id=None, admin=False, fields=None):
-    if fields is None:
-        fields = []
-    scores = (
-        db.session.query(
-            Solves.team_id.label("team_id"),
-            db.func.sum(Challenges.value).label("score"),
-            db.func.max(Solves.id).label("id"),
-            db.func.max(Solves.date).label("date"),
-        )
-        .join(Challenges)
-        .filter(Challenges.value != 0)
-        .group_by(Solves.team_id)
-    )
 
-    awards = (
-        db.session.query(
-            Awards.team_id.label("team_id"),
-            db.func.sum(Awards.value).label("score"),
-            db.func.max(Awards.id).label("id"),
-            db.func.max(Awards.date).label("date"),
-        )
-        .filter(Awards.value != 0)
-        .group_by(Awards.team_id)
-    )
+def get_team_rank(team_id, admin=False, bracket_id=None):
+    return _rank("teams", team_id, admin, bracket_id)
 
-    freeze = get_config("freeze")
-    if not admin and freeze:
-        scores = scores.filter(Solves.date < unix_time_to_utc(freeze))
-        awards = awards.filter(Awards.date < unix_time_to_utc(freeze))
 
-    results = union_all(scores, awards).alias("results")
+def get_user_rank(user_id, admin=False, bracket_id=None):
+    return _rank("users", user_id, admin, bracket_id)
 
-    sumscores = (
-        db.session.query(
-            results.columns.team_id,
-            db.func.sum(results.columns.score).label("score"),
-            db.func.max(results.columns.id).label("id"),
-            db.func.max(results.columns.date).label("date"),
-        )
-        .group_by(results.columns.team_id)
-        .subquery()
+
+def _frozen_team_scores(team_ids, frozen):
+    scores = {team_id: TeamScore(score=0, members={}) for team_id in team_ids}
+    members = db.session.query(Users.team_id, Users.id).filter(
+        Users.team_id.in_(team_ids)
     )
+    for team_id, user_id in members:
+        aggregate = frozen.get(user_id)
+        score = aggregate.score if aggregate else 0
+        team = scores[team_id]
+        team.members[user_id] = score
+        scores[team_id] = team._replace(score=team.score + score)
+    return scores
 
-    if admin:
-        standings_query = (
-            db.session.query(
-                Teams.id.label("team_id"),
-                Teams.oauth_id.label("oauth_id"),
-                Teams.name.label("name"),
-                Teams.bracket_id.label("bracket_id"),
-                Brackets.name.label("bracket_name"),
-                Teams.hidden,
-                Teams.banned,
-                sumscores.columns.score,
-                *fields,
-            )
-            .join(sumscores, Teams.id == sumscores.columns.team_id)
-            .join(Brackets, isouter=True)
-            .order_by(
-                sumscores.columns.score.desc(),
-                sumscores.columns.date.asc(),
-                sumscores.columns.id.asc(),
-            )
-        )
-    else:
-        standings_query = (
-            db.session.query(
-                Teams.id.label("team_id"),
-                Teams.oauth_id.label("oauth_id"),
-                Teams.name.label("name"),
-                Teams.bracket_id.label("bracket_id"),
-                Brackets.name.label("bracket_name"),
-                sumscores.columns.score,
-                *fields,
-            )
-            .join(sumscores, Teams.id == sumscores.columns.team_id)
-            .join(Brackets, isouter=True)
-            .filter(Teams.banned == False)
-            .filter(Teams.hidden == False)
-            .order_by(
-                sumscores.columns.score.desc(),
-                sumscores.columns.date.asc(),
-                sumscores.columns.id.asc(),
-            )
-        )
 
-    if bracket_id is not None:
-        standings_query = standings_query.filter(Teams.bracket_id == bracket_id)
+def get_team_scores(team_ids, admin=False):
+    """
+    Get the scores of the given teams and of each of their members with a single grouped query.
 
-    if count is None:
-        standings = standings_query.all()
-    else:
-        standings = standings_query.limit(count).all()
+    Like Teams.get_score a team's score is the sum of the scores of its current members. Unless
+    admin is set solves and awards after the scoreboard freeze are not counted.
 
-    return standings
+    :return: Dictionary of team_id to TeamScore(score, members)
+    """
+    team_ids = list(team_ids)
+    if not team_ids:
+        return {}
 
+    if admin is False:
+        frozen = get_frozen_scores("users")
+        if frozen is not None:
+            return _frozen_team_scores(team_ids, frozen)
 
-@cache.memoize(timeout=60)
-def get_user_standings(count=None, bracket_id=None, admin=False, fields=None):
-    if fields is None:
-        fields = []
-    scores = (
+    solves = (
         db.session.query(
-            Solves.user_id.label("user_id"),
-            db.func.sum(Challenges.value).label("score"),
-            db.func.max(Solves.id).label("id"),
-            db.func.max(Solves.date).label("date"),
+            Solves.user_id.label("user_id"), Challenges.value.label("score")
         )
-        .join(Challenges)
-        .filter(Challenges.value != 0)
-        .group_by(Solves.user_id)
+        .join(Challenges, Solves.challenge_id == Challenges.id)
+        .join(Users, Solves.user_id == Users.id)
+        .filter(Users.team_id.in_(team_ids))
     )
-
     awards = (
-        db.session.query(
-            Awards.user_id.label("user_id"),
-            db.func.sum(Awards.value).label("score"),
-            db.func.max(Awards.id).label("id"),
-            db.func.max(Awards.date).label("date"),
-        )
-        .filter(Awards.value != 0)
-        .group_by(Awards.user_id)
+        db.session.query(Awards.user_id.label("user_id"), Awards.value.label("score"))
+        .join(Users, Awards.user_id == Users.id)
+        .filter(Users.team_id.in_(team_ids))
     )
 
     freeze = get_config("freeze")
-    if not admin and freeze:
-        scores = scores.filter(Solves.date < unix_time_to_utc(freeze))
+    if freeze and not admin:
+        solves = solves.filter(Solves.date < unix_time_to_utc(freeze))
         awards = awards.filter(Awards.date < unix_time_to_utc(freeze))
 
-    results = union_all(scores, awards).alias("results")
-
-    sumscores = (
+    results = union_all(solves, awards).alias("results")
+    members = (
         db.session.query(
-            results.columns.user_id,
-            db.func.sum(results.columns.score).label("score"),
-            db.func.max(results.columns.id).label("id"),
-            db.func.max(results.columns.date).label("date"),
+            Users.team_id,
+            Users.id,
+            db.func.coalesce(db.func.sum(results.columns.score), 0).label("score"),
         )
-        .group_by(results.columns.user_id)
-        .subquery()
+        .outerjoin(results, results.columns.user_id == Users.id)
+        .filter(Users.team_id.in_(team_ids))
+        .group_by(Users.team_id, Users.id)
     )
 
-    if admin:
-        standings_query = (
-            db.session.query(
-                Users.id.label("user_id"),
-                Users.oauth_id.label("oauth_id"),
-                Users.name.label("name"),
-                Users.team_id.label("team_id"),
-                Users.bracket_id.label("bracket_id"),
-                Brackets.name.label("bracket_name"),
-                Users.hidden,
-                Users.banned,
-                sumscores.columns.score,
-                *fields,
-            )
-            .join(sumscores, Users.id == sumscores.columns.user_id)
-            .join(Brackets, isouter=True)
-            .order_by(
-                sumscores.columns.score.desc(),
-                sumscores.columns.date.asc(),
-                sumscores.columns.id.asc(),
-            )
-        )
-    else:
-        standings_query = (
-            db.session.query(
-                Users.id.label("user_id"),
-                Users.oauth_id.label("oauth_id"),
-                Users.name.label("name"),
-                Users.team_id.label("team_id"),
-                Users.bracket_id.label("bracket_id"),
-                Brackets.name.label("bracket_name"),
-                sumscores.columns.score,
-                *fields,
-            )
-            .join(sumscores, Users.id == sumscores.columns.user_id)
-            .join(Brackets, isouter=True)
-            .filter(Users.banned == False, Users.hidden == False)
-            .order_by(
-                sumscores.columns.score.desc(),
-                sumscores.columns.date.asc(),
-                sumscores.columns.id.asc(),
-            )
-        )
+    scores = {team_id: TeamScore(score=0, members={}) for team_id in team_ids}
+    for team_id, user_id, score in members:
+        team = scores[team_id]
+        team.members[user_id] = int(score)
+        scores[team_id] = team._replace(score=team.score + int(score))
+    return scores
 
-    if bracket_id is not None:
-        standings_query = standings_query.filter(Users.bracket_id == bracket_id)
 
-    if count is None:
-        standings = standings_query.all()
-    else:
-        standings = standings_query.limit(count).all()
+def get_score_progression(account_ids, admin=False):
+    """
+    Get the solves and awards of accounts in the current user mode as lists of Points sorted by date.
+
+    Unless admin is set points after the scoreboard freeze are left out. Progressions are kept in memory by the
+    standings engine so only accounts that haven't been requested before are loaded from the database.
+    """
+    dimension = "teams" if get_config("user_mode") == TEAMS_MODE else "users"
+    return get_engine().progression(dimension, list(account_ids), admin=admin)
+
 
-    return standings
+def get_team_members(team_ids, admin=False):
+    """
+    Get the members of the given teams and their scores from the user standings.
+
+    Unless admin is set hidden and banned members are left out.
+
+    :return: Dictionary of team_id to a list of (AccountInfo, score) pairs ordered by user id
+    """
+    return get_engine().members(list(team_ids), admin=admin)
@@ -0,0 +1,656 @@
+import datetime
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict, namedtuple
+from uuid import uuid4
+
+from flask import current_app
+from sqlalchemy import inspect
+
+from CTFd.cache import cache, invalidate
+from CTFd.models import Brackets, Solves, Teams, Users, db
+from CTFd.utils import get_config
+from CTFd.utils.config import is_scoreboard_frozen
+from CTFd.utils.dates import unix_time_to_utc
+from CTFd.utils.scores.freeze import clear_freeze_snapshot, get_frozen_scores
+from CTFd.utils.scores.materialized import (
+    DIMENSIONS,
+    Point,
+    aggregate_scores,
+    load_points,
+    load_scores,
+    recompute_account_scores,
+)
+from CTFd.utils.submissions import after_transaction
+
+AccountInfo = namedtuple(
+    "AccountInfo",
+    [
+        "id",
+        "oauth_id",
+        "name",
+        "team_id",
+        "bracket_id",
+        "bracket_name",
+        "hidden",
+        "banned",
+    ],
+)
+
+# place is 1-indexed and to_next is how many points are needed to reach the account ranked above
+Rank = namedtuple("Rank", ["place", "score", "to_next"])
+
+# The standings and rank index of the whole scoreboard (keyed by None) and of every bracket
+Rankings = namedtuple("Rankings", ["standings", "ranks"])
+
+EPOCH_KEY = "standings/epoch"
+SEQUENCE_KEY = "standings/seq"
+EVENT_KEY = "standings/event/%s"
+
+# How long an epoch lives before every worker rebuilds from the database. This
+# is only a safety net for writes that bypass the event helpers below.
+RESYNC_INTERVAL = 900
+# How long published events are kept around for other workers to consume
+EVENT_TIMEOUT = 300
+# If a worker falls further behind than this it rebuilds instead of replaying
+MAX_BACKLOG = 1000
+
+SEQUENCE_LOCK = threading.Lock()
+
+# Columns of each dimension that are part of its AccountInfo
+ACCOUNT_INFO_COLUMNS = {
+    "users": ("oauth_id", "name", "team_id", "bracket_id", "hidden", "banned"),
+    "teams": ("oauth_id", "name", "bracket_id", "hidden", "banned"),
+}
+
+
+def load_account_info(dimension, account_ids=None):
+    Model, _column = DIMENSIONS[dimension]
+    team_id = Model.team_id if Model is Users else db.null()
+    query = db.session.query(
+        Model.id,
+        Model.oauth_id,
+        Model.name,
+        team_id.label("team_id"),
+        Model.bracket_id,
+        Brackets.name.label("bracket_name"),
+        Model.hidden,
+        Model.banned,
+    ).join(Brackets, Model.bracket_id == Brackets.id, isouter=True)
+    if account_ids is not None:
+        query = query.filter(Model.id.in_(account_ids))
+    return {row.id: AccountInfo(*row) for row in query}
+
+
+class Board(object):
+    """
+    Accounts ordered by score (descending) and then by who reached that score first.
+
+    Entries are kept in a sorted list of keys so that a single account can be moved in
+    O(log n) comparisons instead of re-sorting the whole scoreboard.
+    """
+
+    def __init__(self, aggregates=None):
+        self.entries = dict(aggregates or {})
+        self.order = sorted(
+            self._key(account_id, aggregate)
+            for account_id, aggregate in self.entries.items()
+        )
+
+    @staticmethod
+    def _key(account_id, aggregate):
+        # Different databases treat time precision differently so resolve exact ties by the row ID
+        return (
+            -aggregate.score,
+            aggregate.date or datetime.datetime.min,
+            aggregate.id,
+            account_id,
+        )
+
+    def update(self, account_id, aggregate, force=False):
+        current = self.entries.get(account_id)
+        if current is not None:
+            # Ignore events that were computed before a newer one was applied
+            if force is False and (aggregate is None or aggregate.id < current.id):
+                return
+            del self.order[bisect_left(self.order, self._key(account_id, current))]
+            del self.entries[account_id]
+
+        if aggregate is not None:
+            self.entries[account_id] = aggregate
+            insort(self.order, self._key(account_id, aggregate))
+
+    def __iter__(self):
+        for key in self.order:
+            account_id = key[3]
+            yield account_id, self.entries[account_id]
+
+    def __len__(self):
+        return len(self.order)
+
+
+class StandingsEngine(object):
+    """
+    Per-process standings kept up to date from score events.
+
+    Writers publish the recomputed aggregate of every account they touch into a
+    sequenced event log stored in the shared cache. Every worker replays the events
+    it hasn't seen yet before serving standings and only runs the full aggregation
+    on startup or when the standings are explicitly resynced.
+    """
+
+    def __init__(self):
+        self.epoch = None
+        self.seq = 0
+        self.freeze = None
+        self.boards = {}
+        self.accounts = {}
+        # Rankings per (dimension, admin). Dropped whenever the standings change.
+        self.ranks = {}
+        # Team members per admin. Dropped whenever account info changes.
+        self.rosters = {}
+        # Score progression of accounts per (dimension, public). Loaded the first time an
+        # account's series is requested and then kept current from score events.
+        self.series = {}
+        self.lock = threading.RLock()
+
+    def sync(self):
+        with self.lock:
+            epoch = cache.get(EPOCH_KEY)
+            if epoch is None:
+                epoch = uuid4().hex
+                cache.set(EPOCH_KEY, epoch, timeout=RESYNC_INTERVAL)
+
+            if epoch != self.epoch:
+                self.rebuild(epoch)
+                return
+
+            seq = cache.get(SEQUENCE_KEY) or 0
+            if seq == self.seq:
+                return
+            # The counter went backwards (expired or flushed) or we fell too far behind
+            if seq < self.seq or seq - self.seq > MAX_BACKLOG:
+                self.rebuild(epoch)
+                return
+
+            keys = [EVENT_KEY % i for i in range(self.seq + 1, seq + 1)]
+            for event in cache.get_many(*keys):
+                if event is None:
+                    # The event expired or hasn't been stored yet. Scores are only
+                    # published after they are committed so the database is current.
+                    self.rebuild(epoch)
+                    return
+                self.apply(event)
+                self.seq += 1
+
+    def rebuild(self, epoch):
+        # Read the sequence before aggregating. Events published while we query will be
+        # replayed on top which is safe because events carry absolute values.
+        seq = cache.get(SEQUENCE_KEY) or 0
+        freeze = get_config("freeze")
+
+        boards = {}
+        for dimension in DIMENSIONS:
+            live = Board(load_scores(dimension))
+            boards[dimension, False] = live
+            if freeze:
+                frozen = get_frozen_scores(dimension)
+                if frozen is None:
+                    frozen = aggregate_scores(dimension, freeze=freeze)
+                boards[dimension, True] = Board(frozen)
+            else:
+                boards[dimension, True] = live
+
+        self.boards = boards
+        self.ranks = {}
+        self.series = {}
+        for dimension in DIMENSIONS:
+            live = self.series[dimension, False] = {}
+            self.series[dimension, True] = {} if freeze else live
+        self.freeze = freeze
+        self.load_accounts()
+        self.seq = seq
+        self.epoch = epoch
+
+    def load_accounts(self):
+        self.accounts = {
+            dimension: load_account_info(dimension) for dimension in DIMENSIONS
+        }
+        self.ranks = {}
+        self.rosters = {}
+
+    def apply(self, event):
+        dimension = event["dimension"]
+        account_id = event.get("account_id")
+        force = event.get("force", False)
+
+        if event.get("challenge_id") is not None:
+            self.apply_value_change(event)
+            return
+
+        if event.get("info"):
+            # Only the account's name, team, bracket or visibility changed
+            found = load_account_info(dimension, account_ids=[account_id])
+            self.accounts[dimension][account_id] = found.get(account_id)
+            self.ranks = {}
+            self.rosters = {}
+            return
+
+        live = self.boards[dimension, False]
+        live.update(account_id, event["live"], force=force)
+        self.ranks = {}
+
+        public = self.boards[dimension, True]
+        if public is not live and "public" in event:
+            public.update(account_id, event["public"], force=force)
+
+        live = self.series[dimension, False]
+        public = self.series[dimension, True]
+        if force:
+            # Points were removed so the account is reloaded when it is next requested
+            live.pop(account_id, None)
+            public.pop(account_id, None)
+        elif event.get("point") is not None:
+            self.add_point(live, account_id, event["point"])
+            if public is not live and "public" in event:
+                self.add_point(public, account_id, event["point"])
+
+    def apply_value_change(self, event):
+        """
+        Apply the new aggregates of every account that solved a challenge whose value changed.
+        """
+        dimension = event["dimension"]
+        challenge_id = event["challenge_id"]
+        value = event["value"]
+
+        live = self.boards[dimension, False]
+        for account_id, aggregate in event["live"].items():
+            live.update(account_id, aggregate, force=True)
+        public = self.boards[dimension, True]
+        if public is not live and "public" in event:
+            for account_id, aggregate in event["public"].items():
+                public.update(account_id, aggregate, force=True)
+        self.ranks = {}
+
+        boards = [(self.series[dimension, False], event["live"])]
+        if self.series[dimension, True] is not boards[0][0] and "public" in event:
+            boards.append((self.series[dimension, True], event["public"]))
+        for series, aggregates in boards:
+            for account_id in aggregates:
+                points = series.get(account_id)
+                if points is None:
+                    continue
+                series[account_id] = [
+                    (
+                        point._replace(value=value)
+                        if point.type == "solves" and point.challenge_id == challenge_id
+                        else point
+                    )
+                    for point in points
+                ]
+
+    @staticmethod
+    def add_point(series, account_id, point):
+        points = series.get(account_id)
+        if points is None:
+            return
+        # The account may have been loaded after the point was already committed
+        for existing in points:
+            if existing.type == point.type and existing.id == point.id:
+                return
+        insort(points, point)
+
+    def ranked(self, dimension, admin=False):
+        """
+        Iterate over the ranked (AccountInfo, Aggregate) pairs for a dimension.
+
+        Admins can see scores for all accounts but the public cannot see hidden or banned accounts.
+        Must be called with the lock held after syncing.
+        """
+        board = self.boards[dimension, not admin]
+        accounts = self.accounts[dimension]
+
+        # Accounts created since the last load only need their own row
+        missing = board.entries.keys() - accounts.keys()
+        if missing:
+            found = load_account_info(dimension, account_ids=list(missing))
+            for account_id in missing:
+                accounts[account_id] = found.get(account_id)
+            self.ranks = {}
+            self.rosters = {}
+
+        for account_id, aggregate in board:
+            info = accounts[account_id]
+            # Deleted accounts
+            if info is None:
+                continue
+            if admin is False and (info.hidden or info.banned):
+                continue
+            yield info, aggregate
+
+    def rankings(self, dimension, admin=False):
+        """
+        Get the Rankings of the whole scoreboard and of every bracket.
+
+        All of them are built together with a single pass over the standings and reused until
+        the standings change. Must be called with the lock held after syncing.
+        """
+        key = (dimension, admin)
+        rankings = self.ranks.get(key)
+        if rankings is None:
+            standings = defaultdict(list)
+            ranks = defaultdict(dict)
+            for info, aggregate in self.ranked(dimension, admin=admin):
+                brackets = (
+                    (None,) if info.bracket_id is None else (None, info.bracket_id)
+                )
+                for bracket_id in brackets:
+                    bracket = standings[bracket_id]
+                    to_next = bracket[-1][1].score - aggregate.score if bracket else 0
+                    ranks[bracket_id][info.id] = Rank(
+                        len(bracket) + 1, aggregate.score, to_next
+                    )
+                    bracket.append((info, aggregate))
+            rankings = Rankings(dict(standings), dict(ranks))
+            self.ranks[key] = rankings
+        return rankings
+
+    def standings(self, dimension, admin=False, bracket_id=None, count=None):
+        """
+        Get the ranked (AccountInfo, Aggregate) pairs for a dimension.
+        """
+        self.sync()
+
+        with self.lock:
+            standings = self.rankings(dimension, admin=admin).standings
+            return standings.get(bracket_id, [])[:count]
+
+    def rank(self, dimension, account_id, admin=False, bracket_id=None):
+        """
+        Get the Rank of a single account or None if it isn't on the scoreboard.
+        """
+        self.sync()
+
+        with self.lock:
+            ranks = self.rankings(dimension, admin=admin).ranks
+            return ranks.get(bracket_id, {}).get(account_id)
+
+    def members(self, team_ids, admin=False):
+        """
+        Get the members of the given teams with their scores from the user standings.
+
+        The roster of every team is built from the account info the engine already holds so it
+        doesn't need to scan the users table and is kept until a member joins, leaves or changes.
+
+        :return: Dictionary of team_id to a list of (AccountInfo, score) pairs
+        """
+        self.sync()
+
+        with self.lock:
+            roster = self.rosters.get(admin)
+            if roster is None:
+                roster = {}
+                for info in self.accounts["users"].values():
+                    if info is None or info.team_id is None:
+                        continue
+                    if admin is False and (info.hidden or info.banned):
+                        continue
+                    roster.setdefault(info.team_id, []).append(info)
+                for team in roster.values():
+                    team.sort(key=lambda info: info.id)
+                self.rosters[admin] = roster
+
+            ranks = self.rankings("users", admin=admin).ranks.get(None, {})
+            return {
+                team_id: [
+                    (info, ranks[info.id].score if info.id in ranks else 0)
+                    for info in roster.get(team_id, [])
+                ]
+                for team_id in team_ids
+            }
+
+    def progression(self, dimension, account_ids, admin=False):
+        """
+        Get the Points of every given account. Only accounts that haven't been requested
+        since the last rebuild are loaded from the database.
+
+        :return: Dictionary of account_id to a list of Points sorted by date
+        """
+        self.sync()
+
+        with self.lock:
+            series = self.series[dimension, not admin]
+            missing = [
+                account_id for account_id in account_ids if account_id not in series
+            ]
+            if missing:
+                freeze = None if admin else self.freeze
+                series.update(load_points(dimension, missing, freeze=freeze))
+            return {account_id: list(series[account_id]) for account_id in account_ids}
+
+
+def get_engine():
+    engine = getattr(current_app, "standings_engine", None)
+    if engine is None:
+        engine = current_app.standings_engine = StandingsEngine()
+    return engine
+
+
+@after_transaction
+def publish_scores(user_id=None, team_id=None, date=None, force=False, point=None):
+    """
+    Recompute the aggregates of the given user and team and publish them to every worker.
+
+    :param date: Date of the solve or award that changed the score. Changes made after the
+    scoreboard freeze don't need to touch the public standings.
+    :param force: Apply the new aggregate even if it is older than the current one (e.g. deletions)
+    :param point: The Point added to the score progression of the accounts
+    """
+    freeze = get_config("freeze")
+    public = freeze and (force or date is None or date < unix_time_to_utc(freeze))
+    if public and is_scoreboard_frozen():
+        # Admins corrected scores from before the freeze
+        clear_freeze_snapshot()
+    if force:
+        # Solves may have been removed
+        invalidate("solve_counts")
+
+    for dimension, account_id in (("users", user_id), ("teams", team_id)):
+        if account_id is None:
+            continue
+
+        event = {
+            "dimension": dimension,
+            "account_id": account_id,
+            "force": force,
+            "point": point,
+            "live": load_scores(dimension, account_ids=[account_id]).get(account_id),
+        }
+        if public:
+            event["public"] = aggregate_scores(
+                dimension, account_ids=[account_id], freeze=freeze
+            ).get(account_id)
+
+        if publish(event) is False:
+            return
+
+
+@after_transaction
+def publish_value_change(challenge_id, previous, value):
+    """
+    Publish the new aggregates of the accounts that solved a challenge after its value changed.
+
+    Only the solvers of the challenge are reloaded instead of rebuilding every worker's standings.
+    """
+    if not (previous and value):
+        # Zero value challenges don't take part in tie breaks so the order of accounts
+        # with the same score can change as well
+        resync_standings(recompute=False)
+        return
+
+    freeze = get_config("freeze")
+    # A frozen scoreboard is served from the freeze snapshot which doesn't change
+    public = freeze and not is_scoreboard_frozen()
+    for dimension, (_Model, column) in DIMENSIONS.items():
+        solver = getattr(Solves, column)
+        solvers = db.session.query(solver).filter(
+            Solves.challenge_id == challenge_id, solver.isnot(None)
+        )
+        account_ids = [account_id for account_id, in solvers.distinct()]
+        if not account_ids:
+            continue
+
+        event = {
+            "dimension": dimension,
+            "challenge_id": challenge_id,
+            "value": value,
+            "live": load_scores(dimension, account_ids=account_ids),
+        }
+        if public:
+            account_ids = [
+                account_id
+                for account_id, in solvers.filter(
+                    Solves.date < unix_time_to_utc(freeze)
+                ).distinct()
+            ]
+            event["public"] = aggregate_scores(
+                dimension, account_ids=account_ids, freeze=freeze
+            )
+
+        if publish(event) is False:
+            return
+
+
+def next_sequence():
+    """
+    Get the sequence number of a new event or None if the cache can't hand it out atomically.
+    """
+    cache_type = current_app.config.get("CACHE_TYPE")
+    if cache_type == "redis":
+        # INCR is atomic across every worker
+        return cache.cache.inc(SEQUENCE_KEY)
+    if cache_type == "simple":
+        # The simple cache only lives in this process so a lock makes its get and set atomic
+        with SEQUENCE_LOCK:
+            return cache.cache.inc(SEQUENCE_KEY)
+    # Other caches are shared by several processes without an atomic increment. Two events
+    # could get the same number and one would overwrite the other so every worker rebuilds.
+    return None
+
+
+def publish(event):
+    """
+    Append an event to the event log replayed by every worker.
+
+    :return: False if the event couldn't be logged and every worker was told to rebuild instead
+    """
+    seq = next_sequence()
+    if seq is None:
+        # The cache couldn't track the event so fall back to a full rebuild
+        resync_standings(recompute=False)
+        return False
+    cache.set(EVENT_KEY % seq, event, timeout=EVENT_TIMEOUT)
+    if seq == 1:
+        # A fresh counter means the previous one expired. Workers can't tell its
+        # old sequence numbers apart from the new ones so start a new epoch.
+        resync_standings(recompute=False)
+    return True
+
+
+def track_account_changes(session):
+    """
+    Remember the accounts whose AccountInfo changed in a flush so that they can be published
+    once the transaction commits.
+    """
+    changed = session.info.setdefault("changed_accounts", set())
+    for objects, state in (
+        (session.new, "new"),
+        (session.dirty, "dirty"),
+        (session.deleted, "deleted"),
+    ):
+        for obj in objects:
+            if isinstance(obj, Users):
+                dimension = "users"
+            elif isinstance(obj, Teams):
+                dimension = "teams"
+            else:
+                continue
+
+            if state == "dirty":
+                attrs = inspect(obj).attrs
+                columns = ACCOUNT_INFO_COLUMNS[dimension]
+                if not any(attrs[column].history.has_changes() for column in columns):
+                    continue
+                if any(attrs[c].history.has_changes() for c in ("hidden", "banned")):
+                    session.info["solve_counts_changed"] = True
+            elif state == "deleted":
+                session.info["solve_counts_changed"] = True
+            changed.add((dimension, obj.id))
+
+
+def publish_account_changes(session):
+    """
+    Tell every worker to reload the info of accounts that were changed in a committed transaction.
+    """
+    changed = session.info.pop("changed_accounts", None)
+    if session.info.pop("solve_counts_changed", False):
+        # Solves by hidden, banned or deleted accounts aren't counted
+        invalidate("solve_counts")
+    # Names, visibility and brackets are part of the standings so cached standings and
+    # their ETags are stale even if no scores changed
+    invalidate("standings")
+    for dimension, account_id in sorted(changed or ()):
+        if account_id is None:
+            continue
+        event = {"dimension": dimension, "account_id": account_id, "info": True}
+        if publish(event) is False:
+            return
+
+
+def record_solve(solve):
+    point = Point(
+        date=solve.date,
+        type="solves",
+        id=solve.id,
+        challenge_id=solve.challenge_id,
+        user_id=solve.user_id,
+        team_id=solve.team_id,
+        value=solve.challenge.value,
+    )
+    publish_scores(
+        user_id=solve.user_id, team_id=solve.team_id, date=solve.date, point=point
+    )
+
+
+def record_award(award):
+    point = Point(
+        date=award.date,
+        type="awards",
+        id=award.id,
+        challenge_id=None,
+        user_id=award.user_id,
+        team_id=award.team_id,
+        value=award.value,
+    )
+    publish_scores(
+        user_id=award.user_id, team_id=award.team_id, date=award.date, point=point
+    )
+
+
+def record_removal(user_id=None, team_id=None):
+    publish_scores(user_id=user_id, team_id=team_id, force=True)
+
+
+def resync_standings(recompute=True):
+    """
+    Make every worker rebuild its standings.
+
+    :param recompute: Also rebuild the account_scores table, the freeze snapshot and the solve counters.
+    Needed after scores were changed by bulk queries that bypass the ORM.
+    """
+    if recompute:
+        recompute_account_scores()
+        clear_freeze_snapshot()
+        invalidate("solve_counts")
+    cache.set(EPOCH_KEY, uuid4().hex, timeout=RESYNC_INTERVAL)
+    invalidate("standings")
@@ -0,0 +1,42 @@
+from CTFd.cache import cache, get_tag_versions, invalidate
+from CTFd.utils import get_config
+from CTFd.utils.config import is_scoreboard_frozen
+from CTFd.utils.scores.materialized import aggregate_scores
+
+# Parts of the freeze snapshot are stored per freeze time and per version of the "freeze" tag
+SNAPSHOT_KEY = "freeze/%s/%s/%s"
+
+
+def get_frozen(part, build, *args, **kwargs):
+    """
+    Get a part of the freeze snapshot or None if the scoreboard isn't frozen yet.
+
+    Once the freeze time has passed nothing a player does can change what the public sees so each part is
+    computed once with build(*args, **kwargs) and stored without a timeout. Changing the freeze time starts
+    a new snapshot and clear_freeze_snapshot() drops the current one after admins correct scores.
+    """
+    if is_scoreboard_frozen() is False:
+        return None
+
+    freeze = int(get_config("freeze"))
+    (version,) = get_tag_versions(["freeze"])
+    key = SNAPSHOT_KEY % (freeze, version, part)
+    value = cache.get(key)
+    if value is None:
+        value = build(*args, **kwargs)
+        cache.set(key, value, timeout=0)
+    return value
+
+
+def get_frozen_scores(dimension):
+    """
+    Get the public Aggregate of every account in a dimension at freeze time or None if the scoreboard isn't frozen.
+    """
+    return get_frozen(
+        f"scores/{dimension}",
+        lambda: aggregate_scores(dimension, freeze=get_config("freeze")),
+    )
+
+
+def clear_freeze_snapshot():
+    invalidate("freeze")
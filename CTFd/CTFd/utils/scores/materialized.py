@@ -0,0 +1,394 @@
+from collections import namedtuple
+
+from sqlalchemy import inspect
+from sqlalchemy.sql.expression import union_all
+
+from CTFd.models import AccountScores, Awards, Challenges, Solves, Teams, Users, db
+from CTFd.utils.dates import unix_time_to_utc
+
+Aggregate = namedtuple("Aggregate", ["score", "id", "date"])
+
+# A single solve or award on an account's score progression. Points are ordered by date.
+Point = namedtuple(
+    "Point", ["date", "type", "id", "challenge_id", "user_id", "team_id", "value"]
+)
+
+# Scores are tracked separately for users and for teams. In users mode the
+# "teams" dimension is simply empty.
+DIMENSIONS = {"users": (Users, "user_id"), "teams": (Teams, "team_id")}
+
+
+def aggregate_scores(dimension, account_ids=None, freeze=None):
+    """
+    Sum solves and awards for every account in a dimension (or only the given accounts).
+
+    Challenges & Awards with a value of zero are filtered out of the calculations to avoid incorrect tie breaks.
+
+    :return: Dictionary of account_id to Aggregate(score, id, date)
+    """
+    _Model, column = DIMENSIONS[dimension]
+    solve_account = getattr(Solves, column)
+    award_account = getattr(Awards, column)
+
+    scores = (
+        db.session.query(
+            solve_account.label("account_id"),
+            db.func.sum(Challenges.value).label("score"),
+            db.func.max(Solves.id).label("id"),
+            db.func.max(Solves.date).label("date"),
+        )
+        .join(Challenges)
+        .filter(Challenges.value != 0)
+        .group_by(solve_account)
+    )
+    awards = (
+        db.session.query(
+            award_account.label("account_id"),
+            db.func.sum(Awards.value).label("score"),
+            db.func.max(Awards.id).label("id"),
+            db.func.max(Awards.date).label("date"),
+        )
+        .filter(Awards.value != 0)
+        .group_by(award_account)
+    )
+
+    if account_ids is None:
+        scores = scores.filter(solve_account.isnot(None))
+        awards = awards.filter(award_account.isnot(None))
+    else:
+        scores = scores.filter(solve_account.in_(account_ids))
+        awards = awards.filter(award_account.in_(account_ids))
+
+    if freeze:
+        scores = scores.filter(Solves.date < unix_time_to_utc(freeze))
+        awards = awards.filter(Awards.date < unix_time_to_utc(freeze))
+
+    results = union_all(scores, awards).alias("results")
+    sumscores = db.session.query(
+        results.columns.account_id,
+        db.func.sum(results.columns.score).label("score"),
+        db.func.max(results.columns.id).label("id"),
+        db.func.max(results.columns.date).label("date"),
+    ).group_by(results.columns.account_id)
+
+    return {
+        row.account_id: Aggregate(score=int(row.score), id=row.id, date=row.date)
+        for row in sumscores
+    }
+
+
+def load_scores(dimension, account_ids=None):
+    """
+    Read materialized scores from the account_scores table.
+
+    :return: Dictionary of account_id to Aggregate(score, id, date)
+    """
+    query = db.session.query(
+        AccountScores.account_id,
+        AccountScores.score,
+        AccountScores.last_id,
+        AccountScores.last_date,
+    ).filter(AccountScores.type == dimension)
+    if account_ids is not None:
+        query = query.filter(AccountScores.account_id.in_(account_ids))
+    return {
+        row.account_id: Aggregate(score=row.score, id=row.last_id, date=row.last_date)
+        for row in query
+    }
+
+
+def load_points(dimension, account_ids, freeze=None):
+    """
+    Load the solves and awards of the given accounts with a single query.
+
+    :return: Dictionary of account_id to a list of Points sorted by date
+    """
+    _Model, column = DIMENSIONS[dimension]
+    solve_account = getattr(Solves, column)
+    award_account = getattr(Awards, column)
+
+    solves = (
+        db.session.query(
+            solve_account.label("account_id"),
+            Solves.date.label("date"),
+            db.literal("solves").label("type"),
+            Solves.id.label("id"),
+            Solves.challenge_id.label("challenge_id"),
+            Solves.user_id.label("user_id"),
+            Solves.team_id.label("team_id"),
+            Challenges.value.label("value"),
+        )
+        .join(Challenges, Solves.challenge_id == Challenges.id)
+        .filter(solve_account.in_(account_ids))
+    )
+    awards = db.session.query(
+        award_account.label("account_id"),
+        Awards.date.label("date"),
+        db.literal("awards").label("type"),
+        Awards.id.label("id"),
+        db.null().label("challenge_id"),
+        Awards.user_id.label("user_id"),
+        Awards.team_id.label("team_id"),
+        Awards.value.label("value"),
+    ).filter(award_account.in_(account_ids))
+
+    if freeze:
+        solves = solves.filter(Solves.date < unix_time_to_utc(freeze))
+        awards = awards.filter(Awards.date < unix_time_to_utc(freeze))
+
+    results = union_all(solves, awards).alias("results")
+    query = db.session.query(results).order_by(
+        results.columns.date, results.columns.type, results.columns.id
+    )
+
+    points = {account_id: [] for account_id in account_ids}
+    for row in query:
+        points[row.account_id].append(Point(*row[1:]))
+    return points
+
+
+def _upsert(session, rows, increment=False):
+    """
+    Insert account_scores rows or update the existing row for the same account.
+
+    With increment the score is added to the stored score instead of replacing it so that
+    concurrent solves by members of the same team can't overwrite each other.
+    """
+    if not rows:
+        return
+
+    table = AccountScores.__table__
+    dialect = session.get_bind().dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+
+        stmt = insert(table)
+        excluded = stmt.inserted
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+
+        stmt = insert(table)
+        excluded = stmt.excluded
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+        stmt = insert(table)
+        excluded = stmt.excluded
+
+    if increment:
+        newer = excluded.last_id > db.func.coalesce(table.c.last_id, 0)
+        values = {
+            "score": table.c.score + excluded.score,
+            "last_id": db.case((newer, excluded.last_id), else_=table.c.last_id),
+            "last_date": db.case((newer, excluded.last_date), else_=table.c.last_date),
+        }
+    else:
+        values = {
+            "score": excluded.score,
+            "last_id": excluded.last_id,
+            "last_date": excluded.last_date,
+            "bracket_id": excluded.bracket_id,
+        }
+
+    if dialect == "mysql":
+        stmt = stmt.on_duplicate_key_update(**values)
+    else:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["type", "account_id"], set_=values
+        )
+    session.execute(stmt, rows)
+
+
+def _brackets(dimension, account_ids=None):
+    Model, _column = DIMENSIONS[dimension]
+    query = db.session.query(Model.id, Model.bracket_id)
+    if account_ids is not None:
+        query = query.filter(Model.id.in_(account_ids))
+    return dict(query)
+
+
+def refresh_account_scores(session, dimension, account_ids):
+    """
+    Recompute the materialized scores of the given accounts from their solves and awards.
+    """
+    account_ids = [account_id for account_id in account_ids if account_id is not None]
+    if not account_ids:
+        return
+
+    scores = aggregate_scores(dimension, account_ids=account_ids)
+    brackets = _brackets(dimension, list(scores))
+    _upsert(
+        session,
+        [
+            {
+                "type": dimension,
+                "account_id": account_id,
+                "score": aggregate.score,
+                "last_id": aggregate.id,
+                "last_date": aggregate.date,
+                "bracket_id": brackets.get(account_id),
+            }
+            for account_id, aggregate in scores.items()
+        ],
+    )
+
+    # Accounts without any remaining solves or awards no longer have a score
+    removed = set(account_ids) - set(scores)
+    if removed:
+        session.execute(
+            AccountScores.__table__.delete().where(
+                (AccountScores.type == dimension)
+                & AccountScores.account_id.in_(removed)
+            )
+        )
+
+
+def recompute_account_scores():
+    """
+    Rebuild the whole account_scores table. Used when scores were changed by bulk queries
+    (resets, imports, account deletion) that bypass the ORM.
+    """
+    db.session.query(AccountScores).delete(synchronize_session=False)
+    for dimension in DIMENSIONS:
+        scores = aggregate_scores(dimension)
+        brackets = _brackets(dimension)
+        rows = [
+            {
+                "type": dimension,
+                "account_id": account_id,
+                "score": aggregate.score,
+                "last_id": aggregate.id,
+                "last_date": aggregate.date,
+                "bracket_id": brackets.get(account_id),
+            }
+            for account_id, aggregate in scores.items()
+        ]
+        if rows:
+            db.session.execute(AccountScores.__table__.insert(), rows)
+    db.session.commit()
+
+
+def _changed(obj, attribute):
+    history = inspect(obj).attrs[attribute].history
+    if history.has_changes():
+        return history.deleted[0] if history.deleted else None, True
+    return None, False
+
+
+def track_score_changes(session):
+    """
+    Apply the solves, awards and challenge value changes in a flush to account_scores.
+
+    Called from an after_flush hook so the table is updated in the same transaction as the
+    rows it summarizes.
+    """
+    new = []
+    refresh = {dimension: set() for dimension in DIMENSIONS}
+    changed_values = []
+    brackets = []
+
+    for obj in session.new:
+        if isinstance(obj, (Solves, Awards)):
+            new.append(obj)
+
+    for obj in session.deleted:
+        if isinstance(obj, (Solves, Awards)):
+            refresh["users"].add(obj.user_id)
+            refresh["teams"].add(obj.team_id)
+
+    for obj in session.dirty:
+        if isinstance(obj, (Solves, Awards)):
+            if session.is_modified(obj) is False:
+                continue
+            refresh["users"].add(obj.user_id)
+            refresh["teams"].add(obj.team_id)
+            # Also refresh the previous owner if the row was moved to another account
+            for dimension, attribute in (("users", "user_id"), ("teams", "team_id")):
+                previous, changed = _changed(obj, attribute)
+                if changed:
+                    refresh[dimension].add(previous)
+        elif isinstance(obj, Challenges):
+            previous, changed = _changed(obj, "value")
+            if changed:
+                # Values assigned from forms are still strings until they are loaded again
+                previous = int(previous) if previous is not None else None
+                value = int(obj.value) if obj.value is not None else None
+                if previous != value:
+                    changed_values.append(obj.id)
+        elif isinstance(obj, (Users, Teams)):
+            _previous, changed = _changed(obj, "bracket_id")
+            if changed:
+                dimension = "users" if isinstance(obj, Users) else "teams"
+                brackets.append((dimension, obj.id, obj.bracket_id))
+
+    if not (new or changed_values or brackets or any(refresh.values())):
+        return
+
+    # The solvers of a challenge whose value changed are recomputed from their solves and awards
+    # rather than shifted by the difference with the value loaded by this transaction. That value
+    # may already be stale if another transaction changed it concurrently, whereas the update of
+    # the challenge row holds its lock so the recomputation sees the value that gets committed.
+    for challenge_id in changed_values:
+        for dimension, (_Model, column) in DIMENSIONS.items():
+            solvers = db.select([getattr(Solves, column)]).where(
+                Solves.challenge_id == challenge_id
+            )
+            refresh[dimension].update(
+                row[0] for row in session.execute(solvers) if row[0] is not None
+            )
+
+    if new:
+        challenge_ids = {obj.challenge_id for obj in new if isinstance(obj, Solves)}
+        values = {}
+        if challenge_ids:
+            values = dict(
+                session.query(Challenges.id, Challenges.value).filter(
+                    Challenges.id.in_(challenge_ids)
+                )
+            )
+
+        increments = {dimension: [] for dimension in DIMENSIONS}
+        for obj in new:
+            value = (
+                values.get(obj.challenge_id) if isinstance(obj, Solves) else obj.value
+            )
+            if not value:
+                continue
+            for dimension, (_Model, column) in DIMENSIONS.items():
+                account_id = getattr(obj, column)
+                if account_id is None or account_id in refresh[dimension]:
+                    continue
+                increments[dimension].append((account_id, value, obj.id, obj.date))
+
+        for dimension, rows in increments.items():
+            if not rows:
+                continue
+            account_brackets = _brackets(dimension, {row[0] for row in rows})
+            _upsert(
+                session,
+                [
+                    {
+                        "type": dimension,
+                        "account_id": account_id,
+                        "score": value,
+                        "last_id": last_id,
+                        "last_date": last_date,
+                        "bracket_id": account_brackets.get(account_id),
+                    }
+                    for account_id, value, last_id, last_date in rows
+                ],
+                increment=True,
+            )
+
+    for dimension, account_ids in refresh.items():
+        refresh_account_scores(session, dimension, account_ids)
+
+    for dimension, account_id, bracket_id in brackets:
+        session.execute(
+            AccountScores.__table__.update()
+            .where(
+                (AccountScores.type == dimension)
+                & (AccountScores.account_id == account_id)
+            )
+            .values(bracket_id=bracket_id)
+        )
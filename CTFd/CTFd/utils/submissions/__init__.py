@@ -0,0 +1,302 @@
+import atexit
+import datetime
+import functools
+import hashlib
+import pickle  # nosec B403
+from collections import Counter
+from contextlib import contextmanager
+from threading import Lock
+
+from flask import current_app
+from gevent import sleep, spawn
+
+from CTFd.cache import cache, clear_submissions, get_tag_versions
+from CTFd.models import Discards, Fails, Submissions, db
+
+# Submissions that don't change scores and can be written behind
+WRITE_BEHIND_TYPES = (Fails, Discards)
+
+# Verdicts of wrong submissions are stored per version of the challenges and flags, account, challenge and submission
+VERDICT_KEY = "verdicts/%s/%s/%s/%s"
+
+
+def get_submission_sink():
+    return getattr(current_app, "submission_sink", None)
+
+
+def save_submission(submission):
+    """
+    Save a Fails or Discards submission. When SUBMISSION_WRITE_BEHIND is enabled it is buffered
+    and inserted along with other submissions instead of being committed right away.
+    """
+    sink = get_submission_sink()
+    batched = db.session.info.get("single_transaction", False)
+    if sink is None or batched or not isinstance(submission, WRITE_BEHIND_TYPES):
+        db.session.add(submission)
+        db.session.commit()
+        return
+    sink.add(submission)
+
+
+def _verdict_key(account_id, challenge_id, submission):
+    version = "/".join(get_tag_versions(["challenges", "flags"]))
+    digest = hashlib.sha256(submission.encode("utf-8")).hexdigest()
+    return VERDICT_KEY % (version, account_id, challenge_id, digest)
+
+
+def get_verdict(account_id, challenge_id, submission):
+    """
+    Get the message a challenge answered the same wrong submission with in the last
+    DUPLICATE_SUBMISSION_WINDOW seconds or None
+    """
+    if not current_app.config.get("DUPLICATE_SUBMISSION_WINDOW"):
+        return None
+    return cache.get(_verdict_key(account_id, challenge_id, submission))
+
+
+def remember_verdict(account_id, challenge_id, submission, message):
+    """
+    Remember that a challenge answered a submission as incorrect so that repeats of it aren't judged again
+    """
+    window = current_app.config.get("DUPLICATE_SUBMISSION_WINDOW")
+    if window:
+        cache.set(
+            _verdict_key(account_id, challenge_id, submission), message, timeout=window
+        )
+
+
+@contextmanager
+def single_transaction():
+    """
+    Commit everything challenge plugins save inside the block in one transaction.
+
+    db.session.commit() only flushes until the block exits and db.session.close() does nothing so plugins
+    can keep saving submissions the way they do for a single attempt. Everything is rolled back if the
+    block raises. Calls decorated with after_transaction() are made once the transaction is committed.
+    """
+    session = db.session()
+    session.info["single_transaction"] = True
+    deferred = session.info["deferred_calls"] = []
+    session.commit = session.flush
+    session.close = lambda: None
+    try:
+        yield session
+    except Exception:
+        del session.commit, session.close
+        session.rollback()
+        raise
+    else:
+        del session.commit, session.close
+        session.commit()
+    finally:
+        session.info.pop("single_transaction", None)
+        session.info.pop("deferred_calls", None)
+
+    for call in deferred:
+        call()
+
+
+def after_transaction(f):
+    """
+    Decorator deferring calls made inside single_transaction() until its transaction is committed so
+    that other workers aren't told about changes that may still be rolled back. Deferred calls are
+    dropped if the transaction is rolled back.
+    """
+
+    @functools.wraps(f)
+    def after_transaction_function(*args, **kwargs):
+        deferred = db.session.info.get("deferred_calls")
+        if deferred is None:
+            return f(*args, **kwargs)
+        deferred.append(functools.partial(f, *args, **kwargs))
+
+    return after_transaction_function
+
+
+def get_pending_fails(account_id, challenge_id):
+    """
+    Get the number of Fails of an account on a challenge that are buffered but not inserted yet
+    """
+    sink = get_submission_sink()
+    if sink is None:
+        return 0
+    return sink.pending_fails(account_id, challenge_id)
+
+
+# Longest number of seconds between two flushes of a SubmissionSink while the database is failing
+MAX_FLUSH_BACKOFF = 30
+
+
+class SubmissionSink(object):
+    """
+    Buffer non-scoring submissions in memory and insert them in bulk every `interval` seconds or
+    once `size` submissions are buffered. The buffer is flushed when the process exits.
+    """
+
+    def __init__(self, app, interval=0.5, size=500):
+        self.app = app
+        self.interval = interval
+        self.size = size
+        self.rows = []
+        self.pending = Counter()
+        self.lock = Lock()
+
+    def listen(self):
+        def _flush_forever():
+            failures = 0
+            while True:
+                # Back off while the database is failing
+                sleep(min(self.interval * 2**failures, MAX_FLUSH_BACKOFF))
+                failures = 0 if self.try_flush() else failures + 1
+
+        spawn(_flush_forever)
+        atexit.register(self.close)
+
+    def try_flush(self):
+        """
+        Flush from the background. Errors are logged instead of raised so that the buffered submissions
+        are retried with the next flush.
+
+        :return: False if the flush failed
+        """
+        with self.app.app_context():
+            try:
+                self.flush()
+            except Exception:
+                self.app.logger.exception("Failed to flush buffered submissions")
+                db.session.rollback()
+                db.session.remove()
+                return False
+        return True
+
+    def close(self):
+        with self.app.app_context():
+            while self.flush():
+                pass
+
+    @staticmethod
+    def to_row(submission):
+        return {
+            "type": submission.__mapper__.polymorphic_identity,
+            "challenge_id": submission.challenge_id,
+            "user_id": submission.user_id,
+            "team_id": submission.team_id,
+            "ip": submission.ip,
+            "provided": submission.provided,
+            "date": submission.date or datetime.datetime.utcnow(),
+        }
+
+    def add(self, submission):
+        from CTFd.utils.user import count_wrong_submission
+
+        row = self.to_row(submission)
+        account_id = submission.account_id
+        is_fail = row["type"] == Fails.__mapper__.polymorphic_identity
+        self._push(row, account_id, is_fail)
+        if is_fail:
+            count_wrong_submission(
+                row["user_id"], row["team_id"], row["challenge_id"], row["date"]
+            )
+        if self.buffered() >= self.size:
+            self.flush()
+
+    def _push(self, row, account_id, is_fail):
+        with self.lock:
+            self.rows.append((row, account_id, is_fail))
+            if is_fail:
+                self.pending[(account_id, row["challenge_id"])] += 1
+
+    def buffered(self):
+        return len(self.rows)
+
+    def pending_fails(self, account_id, challenge_id):
+        return self.pending[(account_id, challenge_id)]
+
+    def flush(self):
+        """
+        Insert up to `size` buffered submissions.
+
+        :return: The number of inserted submissions
+        """
+        with self.lock:
+            batch = self.rows[: self.size]
+            del self.rows[: self.size]
+        if not batch:
+            return 0
+
+        try:
+            self.insert(batch)
+        except Exception:
+            # Put the batch back so that it's retried with the next flush
+            with self.lock:
+                self.rows[:0] = batch
+            raise
+
+        with self.lock:
+            for row, account_id, is_fail in batch:
+                if is_fail:
+                    key = (account_id, row["challenge_id"])
+                    self.pending[key] -= 1
+                    if self.pending[key] <= 0:
+                        del self.pending[key]
+        return len(batch)
+
+    @staticmethod
+    def insert(batch):
+        with db.engine.begin() as conn:
+            conn.execute(Submissions.__table__.insert(), [row for row, _, _ in batch])
+        for account_id in {account_id for _, account_id, _ in batch}:
+            clear_submissions(account_id)
+
+
+class RedisSubmissionSink(SubmissionSink):
+    """
+    SubmissionSink buffering submissions in a Redis list shared by every worker.
+
+    Only one worker flushes at a time. Submissions are removed from the list after they are inserted
+    so a worker dying in between means they are inserted again rather than lost.
+    """
+
+    def __init__(self, app, interval=0.5, size=500):
+        super(RedisSubmissionSink, self).__init__(app, interval=interval, size=size)
+        self.client = cache.cache._write_client
+        prefix = cache.cache.key_prefix
+        self.queue_key = prefix + "submissions/queue"
+        self.pending_key = prefix + "submissions/pending"
+        self.lock_key = prefix + "submissions/flush_lock"
+
+    def _push(self, row, account_id, is_fail):
+        pipe = self.client.pipeline()
+        pipe.rpush(self.queue_key, pickle.dumps((row, account_id, is_fail)))
+        if is_fail:
+            pipe.hincrby(self.pending_key, f"{account_id}/{row['challenge_id']}", 1)
+        pipe.execute()
+
+    def buffered(self):
+        return self.client.llen(self.queue_key)
+
+    def pending_fails(self, account_id, challenge_id):
+        pending = self.client.hget(self.pending_key, f"{account_id}/{challenge_id}")
+        return max(int(pending or 0), 0)
+
+    def flush(self):
+        if not self.client.set(self.lock_key, 1, nx=True, ex=30):
+            # Another worker is flushing
+            return 0
+        try:
+            items = self.client.lrange(self.queue_key, 0, self.size - 1)
+            if not items:
+                return 0
+            batch = [pickle.loads(item) for item in items]  # nosec B301
+            self.insert(batch)
+
+            pipe = self.client.pipeline()
+            pipe.ltrim(self.queue_key, len(items), -1)
+            for row, account_id, is_fail in batch:
+                if is_fail:
+                    field = f"{account_id}/{row['challenge_id']}"
+                    pipe.hincrby(self.pending_key, field, -1)
+            pipe.execute()
+            return len(batch)
+        finally:
+            self.client.delete(self.lock_key)
@@ -5,15 +5,22 @@ from flask import abort
 from flask import current_app as app
 from flask import redirect, request, session, url_for
 
-from CTFd.cache import cache, clear_user_session
+from CTFd.cache import cache, clear_user_session, get_tag_versions, memoize_tags
 from CTFd.constants.languages import Languages
 from CTFd.constants.teams import TeamAttrs
 from CTFd.constants.users import UserAttrs
 from CTFd.models import Fails, Teams, Tracking, Users, db
 from CTFd.utils import get_config
+from CTFd.utils.dates import unix_time
 from CTFd.utils.security.auth import logout_user
 from CTFd.utils.security.signing import hmac
 
+# Sliding window counter of an account's wrong submissions
+WRONG_SUBMISSIONS_KEY = "fails/%s/%s"
+
+# Attempt counter of an account on a challenge
+ATTEMPTS_KEY = "%s/%s/%s"
+
 
 def get_current_user():
     if authed():
@@ -57,7 +64,7 @@ def get_user_attrs(user_id):
     return None
 
 
-@cache.memoize(timeout=300)
+@memoize_tags("standings", lambda user_id: f"standings/user/{user_id}", timeout=300)
 def get_user_place(user_id):
     user = Users.query.filter_by(id=user_id).first()
     if user:
@@ -65,7 +72,7 @@ def get_user_place(user_id):
     return None
 
 
-@cache.memoize(timeout=300)
+@memoize_tags("standings", lambda user_id: f"standings/user/{user_id}", timeout=300)
 def get_user_score(user_id):
     user = Users.query.filter_by(id=user_id).first()
     if user:
@@ -73,7 +80,7 @@ def get_user_score(user_id):
     return None
 
 
-@cache.memoize(timeout=300)
+@memoize_tags("standings", lambda team_id: f"standings/team/{team_id}", timeout=300)
 def get_team_place(team_id):
     team = Teams.query.filter_by(id=team_id).first()
     if team:
@@ -81,7 +88,7 @@ def get_team_place(team_id):
     return None
 
 
-@cache.memoize(timeout=300)
+@memoize_tags("standings", lambda team_id: f"standings/team/{team_id}", timeout=300)
 def get_team_score(team_id):
     team = Teams.query.filter_by(id=team_id).first()
     if team:
@@ -220,13 +227,103 @@ def get_wrong_submissions_per_minute(account_id):
     """
     Get incorrect submissions per minute.
 
+    The count comes from the application's submission counter. Fails are only loaded from the database
+    the first time an account is seen in a window (e.g. after a restart) so rejecting a burst of
+    submissions doesn't need any SQL.
+
     :param account_id:
     :return:
     """
-    one_min_ago = datetime.datetime.utcnow() + datetime.timedelta(minutes=-1)
-    fails = (
-        db.session.query(Fails)
-        .filter(Fails.account_id == account_id, Fails.date >= one_min_ago)
-        .all()
+
+    def load_fails():
+        one_min_ago = datetime.datetime.utcnow() + datetime.timedelta(minutes=-1)
+        fails = db.session.query(Fails.date).filter(
+            Fails.account_id == account_id, Fails.date >= one_min_ago
+        )
+        return [unix_time(date) for date, in fails]
+
+    dimension = get_config("user_mode")
+    return app.submission_counter.count(
+        WRONG_SUBMISSIONS_KEY % (dimension, account_id), load=load_fails
+    )
+
+
+def get_attempts(account_id, challenge_id):
+    """
+    Get the number of Fails of an account on a challenge along with the unix timestamps of those made
+    within the last max_attempts_timeout seconds.
+
+    Attempts come from the application's attempt counter which is only loaded from Fails when it
+    doesn't track the account and challenge yet.
+    """
+    from CTFd.utils.submissions import get_pending_fails
+
+    def load_attempts():
+        since = datetime.datetime.utcnow() - datetime.timedelta(seconds=keep)
+        fails = Fails.query.filter_by(account_id=account_id, challenge_id=challenge_id)
+        dates = [
+            unix_time(date)
+            for date, in fails.with_entities(Fails.date).filter(Fails.date >= since)
+        ]
+        # Submissions that are written behind are about to be inserted
+        pending = get_pending_fails(account_id, challenge_id)
+        dates += [unix_time(datetime.datetime.utcnow())] * pending
+        return fails.count() + pending, dates
+
+    # Only the timestamps needed for max_attempts_timeout are remembered
+    keep = int(get_config("max_attempts_timeout", 300))
+    dimension = get_config("user_mode")
+    (version,) = get_tag_versions(["attempts"])
+    return app.attempt_counter.get(
+        ATTEMPTS_KEY % (dimension, account_id, challenge_id),
+        load_attempts,
+        version=version,
+        keep=keep,
     )
-    return len(fails)
+
+
+def track_wrong_submissions(session):
+    """
+    Remember the Fails added in a flush so they can be counted once the transaction commits.
+    """
+    wrong = session.info.setdefault("wrong_submissions", [])
+    for obj in session.new:
+        if isinstance(obj, Fails):
+            wrong.append((obj.user_id, obj.team_id, obj.challenge_id, obj.date))
+
+
+def count_wrong_submission(user_id, team_id, challenge_id, date):
+    """
+    Add a wrong submission to the submission counter and the attempt counter of its user and team.
+    """
+    (version,) = get_tag_versions(["attempts"])
+    timestamp = unix_time(date or datetime.datetime.utcnow())
+    for dimension, account_id in (("users", user_id), ("teams", team_id)):
+        if account_id is None:
+            continue
+        app.submission_counter.hit(WRONG_SUBMISSIONS_KEY % (dimension, account_id))
+        app.attempt_counter.add(
+            ATTEMPTS_KEY % (dimension, account_id, challenge_id),
+            timestamp,
+            version=version,
+        )
+
+
+def count_repeated_submission(user_id, team_id):
+    """
+    Add a wrong submission that isn't recorded to the submission counter of its user and team so it's still
+    rate limited.
+    """
+    for dimension, account_id in (("users", user_id), ("teams", team_id)):
+        if account_id is not None:
+            app.submission_counter.hit(WRONG_SUBMISSIONS_KEY % (dimension, account_id))
+
+
+def count_wrong_submissions(session):
+    """
+    Add committed Fails to the counters of their user and team.
+    """
+    for user_id, team_id, challenge_id, date in session.info.pop(
+        "wrong_submissions", ()
+    ):
+        count_wrong_submission(user_id, team_id, challenge_id, date)
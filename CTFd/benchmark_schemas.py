@@ -0,0 +1,52 @@
+"""
+Script comparing schema.dump(...).data with the compiled dump functions of the schemas used by the
+challenge, submission, user and team lists. Run populate.py first to have something to dump.
+"""
+
+import argparse
+import timeit
+
+from CTFd import create_app
+from CTFd.models import Submissions, Tags, Teams, Users
+from CTFd.schemas.compiler import compile_schema
+from CTFd.schemas.submissions import SubmissionSchema
+from CTFd.schemas.tags import TagSchema
+from CTFd.schemas.teams import TeamSchema
+from CTFd.schemas.users import UserSchema
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--limit", help="Amount of rows to dump", default=50, type=int)
+parser.add_argument("--number", help="Amount of dumps to time", default=100, type=int)
+args = parser.parse_args()
+
+app = create_app()
+
+with app.app_context():
+    cases = [
+        (TagSchema, "user", Tags),
+        (SubmissionSchema, "self", Submissions),
+        (UserSchema, "user", Users),
+        (TeamSchema, "user", Teams),
+    ]
+    print(
+        f"{'schema':<20}{'view':<8}{'rows':>6}{'dump':>12}{'compiled':>12}{'speedup':>9}"
+    )
+    for schema_cls, view, model in cases:
+        objs = model.query.limit(args.limit).all()
+        compiled = compile_schema(schema_cls, view=view)
+        expected = schema_cls(view=view, many=True).dump(objs).data
+        assert compiled.dump(objs, many=True).data == expected
+
+        dump = timeit.timeit(
+            lambda s=schema_cls, v=view, o=objs: s(view=v, many=True).dump(o).data,
+            number=args.number,
+        )
+        fast = timeit.timeit(
+            lambda c=compiled, o=objs: c.dump(o, many=True).data,
+            number=args.number,
+        )
+        print(
+            f"{schema_cls.__name__:<20}{view:<8}{len(objs):>6}"
+            f"{dump / args.number * 1000:>10.2f}ms{fast / args.number * 1000:>10.2f}ms"
+            f"{dump / fast if fast else 0:>8.1f}x"
+        )
@@ -0,0 +1,75 @@
+"""Add account_scores table
+
+Revision ID: 3c8b6f0a9d21
+Revises: 24ad6790bc3c
+Create Date: 2026-10-18 09:12:41.503218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "3c8b6f0a9d21"
+down_revision = "24ad6790bc3c"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "account_scores",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("type", sa.String(length=80), nullable=False),
+        sa.Column("account_id", sa.Integer(), nullable=False),
+        sa.Column("score", sa.Integer(), nullable=True),
+        sa.Column("last_id", sa.Integer(), nullable=True),
+        sa.Column("last_date", sa.DateTime(), nullable=True),
+        sa.Column("bracket_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["bracket_id"], ["brackets.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("type", "account_id"),
+    )
+    op.create_index(
+        "ix_account_scores_standings", "account_scores", ["type", "score"], unique=False
+    )
+
+    # Materialize the scores of existing solves and awards
+    connection = op.get_bind()
+    for dimension, column in (("users", "user_id"), ("teams", "team_id")):
+        connection.execute(
+            sa.text(
+                f"""
+                INSERT INTO account_scores (type, account_id, score, last_id, last_date)
+                SELECT '{dimension}', results.account_id, SUM(results.score), MAX(results.id), MAX(results.date)
+                FROM (
+                    SELECT solves.{column} AS account_id, challenges.value AS score, solves.id AS id, submissions.date AS date
+                    FROM solves
+                    JOIN submissions ON submissions.id = solves.id
+                    JOIN challenges ON challenges.id = solves.challenge_id
+                    WHERE challenges.value != 0 AND solves.{column} IS NOT NULL
+                    UNION ALL
+                    SELECT awards.{column} AS account_id, awards.value AS score, awards.id AS id, awards.date AS date
+                    FROM awards
+                    WHERE awards.value != 0 AND awards.{column} IS NOT NULL
+                ) results
+                GROUP BY results.account_id
+                """  # nosec B608
+            )
+        )
+        connection.execute(
+            sa.text(
+                f"""
+                UPDATE account_scores SET bracket_id = (
+                    SELECT {dimension}.bracket_id FROM {dimension}
+                    WHERE {dimension}.id = account_scores.account_id
+                )
+                WHERE account_scores.type = '{dimension}'
+                """  # nosec B608
+            )
+        )
+
+
+def downgrade():
+    op.drop_index("ix_account_scores_standings", table_name="account_scores")
+    op.drop_table("account_scores")
@@ -169,3 +169,43 @@ def test_api_challenges_challenge_with_requirements_no_user():
             assert r.status_code == 200
             assert r.get_json()["data"] == initial_data
     destroy_ctfd(app)
+
+
+def test_prerequisite_graph():
+    """Test that the prerequisite graph ignores missing prerequisites and follows requirement changes"""
+    app = create_ctfd()
+    with app.app_context():
+        from CTFd.utils.challenges import (
+            get_prerequisite_graph,
+            get_unlocked_challenge_ids,
+        )
+
+        first = gen_challenge(app.db)
+        second = gen_challenge(app.db)
+        second.requirements = {"prerequisites": [first.id, 1337]}
+        third = gen_challenge(app.db)
+        third.requirements = {"prerequisites": [second.id]}
+        app.db.session.commit()
+
+        graph = get_prerequisite_graph()
+        assert graph.order == [first.id, second.id, third.id]
+        assert graph.prerequisites[second.id] == {first.id}
+        assert get_unlocked_challenge_ids(set()) == {first.id}
+        assert get_unlocked_challenge_ids({first.id}) == {first.id, second.id}
+        assert graph.is_unlocked(third.id, graph.solve_mask({first.id, second.id}))
+
+        # Cycles can't be unlocked
+        first.requirements = {"prerequisites": [third.id]}
+        app.db.session.commit()
+        assert get_prerequisite_graph() is not graph
+        assert get_unlocked_challenge_ids(set()) == set()
+        assert get_unlocked_challenge_ids({first.id, second.id}) == {
+            second.id,
+            third.id,
+        }
+        assert get_unlocked_challenge_ids({first.id, second.id, third.id}) == {
+            first.id,
+            second.id,
+            third.id,
+        }
+    destroy_ctfd(app)
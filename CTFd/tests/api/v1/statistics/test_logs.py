@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from unittest.mock import patch
+
+from tests.helpers import create_ctfd, destroy_ctfd, login_as_user, register_user
+
+
+def test_api_statistics_logs():
+    """Admins can see the state of the log writer of the worker answering"""
+    app = create_ctfd()
+    with app.app_context():
+        register_user(app)
+        client = login_as_user(app)
+        r = client.get("/api/v1/statistics/logs", json="")
+        assert r.status_code == 403
+
+        stats = {"queue_depth": 3, "dropped": 2, "failed": 1}
+        admin = login_as_user(app, name="admin")
+        with patch("CTFd.api.v1.statistics.logs.get_log_stats", return_value=stats):
+            r = admin.get("/api/v1/statistics/logs")
+            assert r.get_json() == {"success": True, "data": stats}
+
+        with patch("CTFd.admin.statistics.get_log_stats", return_value=stats):
+            r = admin.get("/admin/statistics")
+            assert r.status_code == 200
+            assert "<b>2</b> log records dropped" in r.get_data(as_text=True)
+    destroy_ctfd(app)
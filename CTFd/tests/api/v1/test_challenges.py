@@ -1,9 +1,12 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+from unittest.mock import patch
+
+import pytest
 from freezegun import freeze_time
 
-from CTFd.models import Challenges, Flags, Hints, Solves, Tags, Tracking, Users
+from CTFd.models import Challenges, Fails, Flags, Hints, Solves, Tags, Tracking, Users
 from CTFd.utils import set_config
 from tests.helpers import (
     create_ctfd,
@@ -176,6 +179,113 @@ def test_api_challenges_get_solve_status():
     destroy_ctfd(app)
 
 
+def test_api_challenges_get_board_overlay():
+    """Does the challenge list API add each account's solves and unlocks to the shared challenge board?"""
+    app = create_ctfd()
+    with app.app_context():
+        gen_challenge(app.db)
+        gen_flag(app.db, challenge_id=1, content="flag")
+        chal = gen_challenge(app.db)
+        chal.requirements = {"prerequisites": [1], "anonymize": True}
+        app.db.session.commit()
+        register_user(app)
+        register_user(app, name="user2", email="user2@examplectf.com")
+        client = login_as_user(app)
+        client2 = login_as_user(app, name="user2")
+
+        r = client.get("/api/v1/challenges")
+        data = r.get_json()["data"]
+        assert [c["id"] for c in data] == [1, 2]
+        assert data[1]["type"] == "hidden"
+
+        r = client.post(
+            "/api/v1/challenges/attempt", json={"challenge_id": 1, "submission": "flag"}
+        )
+        assert r.get_json()["data"]["status"] == "correct"
+
+        r = client.get("/api/v1/challenges")
+        data = r.get_json()["data"]
+        assert data[0]["solved_by_me"] is True
+        assert data[0]["solves"] == 1
+        assert data[1]["type"] == "standard"
+        assert data[1]["solved_by_me"] is False
+
+        r = client2.get("/api/v1/challenges")
+        data = r.get_json()["data"]
+        assert data[0]["solved_by_me"] is False
+        assert data[0]["solves"] == 1
+        assert data[1]["type"] == "hidden"
+    destroy_ctfd(app)
+
+
+def test_api_challenges_get_board_overlay_revalidates_session():
+    """Does the challenge list API stop serving an account's overlay to sessions no longer valid for it?"""
+    app = create_ctfd(user_mode="teams")
+    with app.app_context():
+        gen_challenge(app.db)
+        team1 = gen_team(app.db, name="team1", email="team1@examplectf.com")
+        team2 = gen_team(
+            app.db, name="team2", email="team2@examplectf.com", member_count=0
+        )
+        user = team1.members[0]
+        gen_solve(app.db, user_id=user.id, team_id=team1.id, challenge_id=1)
+        user_id, team2_id = user.id, team2.id
+        client = login_as_user(app, name=user.name)
+
+        r = client.get("/api/v1/challenges")
+        assert r.get_json()["data"][0]["solved_by_me"] is True
+
+        # The user's cached attributes still say team1 after moving to team2
+        user = Users.query.filter_by(id=user_id).first()
+        user.team_id = team2_id
+        app.db.session.commit()
+        r = client.get("/api/v1/challenges")
+        assert r.status_code == 200
+        assert r.get_json()["data"][0]["solved_by_me"] is False
+
+        # Changing the password invalidates other sessions
+        user = Users.query.filter_by(id=user_id).first()
+        user.password = "newpassword"
+        app.db.session.commit()
+        r = client.get("/api/v1/challenges", json="")
+        assert r.status_code == 401
+    destroy_ctfd(app)
+
+
+def test_api_challenges_get_conditional():
+    """Does the challenge list API answer 304 until something the account sees changes?"""
+    app = create_ctfd()
+    with app.app_context():
+        chal_id = gen_challenge(app.db).id
+        gen_flag(app.db, challenge_id=chal_id, content="flag")
+        register_user(app)
+        register_user(app, name="user2", email="user2@examplectf.com")
+        client = login_as_user(app)
+        client2 = login_as_user(app, name="user2")
+
+        r = client.get("/api/v1/challenges")
+        etag = r.headers["ETag"]
+        r = client.get("/api/v1/challenges", headers={"If-None-Match": etag})
+        assert r.status_code == 304
+        # ETags are per user
+        r = client2.get("/api/v1/challenges", headers={"If-None-Match": etag})
+        assert r.status_code == 200
+
+        client.post(
+            "/api/v1/challenges/attempt",
+            json={"challenge_id": chal_id, "submission": "flag"},
+        )
+        r = client.get("/api/v1/challenges", headers={"If-None-Match": etag})
+        assert r.status_code == 200
+        assert r.get_json()["data"][0]["solved_by_me"] is True
+
+        etag = r.headers["ETag"]
+        set_config("challenge_visibility", "public")
+        r = client.get("/api/v1/challenges", headers={"If-None-Match": etag})
+        assert r.status_code == 200
+    destroy_ctfd(app)
+
+
 def test_api_challenges_get_solve_count():
     """Does the challenge list API show the solve count?"""
     # This is checked with public requests against the API after each generated
@@ -1031,6 +1141,120 @@ def test_api_challenge_attempt_post_admin():
     destroy_ctfd(app)
 
 
+def test_api_challenge_attempt_bulk_post():
+    """Can an admin judge many attempts with /api/v1/challenges/attempt/bulk"""
+    app = create_ctfd()
+    with app.app_context():
+        gen_challenge(app.db)
+        gen_flag(app.db, 1)
+        register_user(app)
+        register_user(app, name="user2", email="user2@examplectf.com")
+        attempts = [
+            {"user_id": 2, "challenge_id": 1, "submission": "wrong_flag"},
+            {"user_id": 2, "challenge_id": 1, "submission": "flag"},
+            {"user_id": 2, "challenge_id": 1, "submission": "flag"},
+            {"user_id": 3, "challenge_id": 1, "submission": "flag", "ip": "10.0.0.1"},
+            {"user_id": 4, "challenge_id": 1, "submission": "flag"},
+        ]
+
+        with login_as_user(app) as client:
+            r = client.post("/api/v1/challenges/attempt/bulk", json={"attempts": []})
+            assert r.status_code == 403
+
+        with login_as_user(app, "admin") as client:
+            r = client.post("/api/v1/challenges/attempt/bulk", json={"attempts": []})
+            assert r.status_code == 400
+            r = client.post(
+                "/api/v1/challenges/attempt/bulk",
+                json={"attempts": [{"user_id": 2, "challenge_id": 1}]},
+            )
+            assert r.status_code == 400
+
+            r = client.post(
+                "/api/v1/challenges/attempt/bulk", json={"attempts": attempts}
+            )
+            assert r.status_code == 200
+            statuses = [result["status"] for result in r.get_json()["data"]]
+            assert statuses == [
+                "incorrect",
+                "correct",
+                "already_solved",
+                "correct",
+                "not_found",
+            ]
+
+        assert Fails.query.count() == 1
+        assert Solves.query.count() == 2
+        assert Solves.query.filter_by(user_id=3).first().ip == "10.0.0.1"
+        assert Users.query.filter_by(id=2).first().get_score() == 100
+    destroy_ctfd(app)
+
+
+def test_api_challenge_attempt_bulk_post_validation():
+    """Are bulk attempts with values of the wrong type rejected before they are judged"""
+    app = create_ctfd()
+    with app.app_context():
+        gen_challenge(app.db)
+        gen_flag(app.db, 1)
+        register_user(app)
+        with login_as_user(app, "admin") as client:
+            for attempt in (
+                {"user_id": 2, "challenge_id": 1, "submission": 1234},
+                {"user_id": 2, "challenge_id": {"id": 1}, "submission": "flag"},
+                {"user_id": [2], "challenge_id": 1, "submission": "flag"},
+                {"user_id": True, "challenge_id": 1, "submission": "flag"},
+                {"user_id": 2, "challenge_id": 1, "submission": "flag", "ip": 1},
+            ):
+                r = client.post(
+                    "/api/v1/challenges/attempt/bulk", json={"attempts": [attempt]}
+                )
+                assert r.status_code == 400
+        assert Solves.query.count() == 0
+    destroy_ctfd(app)
+
+
+def test_api_challenge_attempt_bulk_post_rollback():
+    """Are solves of a bulk attempt that is rolled back never published to the standings"""
+    app = create_ctfd()
+    with app.app_context():
+        from CTFd.plugins.challenges import CTFdStandardChallenge
+        from CTFd.utils.scores import engine as standings_engine
+        from CTFd.utils.scores import get_standings
+
+        gen_challenge(app.db)
+        gen_flag(app.db, 1)
+        register_user(app)
+        register_user(app, name="user2", email="user2@examplectf.com")
+        attempts = [
+            {"user_id": 2, "challenge_id": 1, "submission": "flag"},
+            {"user_id": 3, "challenge_id": 1, "submission": "wrong_flag"},
+        ]
+
+        def fail(*args, **kwargs):
+            raise RuntimeError("fail")
+
+        get_standings()
+        events = (
+            app.cache.get(standings_engine.SEQUENCE_KEY),
+            app.cache.get(standings_engine.EPOCH_KEY),
+        )
+        with login_as_user(app, "admin") as client:
+            with patch.object(CTFdStandardChallenge, "fail", fail):
+                with pytest.raises(RuntimeError):
+                    client.post(
+                        "/api/v1/challenges/attempt/bulk", json={"attempts": attempts}
+                    )
+
+        # Nothing was published for other workers to replay
+        assert events == (
+            app.cache.get(standings_engine.SEQUENCE_KEY),
+            app.cache.get(standings_engine.EPOCH_KEY),
+        )
+        assert Solves.query.count() == 0
+        assert get_standings() == []
+    destroy_ctfd(app)
+
+
 def test_api_challenge_get_solves_visibility_public():
     """Can a public user get /api/v1/challenges/<challenge_id>/solves if challenge_visibility is private/public"""
     app = create_ctfd()
@@ -1272,6 +1496,57 @@ def test_api_challenge_solves_returns_correct_data():
     destroy_ctfd(app)
 
 
+def test_api_challenge_solves_paginated():
+    """Test that /api/v1/challenges/<challenge_id>/solves is paginated by cursor and streamed to admins"""
+    app = create_ctfd()
+    with app.app_context():
+        from CTFd.utils.challenges import SOLVES_PER_PAGE
+
+        chal_id = gen_challenge(app.db).id
+        for i in range(SOLVES_PER_PAGE + 5):
+            user = gen_user(app.db, name=f"user{i}", email=f"user{i}@examplectf.com")
+            gen_solve(app.db, user_id=user.id, challenge_id=chal_id)
+        register_user(app)
+        client = login_as_user(app)
+
+        r = client.get(f"/api/v1/challenges/{chal_id}/solves")
+        data = r.get_json()
+        assert len(data["data"]) == SOLVES_PER_PAGE
+        assert data["data"][0]["name"] == "user0"
+        assert data["data"][0]["account_url"] == "/users/2"
+        pagination = data["meta"]["pagination"]
+        assert pagination["total"] == SOLVES_PER_PAGE + 5
+
+        r = client.get(
+            f"/api/v1/challenges/{chal_id}/solves?after={pagination['next']}"
+        )
+        data = r.get_json()
+        assert [s["name"] for s in data["data"]] == [
+            f"user{i}" for i in range(SOLVES_PER_PAGE, SOLVES_PER_PAGE + 5)
+        ]
+        assert data["meta"]["pagination"]["next"] is None
+
+        # New solves are counted right away
+        user_id = Users.query.filter_by(name="user").first().id
+        gen_solve(app.db, user_id=user_id, challenge_id=chal_id)
+        r = client.get(f"/api/v1/challenges/{chal_id}/solves")
+        assert r.get_json()["meta"]["pagination"]["total"] == SOLVES_PER_PAGE + 6
+
+        # Only admins can get every solve at once
+        r = client.get(f"/api/v1/challenges/{chal_id}/solves?stream=true")
+        assert len(r.get_json()["data"]) == SOLVES_PER_PAGE
+        admin = login_as_user(app, name="admin")
+        r = admin.get(f"/api/v1/challenges/{chal_id}/solves?stream=true")
+        data = r.get_json()
+        assert data["success"] is True
+        assert len(data["data"]) == SOLVES_PER_PAGE + 6
+        assert data["data"][-1]["name"] == "user"
+        for value in ("false", "0"):
+            r = admin.get(f"/api/v1/challenges/{chal_id}/solves?stream={value}")
+            assert len(r.get_json()["data"]) == SOLVES_PER_PAGE
+    destroy_ctfd(app)
+
+
 def test_api_challenge_get_files_non_admin():
     """Can a user get /api/v1/challenges/<challenge_id>/files if not admin"""
     app = create_ctfd()
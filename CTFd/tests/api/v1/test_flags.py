@@ -8,6 +8,7 @@ from tests.helpers import (
     gen_challenge,
     gen_flag,
     login_as_user,
+    register_user,
 )
 
 
@@ -238,3 +239,81 @@ def test_flag_content_not_stripped_on_other_types():
 
             f = Flags.query.filter_by(id=flag_id).first()
             assert f.content == "   updated_custom_flag   "
+
+
+def test_flag_matchers_follow_flag_changes():
+    """Test that submissions are judged against cached flag matchers which follow changes from the flags API"""
+    app = create_ctfd()
+    with app.app_context():
+        from CTFd.plugins.flags import get_flag_matchers
+
+        chal_id = gen_challenge(app.db).id
+        register_user(app)
+        admin = login_as_user(app, "admin")
+        user = login_as_user(app)
+
+        def attempt(submission):
+            data = {"submission": submission, "challenge_id": chal_id}
+            r = user.post("/api/v1/challenges/attempt", json=data)
+            return r.get_json()["data"]["status"]
+
+        r = admin.post(
+            "/api/v1/flags",
+            json={
+                "content": r"flag\{\d+\}",
+                "type": "regex",
+                "data": "case_insensitive",
+                "challenge": chal_id,
+            },
+        )
+        flag_id = r.get_json()["data"]["id"]
+        (matcher,) = get_flag_matchers(chal_id)
+        assert matcher.compiled.pattern == r"flag\{\d+\}"
+        assert get_flag_matchers(chal_id)[0] is matcher
+        assert attempt("flag{abc}") == "incorrect"
+
+        admin.patch(f"/api/v1/flags/{flag_id}", json={"content": r"flag\{\w+\}"})
+        assert get_flag_matchers(chal_id)[0] is not matcher
+        assert attempt("FLAG{abc}") == "correct"
+
+        admin.delete(f"/api/v1/flags/{flag_id}", json="")
+        assert get_flag_matchers(chal_id) == []
+    destroy_ctfd(app)
+
+
+def test_flag_types_without_compile_are_compared_with_their_row():
+    """Test that flag types which don't compile() their flags are given the Flags row in compare()"""
+    app = create_ctfd()
+    with app.app_context():
+        from CTFd.plugins.flags import FLAG_CLASSES, get_flag_matchers
+
+        class ChallengeNameFlag(object):
+            name = "challenge_name"
+            templates = {}
+
+            @staticmethod
+            def compare(chal_key_obj, provided):
+                # Relationships are only available on the row
+                return (
+                    provided == f"{chal_key_obj.challenge.name}:{chal_key_obj.content}"
+                )
+
+        FLAG_CLASSES["challenge_name"] = ChallengeNameFlag
+        try:
+            chal_id = gen_challenge(app.db).id
+            gen_flag(app.db, challenge_id=chal_id, content="flag", type="static")
+            gen_flag(app.db, challenge_id=chal_id, content="1", type="challenge_name")
+            register_user(app)
+            user = login_as_user(app)
+
+            for _ in range(2):
+                static, custom = get_flag_matchers(chal_id)
+                assert static.compiled is None
+                assert isinstance(custom, Flags)
+
+            data = {"submission": "chal_name:1", "challenge_id": chal_id}
+            r = user.post("/api/v1/challenges/attempt", json=data)
+            assert r.get_json()["data"]["status"] == "correct"
+        finally:
+            del FLAG_CLASSES["challenge_name"]
+    destroy_ctfd(app)
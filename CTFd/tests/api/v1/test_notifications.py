@@ -79,3 +79,27 @@ def test_api_delete_notifications_by_user():
             assert r.status_code == 403
         assert Notifications.query.count() == 1
     destroy_ctfd(app)
+
+
+def test_api_notifications_conditional_get():
+    """Can clients revalidate /api/v1/notifications with an ETag?"""
+    app = create_ctfd()
+    with app.app_context():
+        register_user(app)
+        gen_notification(app.db)
+        with login_as_user(app) as client:
+            r = client.get("/api/v1/notifications")
+            etag = r.headers["ETag"]
+            r = client.get("/api/v1/notifications", headers={"If-None-Match": etag})
+            assert r.status_code == 304
+
+        with login_as_user(app, "admin") as admin:
+            admin.post(
+                "/api/v1/notifications", json={"title": "title", "content": "content"}
+            )
+
+        with login_as_user(app) as client:
+            r = client.get("/api/v1/notifications", headers={"If-None-Match": etag})
+            assert r.status_code == 200
+            assert len(r.get_json()["data"]) == 2
+    destroy_ctfd(app)
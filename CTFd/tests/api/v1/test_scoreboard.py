@@ -1,6 +1,8 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+from unittest.mock import patch
+
 from flask import jsonify
 
 from CTFd.cache import clear_standings
@@ -24,6 +26,8 @@ def test_scoreboard_is_cached():
     """Test that /api/v1/scoreboard is properly cached and cleared"""
     app = create_ctfd()
     with app.app_context():
+        from CTFd.api.v1.scoreboard import make_standings_cache_key
+
         # create user1
         register_user(app, name="user1", email="user1@examplectf.com")
 
@@ -35,31 +39,45 @@ def test_scoreboard_is_cached():
         # create a solve for the challenge for user1. (the id is 2 because of the admin)
         gen_solve(app.db, user_id=2, challenge_id=chal_id)
 
-        # Initial get_scoreboard_detail cache key version
-        saved = app.cache.get("CTFd.utils.scoreboard.get_scoreboard_detail_memver")
+        # Initial version of the standings tag get_scoreboard_detail is cached against
+        saved = app.cache.get("tags/standings")
 
         with login_as_user(app, "user1") as client:
             # Check basic scoreboard data
-            assert app.cache.get("view/api.scoreboard_scoreboard_list") is None
-            client.get("/api/v1/scoreboard")
-            assert app.cache.get("view/api.scoreboard_scoreboard_list")
+            key = make_standings_cache_key(path="api.scoreboard_scoreboard_list")
+            assert app.cache.get(key) is None
+            first = client.get("/api/v1/scoreboard").get_json()
+            assert first["data"][0]["score"] == 100
+            assert app.cache.get(key)
+
+            # The second request is answered from the cached response
+            with patch(
+                "CTFd.api.v1.scoreboard.get_standings", side_effect=AssertionError
+            ):
+                assert client.get("/api/v1/scoreboard").get_json() == first
 
             # Check detailed scoreboard data
             orig = jsonify(get_scoreboard_detail.uncached(count=10)).get_json()
-            assert (
-                app.cache.get("CTFd.utils.scoreboard.get_scoreboard_detail_memver")
-                == saved
-            )
+            assert app.cache.get("tags/standings") == saved
             cached = client.get("/api/v1/scoreboard/top/10").get_json()
             assert cached["data"] == orig
-            assert app.cache.get("CTFd.utils.scoreboard.get_scoreboard_detail_memver")
+            assert app.cache.get("tags/standings")
 
             # Empty standings and check that the cached data is gone
+            gen_award(app.db, user_id=2, value=50)
             clear_standings()
-            assert app.cache.get("view/api.scoreboard_scoreboard_list") is None
-            # Clearing an entire function bumps flask-cachings version identify instead of setting it to null
-            new = app.cache.get("CTFd.utils.scoreboard.get_scoreboard_detail_memver")
+            assert app.cache.get(key) is None
+            # Invalidating a tag gives it a new version instead of setting it to null
+            new = app.cache.get("tags/standings")
             assert new != saved
+            new_key = make_standings_cache_key(path="api.scoreboard_scoreboard_list")
+            assert new_key != key
+            assert app.cache.get(new_key) is None
+
+            # The next request is cached under the new version with the new standings
+            r = client.get("/api/v1/scoreboard").get_json()
+            assert r["data"][0]["score"] == 150
+            assert app.cache.get(new_key)
     destroy_ctfd(app)
 
 
@@ -191,3 +209,65 @@ def test_scoreboard_detail_returns_different_counts():
             assert top_1_resp == client.get("/api/v1/scoreboard/top/1").get_json()
 
     destroy_ctfd(app)
+
+
+def test_scoreboard_conditional_get():
+    """Test that the scoreboard answers 304 until the standings change"""
+    app = create_ctfd()
+    with app.app_context():
+        register_user(app)
+        chal_id = gen_challenge(app.db).id
+        gen_flag(app.db, challenge_id=chal_id, content="flag")
+        with login_as_user(app) as client:
+            for url in ("/api/v1/scoreboard", "/api/v1/scoreboard/top/10"):
+                r = client.get(url)
+                assert r.status_code == 200
+                etag = r.headers["ETag"]
+                r = client.get(url, headers={"If-None-Match": etag})
+                assert r.status_code == 304
+                assert r.headers["ETag"] == etag
+
+            etags = [
+                client.get(url).headers["ETag"]
+                for url in ("/api/v1/scoreboard", "/api/v1/scoreboard/top/10")
+            ]
+            r = client.post(
+                "/api/v1/challenges/attempt",
+                json={"challenge_id": chal_id, "submission": "flag"},
+            )
+            assert r.get_json()["data"]["status"] == "correct"
+            r = client.get("/api/v1/scoreboard", headers={"If-None-Match": etags[0]})
+            assert r.status_code == 200
+            assert r.get_json()["data"][0]["score"] == 100
+            r = client.get(
+                "/api/v1/scoreboard/top/10", headers={"If-None-Match": etags[1]}
+            )
+            assert r.status_code == 200
+    destroy_ctfd(app)
+
+
+def test_scoreboard_conditional_get_follows_account_changes():
+    """Test that account changes without score changes and If-Modified-Since are answered correctly"""
+    app = create_ctfd()
+    with app.app_context():
+        register_user(app)
+        chal_id = gen_challenge(app.db).id
+        gen_solve(app.db, user_id=2, challenge_id=chal_id)
+        clear_standings()
+        with login_as_user(app) as client:
+            r = client.get("/api/v1/scoreboard")
+            etag = r.headers["ETag"]
+            last_modified = r.headers["Last-Modified"]
+            r = client.get(
+                "/api/v1/scoreboard", headers={"If-Modified-Since": last_modified}
+            )
+            assert r.status_code == 304
+
+            # Renames are published as account events without clearing the standings
+            user = Users.query.filter_by(id=2).first()
+            user.name = "renamed"
+            app.db.session.commit()
+            r = client.get("/api/v1/scoreboard", headers={"If-None-Match": etag})
+            assert r.status_code == 200
+            assert r.get_json()["data"][0]["name"] == "renamed"
+    destroy_ctfd(app)
@@ -1,11 +1,24 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from CTFd.cache import clear_all_user_sessions, clear_user_session
+from CTFd.cache import (
+    clear_all_user_sessions,
+    clear_user_session,
+    get_tag_versions,
+    invalidate,
+    memoize_tags,
+)
 from CTFd.models import Users
 from CTFd.utils.security.auth import login_user
 from CTFd.utils.user import get_current_user, is_admin
-from tests.helpers import create_ctfd, destroy_ctfd, register_user
+from tests.helpers import (
+    create_ctfd,
+    destroy_ctfd,
+    gen_challenge,
+    gen_flag,
+    login_as_user,
+    register_user,
+)
 
 
 def test_clear_user_session():
@@ -64,3 +77,60 @@ def test_clear_all_user_sessions():
             # Should now return True after clearing cache
             assert is_admin() is True
     destroy_ctfd(app)
+
+
+def test_memoize_tags():
+    """Results memoized with memoize_tags are only recomputed when one of their tags is invalidated"""
+    app = create_ctfd()
+    with app.app_context():
+        calls = []
+
+        @memoize_tags("solves", lambda account_id: f"submissions/account/{account_id}")
+        def submissions(account_id):
+            calls.append(account_id)
+            return None
+
+        assert submissions(1) is None
+        assert submissions(1) is None
+        assert submissions(2) is None
+        assert calls == [1, 2]
+
+        invalidate("submissions/account/1")
+        submissions(1)
+        submissions(2)
+        assert calls == [1, 2, 1]
+
+        invalidate("standings")
+        submissions(1)
+        assert calls == [1, 2, 1]
+
+        invalidate("solves")
+        submissions(1)
+        submissions(2)
+        assert calls == [1, 2, 1, 1, 2]
+    destroy_ctfd(app)
+
+
+def test_wrong_submission_only_clears_account_submissions():
+    """A wrong flag must not flush the scoreboard and challenge caches"""
+    app = create_ctfd()
+    with app.app_context():
+        register_user(app)
+        chal = gen_challenge(app.db)
+        gen_flag(app.db, challenge_id=chal.id, content="flag")
+        chal_id = chal.id
+
+        tags = ["standings", "challenges", "solves", "submissions"]
+        before = get_tag_versions(tags)
+        account = get_tag_versions(["submissions/account/2"])
+
+        with login_as_user(app) as client:
+            r = client.post(
+                "/api/v1/challenges/attempt",
+                json={"challenge_id": chal_id, "submission": "wrong"},
+            )
+            assert r.get_json()["data"]["status"] == "incorrect"
+
+        assert get_tag_versions(tags) == before
+        assert get_tag_versions(["submissions/account/2"]) != account
+    destroy_ctfd(app)
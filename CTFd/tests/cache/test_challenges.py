@@ -126,3 +126,34 @@ def test_deleting_solve_clears_cache():
             assert len(solves) == 0
             assert solve_counts.get(1) is None
     destroy_ctfd(app)
+
+
+def test_banning_account_clears_cache_solve_counts():
+    """
+    Test that banning or hiding an account clears out the solve count cache
+    """
+    app = create_ctfd()
+    with app.app_context():
+        register_user(app)
+        user = Users.query.filter_by(id=2).first()
+        simulate_user_activity(app.db, user)
+        from CTFd.utils.challenges import get_solve_counts_for_challenges
+
+        assert get_solve_counts_for_challenges()[1] == 1
+
+        with login_as_user(app, name="admin", password="password") as admin:
+            r = admin.patch("/api/v1/users/2", json={"banned": True})
+            assert r.status_code == 200
+        assert get_solve_counts_for_challenges().get(1) is None
+
+        user = Users.query.filter_by(id=2).first()
+        user.banned = False
+        user.hidden = True
+        app.db.session.commit()
+        assert get_solve_counts_for_challenges().get(1) is None
+
+        user = Users.query.filter_by(id=2).first()
+        user.hidden = False
+        app.db.session.commit()
+        assert get_solve_counts_for_challenges()[1] == 1
+    destroy_ctfd(app)
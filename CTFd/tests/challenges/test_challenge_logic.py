@@ -5,6 +5,7 @@ from CTFd.models import Challenges
 from tests.helpers import (
     create_ctfd,
     destroy_ctfd,
+    gen_challenge,
     gen_flag,
     gen_team,
     login_as_user,
@@ -224,6 +225,42 @@ def test_group_flags_challenge_logic_teams_mode():
     destroy_ctfd(app)
 
 
+def test_all_flags_challenge_logic_tracks_captured_flags():
+    """Test that flags captured by an account are tracked and rebuilt from Partials when they aren't"""
+    app = create_ctfd()
+    with app.app_context():
+        from CTFd.plugins.challenges.logic import get_captures_version
+        from CTFd.utils.counters import CaptureTracker
+
+        # The simple cache isn't shared so captures are tracked by an in-process tracker
+        app.capture_tracker = CaptureTracker()
+        register_user(app, name="user1")
+        chal = gen_challenge(app.db)
+        chal_id = chal.id
+        chal.logic = "all"
+        app.db.session.commit()
+        for content in ["flag{one}", "flag{two}", "flag{three}"]:
+            gen_flag(app.db, challenge_id=chal_id, content=content)
+
+        client = login_as_user(app, name="user1", password="password")
+        for content in ["flag{one}", "flag{one}", "flag{two}"]:
+            submission = {"challenge_id": chal_id, "submission": content}
+            r = client.post("/api/v1/challenges/attempt", json=submission)
+            assert r.get_json()["data"]["status"] == "partial"
+
+        captured = app.capture_tracker.get(
+            f"all/users/2/{chal_id}", lambda: [], version=get_captures_version()
+        )
+        assert captured == {1, 2}
+
+        # A lost tracker is rebuilt from Partials
+        app.capture_tracker = CaptureTracker()
+        submission = {"challenge_id": chal_id, "submission": "flag{three}"}
+        r = client.post("/api/v1/challenges/attempt", json=submission)
+        assert r.get_json()["data"]["status"] == "correct"
+    destroy_ctfd(app)
+
+
 def test_challenge_default_logic_is_any():
     """Test that the default logic for a challenge is 'any'"""
     app = create_ctfd()
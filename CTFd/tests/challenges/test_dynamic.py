@@ -1,8 +1,17 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+from unittest.mock import patch
+
 from CTFd.models import Challenges
-from CTFd.plugins.dynamic_challenges import DynamicChallenge, DynamicValueChallenge
+from CTFd.plugins.dynamic_challenges import (
+    RECALCULATED_KEY,
+    DynamicChallenge,
+    DynamicValueChallenge,
+    decay,
+)
+from CTFd.utils.scores import get_standings
+from CTFd.utils.scores.engine import get_engine
 from CTFd.utils.security.signing import hmac
 from tests.helpers import (
     FakeRequest,
@@ -400,3 +409,153 @@ def test_dynamic_challenge_linear_loses_value_properly():
                 else:
                     assert chal.value == (chal.initial - (i * 5))
     destroy_ctfd(app)
+
+
+def test_dynamic_challenge_decay_uses_solve_counter():
+    """Solves update the challenge's solve counter and its solvers' scores without rebuilding the standings"""
+    app = create_ctfd(enable_plugins=True)
+    with app.app_context():
+        challenge_data = {
+            "name": "name",
+            "category": "category",
+            "description": "description",
+            "function": "linear",
+            "initial": 100,
+            "decay": 10,
+            "minimum": 1,
+            "state": "visible",
+            "type": "dynamic",
+        }
+        req = FakeRequest(form=challenge_data)
+        challenge = DynamicValueChallenge.create(req)
+        challenge_id = challenge.id
+        gen_flag(app.db, challenge_id=challenge_id, content="flag")
+
+        def solve(user_id):
+            user = gen_user(
+                app.db, name=f"user{user_id}", email=f"user{user_id}@examplectf.com"
+            )
+            with app.test_client() as client:
+                with client.session_transaction() as sess:
+                    sess["id"] = user.id
+                    sess["nonce"] = "fake-nonce"
+                    sess["hash"] = hmac(user.password)
+                data = {"submission": "flag", "challenge_id": challenge_id}
+                r = client.post("/api/v1/challenges/attempt", json=data)
+                assert r.get_json()["data"]["status"] == "correct"
+
+        solve(2)
+        # Make sure the standings are loaded before counting rebuilds
+        assert [s.score for s in get_standings()] == [100]
+
+        counts = []
+        get_solve_count = decay.get_solve_count
+        decay.get_solve_count = lambda challenge: counts.append(challenge.id)
+        engine = get_engine()
+        rebuilds = []
+        engine.rebuild = lambda epoch: rebuilds.append(epoch)
+        try:
+            solve(3)
+            solve(4)
+            assert counts == []
+            assert rebuilds == []
+            assert Challenges.query.filter_by(id=challenge_id).first().value == 80
+            assert [s.score for s in get_standings()] == [80, 80, 80]
+        finally:
+            decay.get_solve_count = get_solve_count
+            del engine.rebuild
+
+        # Solves within the decay interval are coalesced into the next recalculation
+        app.config["DYNAMIC_CHALLENGE_DECAY_INTERVAL"] = 60
+        scheduled = []
+        with patch(
+            "CTFd.plugins.dynamic_challenges.spawn_later",
+            lambda seconds, f: scheduled.append((seconds, f)),
+        ):
+            solve(5)
+            assert Challenges.query.filter_by(id=challenge_id).first().value == 70
+            solve(6)
+            solve(7)
+        assert Challenges.query.filter_by(id=challenge_id).first().value == 70
+        assert [seconds for seconds, _ in scheduled] == [60]
+
+        # Viewing the challenge doesn't write its held back value
+        with login_as_user(app, name="admin") as client:
+            r = client.get(f"/api/v1/challenges/{challenge_id}")
+            assert r.status_code == 200
+        assert Challenges.query.filter_by(id=challenge_id).first().value == 70
+
+        # The held back value is applied once the interval passed
+        app.cache.delete(RECALCULATED_KEY % challenge_id)
+        scheduled[0][1]()
+        assert Challenges.query.filter_by(id=challenge_id).first().value == 50
+        assert {s.score for s in get_standings()} == {50}
+    destroy_ctfd(app)
+
+
+def test_dynamic_challenge_solve_counter_follows_admin_solves():
+    """Solves added by admins are added to the solve counter once they are committed"""
+    app = create_ctfd(enable_plugins=True)
+    with app.app_context():
+        challenge_data = {
+            "name": "name",
+            "category": "category",
+            "description": "description",
+            "function": "linear",
+            "initial": 100,
+            "decay": 10,
+            "minimum": 1,
+            "state": "visible",
+            "type": "dynamic",
+        }
+        challenge = DynamicValueChallenge.create(FakeRequest(form=challenge_data))
+        challenge_id = challenge.id
+        user_ids = [
+            gen_user(app.db, name=f"user{i}", email=f"user{i}@examplectf.com").id
+            for i in range(3)
+        ]
+        hidden = gen_user(app.db, name="hidden", email="hidden@examplectf.com")
+        hidden.hidden = True
+        app.db.session.commit()
+        hidden_id = hidden.id
+
+        def solve_count():
+            challenge = DynamicChallenge.query.filter_by(id=challenge_id).first()
+            return decay.get_cached_solve_count(challenge)
+
+        assert solve_count() == 0
+
+        with login_as_user(app, name="admin") as admin:
+            for user_id in (user_ids[0], hidden_id):
+                r = admin.post(
+                    "/api/v1/submissions",
+                    json={
+                        "provided": "flag",
+                        "user_id": user_id,
+                        "challenge_id": challenge_id,
+                        "type": "correct",
+                    },
+                )
+                assert r.status_code == 200
+            # Solves by hidden accounts don't count towards the decay
+            assert solve_count() == 1
+
+            r = admin.post(
+                "/api/v1/submissions",
+                json={
+                    "provided": "flag",
+                    "user_id": user_ids[1],
+                    "challenge_id": challenge_id,
+                    "type": "incorrect",
+                },
+            )
+            submission_id = r.get_json()["data"]["id"]
+            r = admin.patch(
+                f"/api/v1/submissions/{submission_id}", json={"type": "correct"}
+            )
+            assert r.status_code == 200
+            assert solve_count() == 2
+        assert solve_count() == decay.get_solve_count(
+            DynamicChallenge.query.filter_by(id=challenge_id).first()
+        )
+    destroy_ctfd(app)
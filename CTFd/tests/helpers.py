@@ -49,6 +49,7 @@ from CTFd.models import (
     Users,
 )
 from CTFd.utils import set_config
+from CTFd.utils.logging import stop_log_writer
 from tests.constants.time import FreezeTimes
 
 text_type = str
@@ -200,6 +201,7 @@ def destroy_ctfd(app):
     with app.app_context():
         gc.collect()  # Garbage collect (necessary in the case of dataset freezes to clean database connections)
         cache.clear()
+        stop_log_writer()
         drop_database(app.config["SQLALCHEMY_DATABASE_URI"])
 
 
@@ -0,0 +1,67 @@
+from CTFd.models import (
+    Submissions,
+    Tags,
+    TeamFieldEntries,
+    Teams,
+    UserFieldEntries,
+    Users,
+)
+from CTFd.schemas.compiler import compile_schema
+from CTFd.schemas.submissions import SubmissionSchema
+from CTFd.schemas.tags import TagSchema
+from CTFd.schemas.teams import TeamSchema
+from CTFd.schemas.users import UserSchema
+from tests.helpers import (
+    create_ctfd,
+    destroy_ctfd,
+    gen_challenge,
+    gen_fail,
+    gen_field,
+    gen_solve,
+    gen_tag,
+    gen_team,
+)
+
+
+def test_compiled_schemas_match_schema_dump():
+    """Test that compiled schemas dump the same data as their schemas for every view"""
+    app = create_ctfd(user_mode="teams")
+    with app.app_context():
+        chal_id = gen_challenge(app.db).id
+        gen_tag(app.db, challenge_id=chal_id, value="crypto")
+        gen_tag(app.db, challenge_id=chal_id, value="web")
+        team = gen_team(app.db)
+        gen_team(app.db, name="team2", email="team2@examplectf.com", member_count=1)
+        public = gen_field(app.db, name="Public")
+        private = gen_field(app.db, name="Private", public=False, editable=False)
+        team_field = gen_field(app.db, name="Team", type="team", public=False)
+        for user in team.members:
+            for field in (public, private):
+                app.db.session.add(
+                    UserFieldEntries(field_id=field.id, user_id=user.id, value="value")
+                )
+        app.db.session.add(
+            TeamFieldEntries(field_id=team_field.id, team_id=team.id, value="value")
+        )
+        app.db.session.commit()
+        user_id = team.members[0].id
+        gen_fail(app.db, user_id=user_id, team_id=team.id, challenge_id=chal_id)
+        gen_solve(app.db, user_id=user_id, team_id=team.id, challenge_id=chal_id)
+
+        cases = [
+            (TagSchema, Tags.query.all(), ["id", "value"]),
+            (SubmissionSchema, Submissions.query.all(), ["id", "date", "user"]),
+            (UserSchema, Users.query.all(), ["id", "name", "fields"]),
+            (TeamSchema, Teams.query.all(), ["id", "members"]),
+        ]
+        for schema_cls, objs, fields in cases:
+            for view in list(schema_cls.views) + [None, fields]:
+                expected = schema_cls(view=view, many=True).dump(objs).data
+                compiled = compile_schema(schema_cls, view=view)
+                assert compiled.dump(objs, many=True).data == expected
+                assert compiled.dump(objs[0]).data == expected[0]
+
+        # Fields that aren't public are hidden from other users
+        data = compile_schema(UserSchema, view="user").dump(team.members[0]).data
+        assert [f["name"] for f in data["fields"]] == ["Public"]
+    destroy_ctfd(app)
@@ -324,6 +324,105 @@ def test_challenges_with_max_attempts_timeout_behavior():
     destroy_ctfd(app)
 
 
+def test_challenges_max_attempts_use_attempt_counter():
+    """Test that max_attempts is answered from the attempt counter which is rebuilt from Fails"""
+    app = create_ctfd()
+    with app.app_context():
+        from CTFd.utils.counters import AttemptCounter
+
+        # The simple cache isn't shared so attempts are tracked by an in-process counter
+        app.attempt_counter = AttemptCounter()
+        register_user(app)
+        client = login_as_user(app)
+        chal = gen_challenge(app.db)
+        chal_id = chal.id
+        chal.max_attempts = 2
+        app.db.session.commit()
+        gen_flag(app.db, challenge_id=chal_id, content="flag")
+
+        for _ in range(2):
+            data = {"submission": "notflag", "challenge_id": chal_id}
+            r = client.post("/api/v1/challenges/attempt", json=data)
+            assert r.status_code == 200
+
+        # The counter keeps answering once it's loaded
+        Fails.query.delete()
+        app.db.session.commit()
+        data = {"submission": "flag", "challenge_id": chal_id}
+        r = client.post("/api/v1/challenges/attempt", json=data)
+        assert r.status_code == 403
+        assert r.get_json()["data"]["status"] == "ratelimited"
+
+        # A lost counter is rebuilt from Fails
+        app.attempt_counter = AttemptCounter()
+        r = client.post("/api/v1/challenges/attempt", json=data)
+        assert r.status_code == 200
+        assert r.get_json()["data"]["status"] == "correct"
+    destroy_ctfd(app)
+
+
+def test_challenges_max_attempts_without_shared_cache():
+    """Test that max_attempts is checked against Fails when the cache isn't shared by every worker"""
+    app = create_ctfd()
+    with app.app_context():
+        from CTFd.utils.counters import DatabaseAttemptCounter
+
+        assert isinstance(app.attempt_counter, DatabaseAttemptCounter)
+        register_user(app)
+        client = login_as_user(app)
+        chal = gen_challenge(app.db)
+        chal_id = chal.id
+        chal.max_attempts = 2
+        app.db.session.commit()
+        gen_flag(app.db, challenge_id=chal_id, content="flag")
+
+        for _ in range(2):
+            data = {"submission": "notflag", "challenge_id": chal_id}
+            r = client.post("/api/v1/challenges/attempt", json=data)
+            assert r.status_code == 200
+
+        data = {"submission": "flag", "challenge_id": chal_id}
+        r = client.post("/api/v1/challenges/attempt", json=data)
+        assert r.status_code == 403
+
+        # Fails written by other workers are seen straight away
+        Fails.query.delete()
+        app.db.session.commit()
+        r = client.post("/api/v1/challenges/attempt", json=data)
+        assert r.status_code == 200
+        assert r.get_json()["data"]["status"] == "correct"
+    destroy_ctfd(app)
+
+
+def test_challenges_repeated_wrong_submissions():
+    """Test that repeated wrong submissions are answered from their verdict and still rate limited"""
+    app = create_ctfd()
+    with app.app_context():
+        from CTFd.utils.counters import SlidingWindowCounter
+        from CTFd.utils.user import get_wrong_submissions_per_minute
+
+        # Repeated submissions aren't recorded so they are only counted by a tracking counter
+        app.submission_counter = SlidingWindowCounter()
+        app.config["DUPLICATE_SUBMISSION_RECORD"] = False
+        register_user(app)
+        client = login_as_user(app)
+        chal_id = gen_challenge(app.db).id
+        gen_flag(app.db, challenge_id=chal_id, content="flag")
+
+        data = {"submission": "notflag", "challenge_id": chal_id}
+        for _ in range(3):
+            r = client.post("/api/v1/challenges/attempt", json=data)
+            assert r.get_json()["data"]["status"] == "incorrect"
+        assert Fails.query.count() == 1
+        assert get_wrong_submissions_per_minute(2) == 3
+
+        # Verdicts are dropped when flags change
+        gen_flag(app.db, challenge_id=chal_id, content="notflag")
+        r = client.post("/api/v1/challenges/attempt", json=data)
+        assert r.get_json()["data"]["status"] == "correct"
+    destroy_ctfd(app)
+
+
 def test_challenge_kpm_limit():
     """Test that users are properly ratelimited when submitting flags"""
     app = create_ctfd()
@@ -0,0 +1,96 @@
+from CTFd.cache import cache
+from CTFd.models import Fails, Solves
+from CTFd.utils.grading import GRADER_KEY, GradingQueue, get_grading_result
+from tests.helpers import (
+    create_ctfd,
+    destroy_ctfd,
+    gen_challenge,
+    gen_flag,
+    login_as_user,
+    register_user,
+)
+
+
+def test_grading_queue_serves_accounts_in_turn():
+    """Test that accounts grade one attempt at a time and take turns"""
+    app = create_ctfd()
+    with app.app_context():
+        queue = GradingQueue(app, backlog=3)
+        queue.start = lambda: None
+        for _ in range(3):
+            assert queue.submit(1, 1, 1, "flag", "127.0.0.1")
+        assert queue.submit(1, 1, 1, "flag", "127.0.0.1") is None
+        queue.submit(2, 2, 1, "flag", "127.0.0.1")
+
+        assert queue._next()[0] == 1
+        assert queue._next()[0] == 2
+        # Both accounts are already being graded
+        assert queue._next() == (None, None)
+        queue.running.clear()
+        assert queue._next()[0] == 1
+    destroy_ctfd(app)
+
+
+def test_grading_results_expire_when_queue_is_gone():
+    """Test that attempts pending on a queue that stopped beating are marked as failed"""
+    app = create_ctfd()
+    with app.app_context():
+        queue = GradingQueue(app)
+        queue.start = lambda: None
+        ticket = queue.submit(1, 1, 1, "flag", "127.0.0.1")
+        assert get_grading_result(ticket)["status"] == "pending"
+
+        # The worker holding the queue was restarted
+        cache.delete(GRADER_KEY % queue.id)
+        result = get_grading_result(ticket)
+        assert result["status"] == "error"
+        assert "grader" not in result
+        assert get_grading_result(ticket)["status"] == "error"
+    destroy_ctfd(app)
+
+
+def test_async_grading():
+    """Test that attempts on challenge types with async_grading are answered with a ticket"""
+    app = create_ctfd()
+    with app.app_context():
+        from CTFd.plugins.challenges import CHALLENGE_CLASSES, CTFdStandardChallenge
+
+        class AsyncChallenge(CTFdStandardChallenge):
+            async_grading = True
+
+        CHALLENGE_CLASSES["standard"] = AsyncChallenge
+        try:
+            register_user(app)
+            register_user(app, name="user2", email="user2@examplectf.com")
+            chal_id = gen_challenge(app.db).id
+            gen_flag(app.db, challenge_id=chal_id, content="flag")
+            app.grading_queue.start = lambda: None
+
+            client = login_as_user(app)
+            tickets = []
+            for submission in ("wrong", "flag"):
+                data = {"submission": submission, "challenge_id": chal_id}
+                r = client.post("/api/v1/challenges/attempt", json=data)
+                assert r.status_code == 202
+                assert r.get_json()["data"]["status"] == "pending"
+                tickets.append(r.get_json()["data"]["ticket"])
+
+            r = client.get(f"/api/v1/challenges/attempt/{tickets[0]}")
+            assert r.get_json()["data"]["status"] == "pending"
+            assert Fails.query.count() == 0
+
+            app.grading_queue.work()
+            r = client.get(f"/api/v1/challenges/attempt/{tickets[0]}")
+            assert r.get_json()["data"]["status"] == "incorrect"
+            r = client.get(f"/api/v1/challenges/attempt/{tickets[1]}")
+            assert r.get_json()["data"]["status"] == "correct"
+            assert Fails.query.count() == 1
+            assert Solves.query.count() == 1
+
+            # Results are only available to the user who made the attempt
+            client2 = login_as_user(app, name="user2")
+            r = client2.get(f"/api/v1/challenges/attempt/{tickets[1]}")
+            assert r.status_code == 404
+        finally:
+            CHALLENGE_CLASSES["standard"] = CTFdStandardChallenge
+    destroy_ctfd(app)
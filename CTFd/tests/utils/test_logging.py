@@ -0,0 +1,71 @@
+import io
+import json
+import logging
+
+from CTFd.utils import logging as log_utils
+from CTFd.utils.logging import (
+    LogQueueHandler,
+    get_log_stats,
+    log,
+    start_log_writer,
+    stop_log_writer,
+)
+from tests.helpers import create_ctfd, destroy_ctfd
+
+
+def test_log_writes_queued_records():
+    """Test that log() only queues records which the background writer formats and writes"""
+    app = create_ctfd()
+    with app.test_request_context(environ_base={"REMOTE_ADDR": "127.0.0.1"}):
+        stream = io.StringIO()
+        start_log_writer(
+            {"submissions": [logging.StreamHandler(stream)]}, json_lines=True
+        )
+        log(
+            "submissions",
+            "[{date}] {name} submitted {submission}",
+            name="user",
+            submission="flag".encode("utf-8"),
+        )
+        # Stopping the writer writes everything that was queued
+        stop_log_writer()
+        record = json.loads(stream.getvalue())
+        assert record["logger"] == "submissions"
+        assert record["name"] == "user"
+        assert record["submission"] == "flag"
+        assert record["message"] == "[{date}] user submitted b'flag'".format(
+            date=record["date"]
+        )
+        assert get_log_stats() == {"queue_depth": 0, "dropped": 0, "failed": 0}
+    destroy_ctfd(app)
+
+
+def test_log_queue_handler_drops_records_when_full():
+    """Test that a full log queue drops and counts records instead of blocking"""
+    handler = LogQueueHandler(maxsize=1)
+    logger = logging.getLogger("test_log_queue_handler")
+    logger.addHandler(handler)
+    logger.propagate = False
+    try:
+        logger.warning("first")
+        logger.warning("second")
+    finally:
+        logger.removeHandler(handler)
+    assert handler.queue.qsize() == 1
+    assert handler.dropped == 1
+
+
+def test_log_writer_survives_failing_records():
+    """Test that a record the writer can't handle is counted and doesn't stop the writer"""
+    app = create_ctfd()
+    with app.test_request_context(environ_base={"REMOTE_ADDR": "127.0.0.1"}):
+        stream = io.StringIO()
+        start_log_writer({"submissions": [logging.StreamHandler(stream)]})
+        log_utils._queue_handler.queue.put_nowait({"not": "a record"})
+        log("submissions", "[{date}] {name} submitted", name="user")
+
+        listener = log_utils._queue_listener
+        stop_log_writer()
+        assert listener.failed == 1
+        assert "user submitted" in stream.getvalue()
+    destroy_ctfd(app)
@@ -1,4 +1,5 @@
-from CTFd.utils import markdown
+from CTFd.utils import markdown, set_config
+from tests.helpers import create_ctfd, destroy_ctfd
 
 
 def test_markdown():
@@ -10,3 +11,28 @@ def test_markdown():
         markdown("<iframe src='https://example.com'></iframe>").strip()
         == "<iframe src='https://example.com'></iframe>"
     )
+
+
+def test_build_markdown_follows_configs():
+    """
+    Test that rendered markdown is reused until the configs it depends on change
+    """
+    app = create_ctfd()
+    with app.app_context():
+        from CTFd.utils.config.pages import _render, build_html, build_markdown
+
+        content = "**{ctf_name}** <script>alert(1)</script>"
+        assert "<strong>CTFd</strong>" in build_markdown(content)
+        hits = _render.cache_info().hits
+        assert build_markdown(content) == build_markdown(content)
+        assert _render.cache_info().hits == hits + 2
+
+        set_config("ctf_name", "Renamed")
+        assert "<strong>Renamed</strong>" in build_markdown(content)
+        assert "<script>" in build_markdown(content)
+        assert "<script>" not in build_markdown(content, sanitize=True)
+
+        set_config("html_sanitization", True)
+        assert "<script>" not in build_markdown(content)
+        assert "<script>" not in build_html(content)
+    destroy_ctfd(app)
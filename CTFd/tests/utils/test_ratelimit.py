@@ -1,4 +1,19 @@
-from tests.helpers import create_ctfd, destroy_ctfd, register_user
+import time
+from datetime import datetime, timedelta
+
+from freezegun import freeze_time
+
+from CTFd.models import Fails
+from CTFd.utils.counters import DatabaseSlidingWindowCounter, SlidingWindowCounter
+from tests.helpers import (
+    create_ctfd,
+    destroy_ctfd,
+    gen_challenge,
+    gen_fail,
+    gen_flag,
+    login_as_user,
+    register_user,
+)
 
 
 def test_ratelimit_on_auth():
@@ -22,3 +37,112 @@ def test_ratelimit_on_auth():
                 r = client.post("/login", data=data)
                 assert r.status_code == 429
     destroy_ctfd(app)
+
+
+def test_sliding_window_counter():
+    """Test that the sliding window counter forgets events as they leave the window"""
+    counter = SlidingWindowCounter(window=60, precision=6)
+    with freeze_time("2024-01-01 00:00:00") as frozen:
+        for _ in range(4):
+            counter.hit("key")
+        frozen.tick(timedelta(seconds=30))
+        counter.hit("key", amount=2)
+        assert counter.count("key") == 6
+        assert counter.count("other") == 0
+
+        # Half of the first bucket is still in the window
+        frozen.tick(timedelta(seconds=35))
+        assert counter.count("key") == 4
+
+        frozen.tick(timedelta(seconds=40))
+        assert counter.count("key") == 0
+
+        # Loaded events are counted in the buckets of their own timestamps and merged with the hits
+        counter.hit("key")
+        now = time.time()
+        assert counter.count("key", load=lambda: [now - 50, now - 20, now]) == 3
+        # The key isn't loaded again until the next window
+        assert counter.count("key", load=lambda: [now] * 10) == 3
+
+        # Loaded events leave the window like counted ones
+        frozen.tick(timedelta(seconds=30))
+        assert counter.count("key") == 2
+
+
+def test_database_sliding_window_counter():
+    """Test that the database sliding window counter only counts the loaded events in the window"""
+    counter = DatabaseSlidingWindowCounter(window=60, precision=6)
+    with freeze_time("2024-01-01 00:00:00"):
+        now = time.time()
+        counter.hit("key")
+        assert counter.count("key") == 0
+        assert counter.count("key", load=lambda: [now - 90, now - 30, now]) == 2
+        assert counter.count("key", load=lambda: [now]) == 1
+
+
+def test_wrong_submissions_are_counted_without_fails():
+    """Test that the kpm limit is served from the submission counter and reloaded from Fails"""
+    app = create_ctfd()
+    with app.app_context():
+        # The simple cache isn't shared so wrong submissions are counted in process
+        app.submission_counter = SlidingWindowCounter()
+        register_user(app)
+        chal_id = gen_challenge(app.db).id
+        gen_flag(app.db, challenge_id=chal_id, content="flag")
+        client = login_as_user(app)
+        for _ in range(11):
+            data = {"submission": "notflag", "challenge_id": chal_id}
+            r = client.post("/api/v1/challenges/attempt", json=data)
+            assert r.status_code == 200
+
+        # Only the counter is used once it's loaded
+        Fails.query.delete()
+        app.db.session.commit()
+        data = {"submission": "flag", "challenge_id": chal_id}
+        r = client.post("/api/v1/challenges/attempt", json=data)
+        assert r.status_code == 429
+
+        # A new counter (e.g. after a restart) is loaded from the Fails of the last minute
+        for _ in range(11):
+            gen_fail(app.db, user_id=2, challenge_id=chal_id)
+        app.submission_counter = SlidingWindowCounter()
+        r = client.post("/api/v1/challenges/attempt", json=data)
+        assert r.status_code == 429
+        assert r.get_json()["data"]["status"] == "ratelimited"
+
+        # Fails outside of the window aren't loaded
+        for fail in Fails.query.all():
+            fail.date = datetime.utcnow() - timedelta(minutes=5)
+        app.db.session.commit()
+        app.submission_counter = SlidingWindowCounter()
+        r = client.post("/api/v1/challenges/attempt", json=data)
+        assert r.status_code == 200
+        assert r.get_json()["data"]["status"] == "correct"
+    destroy_ctfd(app)
+
+
+def test_wrong_submissions_are_counted_from_fails_without_shared_cache():
+    """Test that the kpm limit is checked against Fails when the cache isn't shared by every worker"""
+    app = create_ctfd()
+    with app.app_context():
+        assert isinstance(app.submission_counter, DatabaseSlidingWindowCounter)
+        register_user(app)
+        chal_id = gen_challenge(app.db).id
+        gen_flag(app.db, challenge_id=chal_id, content="flag")
+        client = login_as_user(app)
+        for _ in range(11):
+            data = {"submission": "notflag", "challenge_id": chal_id}
+            r = client.post("/api/v1/challenges/attempt", json=data)
+            assert r.status_code == 200
+
+        data = {"submission": "flag", "challenge_id": chal_id}
+        r = client.post("/api/v1/challenges/attempt", json=data)
+        assert r.status_code == 429
+
+        # Fails written by other workers are seen straight away
+        Fails.query.delete()
+        app.db.session.commit()
+        r = client.post("/api/v1/challenges/attempt", json=data)
+        assert r.status_code == 200
+        assert r.get_json()["data"]["status"] == "correct"
+    destroy_ctfd(app)
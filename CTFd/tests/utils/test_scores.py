@@ -0,0 +1,462 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import datetime
+import time
+
+from CTFd.cache import clear_standings, invalidate
+from CTFd.models import AccountScores, Awards, Challenges, Solves, Teams, Users
+from CTFd.utils import set_config
+from CTFd.utils.scores import engine as standings_engine
+from CTFd.utils.scores import (
+    get_account_rank,
+    get_score_progression,
+    get_standings,
+    get_team_members,
+    get_team_scores,
+    get_user_rank,
+)
+from CTFd.utils.scores.engine import (
+    StandingsEngine,
+    get_engine,
+    record_award,
+    record_removal,
+    record_solve,
+)
+from CTFd.utils.scores.materialized import DIMENSIONS, aggregate_scores, load_scores
+from tests.helpers import (
+    create_ctfd,
+    destroy_ctfd,
+    gen_award,
+    gen_bracket,
+    gen_challenge,
+    gen_solve,
+    gen_team,
+    gen_user,
+    register_user,
+)
+
+
+def test_standings_engine_applies_events_without_rebuilding():
+    """Score events published by one worker are replayed by every other worker"""
+    app = create_ctfd()
+    with app.app_context():
+        register_user(app, name="user1", email="user1@examplectf.com")
+        register_user(app, name="user2", email="user2@examplectf.com")
+        chal1 = gen_challenge(app.db)
+        chal2 = gen_challenge(app.db)
+        solve = gen_solve(app.db, user_id=2, challenge_id=chal1.id)
+        # The first event on a fresh sequence counter starts a new epoch
+        record_solve(solve)
+
+        # Simulate a second worker with its own copy of the standings
+        other = StandingsEngine()
+        assert [info.name for info, _ in other.standings("users")] == ["user1"]
+        standings = get_standings()
+        assert [s.name for s in standings] == ["user1"]
+
+        rebuilds = []
+        for engine in (get_engine(), other):
+            engine.rebuild = lambda epoch, engine=engine: rebuilds.append(engine)
+
+        for challenge_id in (chal1.id, chal2.id):
+            solve = Solves(
+                user_id=3, challenge_id=challenge_id, ip="127.0.0.1", provided="x"
+            )
+            solve.date = datetime.datetime.utcnow()
+            app.db.session.add(solve)
+        app.db.session.commit()
+        record_solve(solve)
+
+        assert [(s.name, s.score) for s in get_standings()] == [
+            ("user2", 200),
+            ("user1", 100),
+        ]
+        standings = other.standings("users")
+        assert [(info.name, aggregate.score) for info, aggregate in standings] == [
+            ("user2", 200),
+            ("user1", 100),
+        ]
+
+        award = Awards(user_id=2, name="bonus", value=150)
+        award.date = datetime.datetime.utcnow()
+        app.db.session.add(award)
+        app.db.session.commit()
+        record_award(award)
+        assert [(s.name, s.score) for s in get_standings()] == [
+            ("user1", 250),
+            ("user2", 200),
+        ]
+
+        # Removals are applied even though the new aggregate is older
+        app.db.session.delete(award)
+        app.db.session.commit()
+        record_removal(user_id=2)
+        assert [(s.name, s.score) for s in get_standings()] == [
+            ("user2", 200),
+            ("user1", 100),
+        ]
+        assert rebuilds == []
+    destroy_ctfd(app)
+
+
+def test_standings_engine_rebuilds_without_atomic_sequence():
+    """Caches shared without an atomic increment make every worker rebuild instead of logging events"""
+    app = create_ctfd()
+    with app.app_context():
+        from CTFd.cache import cache
+
+        register_user(app)
+        chal = gen_challenge(app.db)
+        get_engine().sync()
+        epoch = cache.get(standings_engine.EPOCH_KEY)
+        seq = cache.get(standings_engine.SEQUENCE_KEY)
+
+        app.config["CACHE_TYPE"] = "filesystem"
+        solve = gen_solve(app.db, user_id=2, challenge_id=chal.id)
+        record_solve(solve)
+        assert cache.get(standings_engine.SEQUENCE_KEY) == seq
+        assert cache.get(standings_engine.EPOCH_KEY) != epoch
+        assert [(s.name, s.score) for s in get_standings()] == [("user", 100)]
+        app.config["CACHE_TYPE"] = "simple"
+    destroy_ctfd(app)
+
+
+def test_account_scores_are_maintained_with_solves_and_awards():
+    """The account_scores table is updated in the same transaction as solves, awards and value changes"""
+    app = create_ctfd(user_mode="teams")
+    with app.app_context():
+        team = gen_team(app.db, member_count=2)
+        member_ids = [member.id for member in team.members]
+        chal1 = gen_challenge(app.db, value=100)
+        chal2 = gen_challenge(app.db, value=50)
+        chal1_id, chal2_id, team_id = chal1.id, chal2.id, team.id
+
+        def materialized():
+            return {
+                (dimension, account_id): aggregate.score
+                for dimension in DIMENSIONS
+                for account_id, aggregate in load_scores(dimension).items()
+            }
+
+        def aggregated():
+            return {
+                (dimension, account_id): aggregate.score
+                for dimension in DIMENSIONS
+                for account_id, aggregate in aggregate_scores(dimension).items()
+            }
+
+        for member_id, challenge_id in zip(member_ids, (chal1_id, chal2_id)):
+            solve = Solves(
+                user_id=member_id,
+                team_id=team_id,
+                challenge_id=challenge_id,
+                ip="127.0.0.1",
+                provided="x",
+            )
+            app.db.session.add(solve)
+            app.db.session.commit()
+        assert materialized() == aggregated()
+        assert materialized()["teams", team_id] == 150
+
+        award = Awards(user_id=member_ids[0], team_id=team_id, value=-20)
+        app.db.session.add(award)
+        app.db.session.commit()
+        assert materialized()["teams", team_id] == 130
+
+        # Value changes are applied to every solver
+        chal1 = Challenges.query.filter_by(id=chal1_id).first()
+        chal1.value = 70
+        app.db.session.commit()
+        assert materialized() == aggregated()
+        assert materialized()["teams", team_id] == 100
+
+        chal2 = Challenges.query.filter_by(id=chal2_id).first()
+        chal2.value = 0
+        app.db.session.commit()
+        assert materialized() == aggregated()
+
+        app.db.session.delete(Awards.query.filter_by(id=award.id).first())
+        app.db.session.commit()
+        assert materialized() == aggregated()
+        assert materialized()["teams", team_id] == 70
+        assert Users.query.filter_by(id=member_ids[0]).first().get_score() == 70
+    destroy_ctfd(app)
+
+
+def test_account_scores_follow_concurrent_value_changes():
+    """Value changes made on a stale copy of a challenge leave the solvers at the committed value"""
+    app = create_ctfd()
+    with app.app_context():
+        user = gen_user(app.db)
+        chal = gen_challenge(app.db, value=500)
+        gen_solve(app.db, user_id=user.id, challenge_id=chal.id)
+        user_id = user.id
+        assert load_scores("users")[user_id].score == 500
+
+        # Another worker decays the challenge to 490 while this one still has it at 500
+        chal = Challenges.query.filter_by(id=chal.id).first()
+        assert chal.value == 500
+        app.db.session.execute(
+            Challenges.__table__.update()
+            .where(Challenges.id == chal.id)
+            .values(value=490)
+        )
+        app.db.session.execute(
+            AccountScores.__table__.update()
+            .where(AccountScores.account_id == user_id)
+            .values(score=490)
+        )
+        chal.value = 480
+        app.db.session.commit()
+        assert load_scores("users")[user_id].score == 480
+        assert aggregate_scores("users")[user_id].score == 480
+    destroy_ctfd(app)
+
+
+def test_rank_index():
+    """Ranks, scores and points to the next place are looked up from the rank index"""
+    app = create_ctfd()
+    with app.app_context():
+        gen_bracket(app.db, name="students")
+        bracket_id = 1
+        gen_user(app.db, name="user1", email="user1@examplectf.com")
+        for i in (2, 3):
+            gen_user(
+                app.db,
+                name=f"user{i}",
+                email=f"user{i}@examplectf.com",
+                bracket_id=bracket_id,
+            )
+
+        chal1 = gen_challenge(app.db, value=100)
+        chal2 = gen_challenge(app.db, value=300)
+        gen_solve(app.db, user_id=2, challenge_id=chal1.id)
+        gen_solve(app.db, user_id=3, challenge_id=chal2.id)
+        gen_solve(app.db, user_id=4, challenge_id=chal1.id)
+
+        assert get_user_rank(3) == (1, 300, 0)
+        assert get_user_rank(2) == (2, 100, 200)
+        assert get_user_rank(4) == (3, 100, 0)
+        assert get_user_rank(4, bracket_id=bracket_id) == (2, 100, 200)
+        assert get_user_rank(2, bracket_id=bracket_id) is None
+        assert get_account_rank(4).place == 3
+        assert Users.query.filter_by(id=4).first().get_place(numeric=True) == 3
+
+        # Hidden accounts are only ranked for admins
+        Users.query.filter_by(id=3).first().hidden = True
+        app.db.session.commit()
+        clear_standings()
+        assert get_user_rank(3) is None
+        assert get_user_rank(2) == (1, 100, 0)
+        assert get_user_rank(3, admin=True) == (1, 300, 0)
+    destroy_ctfd(app)
+
+
+def test_get_team_scores():
+    """Team totals and member breakdowns are computed for many teams at once"""
+    app = create_ctfd(user_mode="teams")
+    with app.app_context():
+        team1 = gen_team(app.db, name="team1", email="team1@examplectf.com")
+        team2 = gen_team(app.db, name="team2", email="team2@examplectf.com")
+        team3 = gen_team(app.db, name="team3", email="team3@examplectf.com")
+        team1_id, team2_id, team3_id = team1.id, team2.id, team3.id
+        member1, member2 = [member.id for member in team1.members][:2]
+        member3 = team2.members[0].id
+
+        chal = gen_challenge(app.db, value=100)
+        gen_solve(app.db, user_id=member1, team_id=team1_id, challenge_id=chal.id)
+        gen_solve(app.db, user_id=member3, team_id=team2_id, challenge_id=chal.id)
+        gen_award(app.db, user_id=member2, team_id=team1_id, value=25)
+
+        scores = get_team_scores([team1_id, team2_id, team3_id])
+        assert scores[team1_id].score == 125
+        assert scores[team1_id].members[member1] == 100
+        assert scores[team1_id].members[member2] == 25
+        assert len(scores[team1_id].members) == len(team1.members)
+        assert scores[team2_id].score == 100
+        assert scores[team3_id].score == 0
+        assert set(scores[team3_id].members.values()) == {0}
+
+        team = Teams.query.filter_by(id=team1_id).first()
+        assert team.get_score() == 125
+        assert team.member_scores[member2] == 25
+    destroy_ctfd(app)
+
+
+def test_score_progression_is_updated_from_events():
+    """Score progressions are loaded once and then kept current from score events"""
+    app = create_ctfd()
+    with app.app_context():
+        register_user(app, name="user1", email="user1@examplectf.com")
+        chal1 = gen_challenge(app.db, value=100)
+        chal2 = gen_challenge(app.db, value=50)
+        chal1_id, chal2_id = chal1.id, chal2.id
+        solve = gen_solve(app.db, user_id=2, challenge_id=chal1_id)
+        # The first event on a fresh sequence counter starts a new epoch
+        record_solve(solve)
+
+        progression = get_score_progression([2])
+        assert [(p.challenge_id, p.value) for p in progression[2]] == [(chal1_id, 100)]
+
+        loads = []
+        load_points = standings_engine.load_points
+        standings_engine.load_points = lambda *args, **kwargs: loads.append(args)
+        try:
+            solve = Solves(
+                user_id=2, challenge_id=chal2_id, ip="127.0.0.1", provided="x"
+            )
+            solve.date = datetime.datetime.utcnow()
+            app.db.session.add(solve)
+            app.db.session.commit()
+            record_solve(solve)
+
+            award = Awards(user_id=2, name="bonus", value=10)
+            award.date = datetime.datetime.utcnow()
+            app.db.session.add(award)
+            app.db.session.commit()
+            record_award(award)
+            # Replaying an event that was already applied doesn't duplicate the point
+            record_award(award)
+
+            progression = get_score_progression([2])
+            assert [(p.type, p.value) for p in progression[2]] == [
+                ("solves", 100),
+                ("solves", 50),
+                ("awards", 10),
+            ]
+            assert loads == []
+        finally:
+            standings_engine.load_points = load_points
+
+        with app.test_client() as client:
+            data = client.get("/api/v1/scoreboard/top/1").get_json()["data"]
+            solves = data["1"]["solves"]
+            assert [s["value"] for s in solves] == [100, 50, 10]
+            assert [s["challenge_id"] for s in solves] == [chal1_id, chal2_id, None]
+            assert {s["account_id"] for s in solves} == {2}
+    destroy_ctfd(app)
+
+
+def test_freeze_snapshot():
+    """Once the scoreboard is frozen public scores and solve counts are served from the freeze snapshot"""
+    app = create_ctfd()
+    with app.app_context():
+        from CTFd.utils.challenges import get_solve_counts_for_challenges
+
+        register_user(app, name="user1", email="user1@examplectf.com")
+        register_user(app, name="user2", email="user2@examplectf.com")
+        chal = gen_challenge(app.db, value=100)
+        chal_id = chal.id
+        solve = gen_solve(app.db, user_id=2, challenge_id=chal_id)
+        solve.date = datetime.datetime.utcnow() - datetime.timedelta(minutes=10)
+        app.db.session.commit()
+
+        set_config("freeze", int(time.time()) + 60)
+        clear_standings()
+        # Before the freeze time there is nothing to snapshot
+        assert get_solve_counts_for_challenges() == {chal_id: 1}
+
+        set_config("freeze", int(time.time()) - 60)
+        clear_standings()
+        assert get_solve_counts_for_challenges() == {chal_id: 1}
+        assert Users.query.filter_by(id=3).first().get_score() == 0
+
+        # Rows written without going through the score helpers don't change the snapshot
+        solve = Solves(user_id=3, challenge_id=chal_id, ip="127.0.0.1", provided="x")
+        solve.date = datetime.datetime.utcnow() - datetime.timedelta(minutes=5)
+        app.db.session.add(solve)
+        app.db.session.commit()
+        invalidate("solves", "standings")
+        assert get_solve_counts_for_challenges() == {chal_id: 1}
+        assert get_solve_counts_for_challenges(admin=True) == {chal_id: 2}
+        assert (
+            Users.query.filter_by(id=3)
+            .first()
+            .get_score.uncached(Users.query.filter_by(id=3).first())
+            == 0
+        )
+
+        # Admin corrections rebuild it
+        clear_standings()
+        assert get_solve_counts_for_challenges() == {chal_id: 2}
+        assert Users.query.filter_by(id=3).first().get_score() == 100
+        assert [s.name for s in get_standings()] == ["user1", "user2"]
+    destroy_ctfd(app)
+
+
+def test_bracket_standings_are_built_in_one_pass():
+    """The global standings and every bracket's standings come from a single pass"""
+    app = create_ctfd()
+    with app.app_context():
+        gen_bracket(app.db, name="students")
+        gen_bracket(app.db, name="professionals")
+        for i, bracket_id in enumerate((1, 2, 1, None), start=1):
+            gen_user(
+                app.db,
+                name=f"user{i}",
+                email=f"user{i}@examplectf.com",
+                bracket_id=bracket_id,
+            )
+        chal = gen_challenge(app.db, value=100)
+        for user_id in (2, 3, 4, 5):
+            gen_solve(app.db, user_id=user_id, challenge_id=chal.id)
+
+        engine = get_engine()
+        passes = []
+        ranked = engine.ranked
+        engine.ranked = lambda *args, **kwargs: passes.append(args) or ranked(
+            *args, **kwargs
+        )
+        try:
+            assert [s.name for s in get_standings()] == [
+                "user1",
+                "user2",
+                "user3",
+                "user4",
+            ]
+            assert [s.name for s in get_standings(bracket_id=1)] == ["user1", "user3"]
+            assert [s.name for s in get_standings(bracket_id=2, count=1)] == ["user2"]
+            assert get_standings(bracket_id=3) == []
+            assert get_user_rank(4, bracket_id=1) == (2, 100, 0)
+            assert passes == [("users",)]
+        finally:
+            engine.ranked = ranked
+    destroy_ctfd(app)
+
+
+def test_team_members_follow_account_changes():
+    """Team rosters are updated when members join, leave or are hidden"""
+    app = create_ctfd(user_mode="teams")
+    with app.app_context():
+        team = gen_team(app.db, member_count=2)
+        team_id = team.id
+        member_ids = [member.id for member in team.members]
+        chal = gen_challenge(app.db, value=100)
+        gen_solve(app.db, user_id=member_ids[0], team_id=team_id, challenge_id=chal.id)
+
+        members = get_team_members([team_id])[team_id]
+        assert [(info.id, score) for info, score in members] == [
+            (member_ids[0], 100),
+            (member_ids[1], 0),
+        ]
+
+        user = gen_user(app.db, name="user5", email="user5@examplectf.com")
+        user.team_id = team_id
+        app.db.session.commit()
+        members = get_team_members([team_id])[team_id]
+        assert [info.id for info, _score in members] == member_ids + [user.id]
+
+        Users.query.filter_by(id=member_ids[1]).first().hidden = True
+        Users.query.filter_by(id=user.id).first().team_id = None
+        app.db.session.commit()
+        members = get_team_members([team_id])[team_id]
+        assert [info.id for info, _score in members] == [member_ids[0]]
+        members = get_team_members([team_id], admin=True)[team_id]
+        assert [info.id for info, _score in members] == member_ids
+
+        with app.test_client() as client:
+            data = client.get("/api/v1/scoreboard").get_json()["data"]
+            assert [m["id"] for m in data[0]["members"]] == [member_ids[0]]
+            assert data[0]["members"][0]["score"] == 100
+    destroy_ctfd(app)
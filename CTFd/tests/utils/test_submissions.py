@@ -0,0 +1,113 @@
+from sqlalchemy.exc import OperationalError
+
+from CTFd.models import Challenges, Fails, Submissions
+from CTFd.utils.submissions import SubmissionSink, save_submission, single_transaction
+from tests.helpers import (
+    create_ctfd,
+    destroy_ctfd,
+    gen_challenge,
+    gen_flag,
+    login_as_user,
+    register_user,
+)
+
+
+def test_submission_sink_writes_fails_behind():
+    """Test that buffered Fails count towards max_attempts and are inserted in bulk"""
+    app = create_ctfd()
+    with app.app_context():
+        register_user(app)
+        chal = gen_challenge(app.db)
+        chal_id = chal.id
+        Challenges.query.filter_by(id=chal_id).first().max_attempts = 3
+        app.db.session.commit()
+        gen_flag(app.db, challenge_id=chal_id, content="flag")
+        app.submission_sink = SubmissionSink(app, size=3)
+
+        client = login_as_user(app)
+        data = {"submission": "notflag", "challenge_id": chal_id}
+        for _ in range(2):
+            r = client.post("/api/v1/challenges/attempt", json=data)
+            assert r.get_json()["data"]["status"] == "incorrect"
+
+        # Nothing is inserted until the sink is flushed
+        assert Fails.query.count() == 0
+        assert app.submission_sink.pending_fails(2, chal_id) == 2
+        assert app.submission_sink.flush() == 2
+        assert app.submission_sink.pending_fails(2, chal_id) == 0
+        fails = Fails.query.all()
+        assert len(fails) == 2
+        assert {fail.type for fail in fails} == {"incorrect"}
+        assert {fail.provided for fail in fails} == {"notflag"}
+
+        # Buffered Fails count towards max_attempts
+        r = client.post("/api/v1/challenges/attempt", json=data)
+        assert r.get_json()["data"]["status"] == "incorrect"
+        assert app.submission_sink.pending_fails(2, chal_id) == 1
+        r = client.post("/api/v1/challenges/attempt", json=data)
+        assert r.status_code == 403
+        assert r.get_json()["data"]["status"] == "ratelimited"
+
+        # Reaching the batch size flushes right away
+        for _ in range(2):
+            app.submission_sink.add(Fails(user_id=2, challenge_id=chal_id, ip="1"))
+        assert app.submission_sink.buffered() == 0
+        assert Submissions.query.count() == 5
+    destroy_ctfd(app)
+
+
+def test_submission_sink_retries_failed_flushes():
+    """Test that a failed flush keeps the buffered submissions for the next flush"""
+    app = create_ctfd()
+    with app.app_context():
+        register_user(app)
+        chal_id = gen_challenge(app.db).id
+        sink = SubmissionSink(app)
+        for _ in range(2):
+            sink.add(Fails(user_id=2, challenge_id=chal_id, ip="1", provided="x"))
+
+        insert = sink.insert
+        errors = []
+
+        def insert_once(batch):
+            if not errors:
+                errors.append(True)
+                raise OperationalError("INSERT", {}, Exception("connection lost"))
+            insert(batch)
+
+        sink.insert = insert_once
+        assert sink.try_flush() is False
+        assert sink.buffered() == 2
+        assert Fails.query.count() == 0
+
+        assert sink.try_flush() is True
+        assert sink.buffered() == 0
+        assert Fails.query.count() == 2
+        assert sink.pending_fails(2, chal_id) == 0
+    destroy_ctfd(app)
+
+
+def test_single_transaction():
+    """Test that submissions saved in a single transaction are committed or rolled back together"""
+    app = create_ctfd()
+    with app.app_context():
+        register_user(app)
+        chal_id = gen_challenge(app.db).id
+        app.submission_sink = SubmissionSink(app)
+
+        with single_transaction():
+            for _ in range(2):
+                save_submission(Fails(user_id=2, challenge_id=chal_id, provided="a"))
+        # Batches bypass the write-behind sink
+        assert app.submission_sink.buffered() == 0
+        assert Fails.query.count() == 2
+
+        try:
+            with single_transaction():
+                save_submission(Fails(user_id=2, challenge_id=chal_id, provided="b"))
+                app.db.session.commit()
+                raise ValueError
+        except ValueError:
+            pass
+        assert Fails.query.count() == 2
+    destroy_ctfd(app)